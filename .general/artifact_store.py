@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed store for generated posts, so publishing can be retried
+
+A post is kept as soon as it is built - before any upload - as a gzip blob
+named after the sha256 of its text (`{root}/{digest[:2]}/{digest}.md.gz`),
+and indexed in the state store's `artifacts` table by repo, keyword and
+state with its filename, title, front matter and image references. An
+upload that fails leaves the post in state 'generated' or 'failed', and the
+next attempt publishes the stored post instead of generating it again.
+
+States: generated (stored, not published yet), published, failed (upload
+failed, will be retried), skipped (not published, e.g. near-duplicate).
+
+Each post also records its destination: GITHUB for posts the app uploads,
+LOCAL for posts the command line generator writes to its output folder.
+A consumer only reuses posts of its own destination, so a post built for
+GitHub is never settled by writing a local file.
+"""
+
+import os
+import re
+import gzip
+import hashlib
+import threading
+
+import yaml
+
+ARTIFACT_DIR = "data/artifacts"
+UNPUBLISHED_STATES = ('generated', 'failed')
+GITHUB = 'github'
+LOCAL = 'local'
+IMAGE_PATTERN = re.compile(r'!\[[^\]]*\]\(\s*<?([^)\s>]+)')
+
+
+def split_front_matter(post):
+    """(front matter dict, body) of a post; ({}, post) when it has no front matter"""
+    if post.startswith('---\n'):
+        end = post.find('\n---\n', 3)
+        if end != -1:
+            front_matter = yaml.safe_load(post[4:end + 1]) or {}
+            return front_matter, post[end + 5:].strip('\n')
+    return {}, post
+
+
+class ArtifactStore:
+    """Generated posts as compressed blobs, indexed per repo and keyword in a StateStore"""
+
+    def __init__(self, index, root=ARTIFACT_DIR, compress_level=6):
+        self.index = index
+        self.root = root
+        self.compress_level = compress_level
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.md.gz")
+
+    def put(self, repo, keyword, post, filename, destination):
+        """Store a built post (markdown with front matter) for GITHUB or LOCAL and index it; returns its artifact"""
+        data = post.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as file:
+                # mtime=0: the same post always compresses to the same bytes
+                file.write(gzip.compress(data, compresslevel=self.compress_level, mtime=0))
+            os.replace(temp_path, path)
+
+        front_matter, body = split_front_matter(post)
+        images = IMAGE_PATTERN.findall(body)
+        if front_matter.get('image'):
+            images.insert(0, front_matter['image'])
+        title = front_matter.get('title') or keyword
+        self.index.save_artifact(repo, keyword, digest, destination, filename, title, front_matter, images, len(data))
+        return self.index.artifacts(repo, keyword=keyword, digest=digest)[0]
+
+    def read(self, digest):
+        """Text of a stored post; ValueError if the blob does not match its digest"""
+        with open(self.path(digest), 'rb') as file:
+            data = gzip.decompress(file.read())
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Artifact {digest} rusak (hash tidak cocok)")
+        return data.decode('utf-8')
+
+    def read_body(self, digest):
+        """Post text without its front matter"""
+        return split_front_matter(self.read(digest))[1]
+
+    def latest(self, repo, keyword, destination, states=UNPUBLISHED_STATES):
+        """A keyword's newest artifact for a destination if it is in one of `states` (None: any), else None"""
+        artifacts = self.index.artifacts(repo, keyword=keyword, destination=destination, limit=1)
+        if artifacts and (states is None or artifacts[0]['state'] in states):
+            return artifacts[0]
+        return None
+
+    def unpublished(self, repo, destination, limit=None):
+        """Keywords whose newest post for a destination is still waiting to be published, newest first"""
+        return self.index.artifacts(
+            repo, destination=destination, states=UNPUBLISHED_STATES, newest_only=True, limit=limit
+        )
+
+    def mark(self, repo, keyword, digest, state, detail=None):
+        self.index.set_artifact_state(repo, keyword, digest, state, detail)
+
+    def counts(self, repo):
+        return self.index.artifact_counts(repo)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Offline bulk generation through the Gemini Batch API
+
+Prompts are written to a JSONL file, uploaded with the Files API, submitted
+as one batch job and polled until done; results are streamed back line by line.
+"""
+
+import os
+import json
+import time
+import datetime
+
+from http_client import HTTPResponseError
+
+BATCH_FOLDER = "data/batches"
+TERMINAL_STATES = {
+    'BATCH_STATE_SUCCEEDED', 'BATCH_STATE_FAILED', 'BATCH_STATE_CANCELLED', 'BATCH_STATE_EXPIRED',
+    'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'
+}
+SUCCEEDED_STATES = {'BATCH_STATE_SUCCEEDED', 'JOB_STATE_SUCCEEDED'}
+
+
+class BatchJobError(Exception):
+    """Raised when a batch job cannot be submitted or finishes unsuccessfully"""
+
+
+class GeminiBatchClient:
+    """Minimal client for the Files API and batchGenerateContent"""
+
+    def __init__(self, http_client, api_key, api_base):
+        self.http_client = http_client
+        self.api_key = api_key
+        self.api_base = api_base.rstrip('/')
+        # Upload/download endpoints live next to the versioned API root
+        root, _, version = self.api_base.rpartition('/')
+        self.upload_base = f"{root}/upload/{version}"
+        self.download_base = f"{root}/download/{version}"
+
+    def upload_jsonl(self, path, display_name):
+        """Upload a JSONL file with the resumable protocol and return its file name"""
+        size = os.path.getsize(path)
+        start = self.http_client.request(
+            'POST',
+            f"{self.upload_base}/files?key={self.api_key}",
+            body=json.dumps({'file': {'display_name': display_name}}).encode('utf-8'),
+            headers={
+                'Content-Type': 'application/json',
+                'X-Goog-Upload-Protocol': 'resumable',
+                'X-Goog-Upload-Command': 'start',
+                'X-Goog-Upload-Header-Content-Length': str(size),
+                'X-Goog-Upload-Header-Content-Type': 'application/jsonl'
+            }
+        )
+        upload_url = start.headers.get('X-Goog-Upload-URL')
+        if not upload_url:
+            raise BatchJobError("Upload session was not created")
+
+        with open(path, 'rb') as file:
+            response = self.http_client.request(
+                'POST',
+                upload_url,
+                body=file.read(),
+                headers={
+                    'Content-Length': str(size),
+                    'X-Goog-Upload-Offset': '0',
+                    'X-Goog-Upload-Command': 'upload, finalize'
+                },
+                timeout=300
+            )
+        return json.loads(response.data.decode('utf-8'))['file']['name']
+
+    def create_batch(self, model, file_name, display_name):
+        """Submit a batch job over an uploaded JSONL file and return the batch name"""
+        payload = {
+            'batch': {
+                'display_name': display_name,
+                'input_config': {'file_name': file_name}
+            }
+        }
+        result, _ = self.http_client.post_json(
+            f"{self.api_base}/models/{model}:batchGenerateContent?key={self.api_key}",
+            payload
+        )
+        return result['name']
+
+    def get_batch(self, batch_name):
+        response = self.http_client.request('GET', f"{self.api_base}/{batch_name}?key={self.api_key}")
+        return json.loads(response.data.decode('utf-8'))
+
+    @staticmethod
+    def batch_state(batch):
+        return batch.get('metadata', {}).get('state') or batch.get('state', 'BATCH_STATE_UNSPECIFIED')
+
+    def wait(self, batch_name, poll_interval=30, timeout=None, status_callback=None):
+        """Poll until the batch reaches a terminal state and return the batch resource"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                batch = self.get_batch(batch_name)
+            except HTTPResponseError as e:
+                if e.status < 500 and e.status != 429:
+                    raise
+                batch = {}
+            state = self.batch_state(batch)
+            if status_callback:
+                status_callback(state)
+            if state in TERMINAL_STATES:
+                if state not in SUCCEEDED_STATES:
+                    raise BatchJobError(f"Batch {batch_name} finished with {state}")
+                return batch
+            if deadline is not None and time.monotonic() >= deadline:
+                raise BatchJobError(f"Timed out waiting for batch {batch_name} ({state})")
+            time.sleep(poll_interval)
+
+    def iter_results(self, batch):
+        """Yield (key, text, error) for each response line, streaming the results file"""
+        output = batch.get('response') or batch.get('metadata', {}).get('output') or {}
+        file_name = output.get('responsesFile')
+        if not file_name:
+            for item in output.get('inlinedResponses', {}).get('inlinedResponses', []):
+                yield self._parse_result(item.get('metadata', {}).get('key'), item)
+            return
+
+        response = self.http_client.request(
+            'GET',
+            f"{self.download_base}/{file_name}:download?alt=media&key={self.api_key}",
+            timeout=300,
+            stream=True
+        )
+        try:
+            pending = b''
+            for chunk in response.stream(65536):
+                pending += chunk
+                while b'\n' in pending:
+                    line, pending = pending.split(b'\n', 1)
+                    if line.strip():
+                        item = json.loads(line.decode('utf-8'))
+                        yield self._parse_result(item.get('key'), item)
+            if pending.strip():
+                item = json.loads(pending.decode('utf-8'))
+                yield self._parse_result(item.get('key'), item)
+        finally:
+            response.release_conn()
+
+    @staticmethod
+    def _parse_result(key, item):
+        if item.get('error'):
+            return key, None, item['error'].get('message', str(item['error']))
+        candidates = item.get('response', {}).get('candidates') or []
+        try:
+            text = candidates[0]['content']['parts'][0]['text'].strip()
+        except (IndexError, KeyError):
+            return key, None, "Empty response"
+        return key, text, None
+
+
+def write_batch_jsonl(path, requests):
+    """Write (key, request body) pairs in the Batch API JSONL format"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    count = 0
+    with open(path, 'w', encoding='utf-8') as file:
+        for key, request in requests:
+            file.write(json.dumps({'key': key, 'request': request}, ensure_ascii=False) + '\n')
+            count += 1
+    return count
+
+
+def batch_job_path(name):
+    """Path for a new JSONL batch file under BATCH_FOLDER"""
+    timestamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(BATCH_FOLDER, f"{name}-{timestamp}.jsonl")
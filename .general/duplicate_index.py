@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MinHash-LSH index of published article bodies, for near-duplicate checks
+
+Each body becomes a MinHash signature over its word shingles, whose
+agreement rate estimates the Jaccard similarity of two bodies. Signatures
+are split into bands and indexed by band value, so a check only compares
+articles that share at least one band instead of every published article.
+The band shape is picked so that pairs at the threshold almost always
+collide. One index per repo, persisted as append-only JSONL.
+"""
+
+import os
+import re
+import json
+import zlib
+import base64
+import threading
+
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+IMAGE_LINE = re.compile(r'^\s*!\[')
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def choose_bands(num_perm, threshold):
+    """(bands, rows) whose LSH threshold (1/bands)**(1/rows) is the highest one at or below `threshold`"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1.0 / bands) ** (1.0 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+class DuplicateIndex:
+    """Near-duplicate lookup by estimated Jaccard similarity of word shingles"""
+
+    def __init__(self, path, threshold=0.5, num_perm=128, shingle_size=3, seed=1):
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self._lock = threading.Lock()
+
+        self.subjects = []      # id -> subject
+        self.paths = []         # id -> published path
+        self.signatures = []    # id -> uint32 signature
+        self.buckets = [{} for _ in range(self.bands)]  # band value -> ids
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def shingles(self, text):
+        """Distinct hashed word shingles of a markdown body, ignoring image lines"""
+        words = []
+        for line in text.lower().split('\n'):
+            if not IMAGE_LINE.match(line):
+                words.extend(WORD_PATTERN.findall(line))
+        size = self.shingle_size
+        if len(words) < size:
+            grams = [' '.join(words)] if words else []
+        else:
+            grams = (' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+        return np.unique(np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64))
+
+    def signature(self, text):
+        """MinHash signature (uint32 per permutation), or None for a body without words"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        # Universal hashing (a*x + b) mod p, wrapped to 64 bits as usual for MinHash
+        with np.errstate(over='ignore'):
+            hashed = (np.outer(shingles, self._a) + self._b) % MERSENNE_PRIME & MAX_HASH
+        return hashed.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def _insert(self, subject, path, signature):
+        """Add a signature to memory (lock held)"""
+        item = len(self.subjects)
+        self.subjects.append(subject)
+        self.paths.append(path)
+        self.signatures.append(signature)
+        for bucket, key in zip(self.buckets, self._band_keys(signature)):
+            bucket.setdefault(key, []).append(item)
+
+    def find(self, text=None, signature=None):
+        """Most similar published article at or above the threshold: (subject, path, similarity), or None"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self.buckets, self._band_keys(signature)):
+                candidates.update(bucket.get(key, ()))
+            best = None
+            for item in candidates:
+                similarity = float(np.mean(self.signatures[item] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[2]):
+                    best = (self.subjects[item], self.paths[item], similarity)
+            return best
+
+    def add(self, subject, text=None, path='', signature=None):
+        """Record a published article"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return
+        record = {
+            'subject': subject,
+            'path': path,
+            'signature': base64.b64encode(signature.tobytes()).decode('ascii')
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._insert(subject, path, signature)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    signature = np.frombuffer(base64.b64decode(record['signature']), dtype=np.uint32)
+                except (ValueError, KeyError):
+                    continue  # torn last line after a crash
+                if len(signature) == self.num_perm:
+                    self._insert(record['subject'], record.get('path', ''), signature)
+
+
+_shared_indexes = {}
+_shared_indexes_lock = threading.Lock()
+
+
+def get_duplicate_index(path, threshold=0.5, num_perm=128, shingle_size=3):
+    """Process-wide index per file, so every processor of a repo checks against the same publishes"""
+    with _shared_indexes_lock:
+        index = _shared_indexes.get(path)
+        if index is None:
+            index = DuplicateIndex(path, threshold=threshold, num_perm=num_perm, shingle_size=shingle_size)
+            _shared_indexes[path] = index
+        return index
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pooled keep-alive HTTP client shared by the generator and its worker threads
+"""
+
+import json
+import threading
+import urllib3
+
+DEFAULT_USER_AGENT = 'SEO-Generator/1.0'
+
+
+class HTTPResponseError(Exception):
+    """Raised for non-2xx responses, carrying status, headers and body"""
+
+    def __init__(self, status, reason, headers=None, body=b''):
+        self.status = status
+        self.code = status
+        self.reason = reason
+        self.headers = headers or {}
+        self.body = body
+        super().__init__(f"HTTP Error {status}: {reason}")
+
+
+class KeepAliveHTTPClient:
+    """Thread-safe HTTP client that reuses TCP/TLS connections per host
+
+    Built on urllib3's PoolManager: each host gets a pool of up to `maxsize`
+    persistent connections that worker threads check out and return.
+    """
+
+    def __init__(self, maxsize=10, timeout=40, user_agent=DEFAULT_USER_AGENT):
+        self.timeout = timeout
+        self.user_agent = user_agent
+        self._manager = urllib3.PoolManager(
+            num_pools=10,
+            maxsize=maxsize,
+            block=True,
+            retries=False
+        )
+        self._lock = threading.Lock()
+        self._pools = {}
+        self._requests = 0
+        self._errors = 0
+
+    def request(self, method, url, body=None, headers=None, timeout=None, stream=False):
+        """Send a request and return the urllib3 response
+
+        With stream=True the body is not preloaded; the caller must read it and
+        call release_conn() so the connection goes back to the pool.
+        Non-2xx responses raise HTTPResponseError.
+        """
+        request_headers = {'User-Agent': self.user_agent}
+        if headers:
+            request_headers.update(headers)
+
+        pool = self._manager.connection_from_url(url)
+        with self._lock:
+            self._pools[(pool.scheme, pool.host, pool.port)] = pool
+            self._requests += 1
+
+        try:
+            response = pool.urlopen(
+                method,
+                url,
+                body=body,
+                headers=request_headers,
+                timeout=urllib3.Timeout(total=timeout or self.timeout),
+                retries=False,
+                preload_content=not stream,
+                assert_same_host=False
+            )
+        except Exception:
+            with self._lock:
+                self._errors += 1
+            raise
+
+        if response.status >= 400:
+            data = response.data if not stream else response.read()
+            response.release_conn()
+            with self._lock:
+                self._errors += 1
+            raise HTTPResponseError(response.status, response.reason, response.headers, data)
+
+        return response
+
+    def post_json(self, url, payload, timeout=None, headers=None):
+        """POST a JSON payload and return (decoded JSON body, response headers)"""
+        request_headers = {'Content-Type': 'application/json'}
+        if headers:
+            request_headers.update(headers)
+        response = self.request(
+            'POST',
+            url,
+            body=json.dumps(payload).encode('utf-8'),
+            headers=request_headers,
+            timeout=timeout
+        )
+        return json.loads(response.data.decode('utf-8')), response.headers
+
+    def get_stats(self):
+        """Connection reuse statistics across all host pools"""
+        with self._lock:
+            pools = list(self._pools.items())
+            requests = self._requests
+            errors = self._errors
+
+        hosts = {}
+        connections = 0
+        for (scheme, host, port), pool in pools:
+            hosts[f"{scheme}://{host}:{port}"] = {
+                'connections_opened': pool.num_connections,
+                'requests': pool.num_requests
+            }
+            connections += pool.num_connections
+
+        reused = max(0, requests - connections)
+        return {
+            'requests': requests,
+            'connections_opened': connections,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / requests, 3) if requests else 0.0,
+            'errors': errors,
+            'hosts': hosts
+        }
+
+    def close(self):
+        self._manager.clear()
+        with self._lock:
+            self._pools.clear()
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_shared_client():
+    """Process-wide client so every generator instance shares one connection pool"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = KeepAliveHTTPClient()
+        return _shared_client
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword list ingestion: normalization, exact dedupe and near-duplicate clustering
+
+Keywords are normalized (Unicode NFKC, invisible characters removed,
+whitespace collapsed) and deduplicated case-insensitively while the input
+streams in. Near-duplicates ("digital marketing trends" / "Digital Marketing
+Trends 2025") are then clustered on their topic tokens (years and stopwords
+dropped, other numbers kept, plurals lightly stemmed):
+
+- tokens written apart or together ("e mail"/"email") share a key without
+  spaces
+- keywords whose token sets reach a Jaccard threshold join the same cluster,
+  found with a prefix-filtered similarity join - tokens are ordered by rarity
+  and two sets can only reach the threshold if they share one of their first
+  few rare tokens
+
+Likely typos ("digtal marketing trend") are reported separately and never
+merged: a token one edit away from a much more frequent one (found through
+the deletion neighbourhood of the distinct tokens) marks its keyword as a
+typo of another keyword only when correcting it gives exactly that keyword's
+tokens. "house price"/"horse price" are both real words, so they stay apart
+unless one spelling is far more common.
+
+Only candidate pairs are ever compared, which keeps 100k+ keyword lists in
+the seconds range.
+"""
+
+import os
+import re
+import math
+import unicodedata
+from collections import Counter, defaultdict
+
+INVISIBLE_CHARACTERS = dict.fromkeys(map(ord, '\u200b\u200c\u200d\u2060\ufeff\u00ad'))
+WHITESPACE = re.compile(r'\s+')
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+YEAR = re.compile(r'^(19|20)\d\d$')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it of on or the to what when why with your you
+best top guide tips new
+dan di ke dari yang untuk dengan pada dalam cara ini itu atau adalah bagi
+""".split())
+
+
+def normalize_keyword(text):
+    """Canonical display form: NFKC, no invisible characters, single spaces"""
+    text = unicodedata.normalize('NFKC', text).translate(INVISIBLE_CHARACTERS)
+    return WHITESPACE.sub(' ', text).strip()
+
+
+def keyword_key(keyword):
+    """Exact-duplicate key of a normalized keyword"""
+    return keyword.casefold()
+
+
+def topic_tokens(keyword):
+    """Tokens that identify the topic, in order: no years or stopwords, plurals stemmed"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(keyword_key(keyword)):
+        if YEAR.match(token) or token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def typo_corrections(token_counts, min_length=5, min_ratio=3):
+    """token -> token at most one edit away that is at least `min_ratio` times as frequent (deletion neighbourhood)"""
+    neighbourhood = defaultdict(list)
+    for token in token_counts:
+        if len(token) >= min_length:
+            for variant in {token} | {token[:i] + token[i + 1:] for i in range(len(token))}:
+                neighbourhood[variant].append(token)
+    corrections = {}
+    for tokens in neighbourhood.values():
+        if len(tokens) < 2:
+            continue
+        target = max(tokens, key=lambda token: (token_counts[token], token))
+        for token in tokens:
+            if token_counts[target] >= min_ratio * token_counts[token]:
+                current = corrections.get(token)
+                if current is None or token_counts[target] > token_counts[current]:
+                    corrections[token] = target
+    # Follow chains (a -> b -> c) to the final spelling
+    for token, target in corrections.items():
+        seen = {token}
+        while target in corrections and target not in seen:
+            seen.add(target)
+            target = corrections[target]
+        corrections[token] = target
+    return corrections
+
+
+def iter_unique_keywords(lines, seen=None):
+    """Yield normalized keywords from an iterable of lines, skipping blanks and exact duplicates"""
+    seen = set() if seen is None else seen
+    for line in lines:
+        keyword = normalize_keyword(line)
+        if not keyword:
+            continue
+        key = keyword_key(keyword)
+        if key not in seen:
+            seen.add(key)
+            yield keyword
+
+
+def read_keywords(path):
+    """Stream the lines of a keyword file"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            yield line
+
+
+def write_keywords(path, keywords):
+    """Write keywords one per line through a temporary file, then swap it in"""
+    temp_path = f"{path}.tmp"
+    count = 0
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        for keyword in keywords:
+            file.write(f"{keyword}\n")
+            count += 1
+    os.replace(temp_path, path)
+    return count
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, first, second):
+        first, second = self.find(first), self.find(second)
+        if first != second:
+            # The earlier keyword stays the root, so it becomes the representative
+            if second < first:
+                first, second = second, first
+            self.parent[second] = first
+
+
+def similarity_join(sets, threshold, union_find):
+    """Union every pair of sets with Jaccard >= threshold (prefix filtering)"""
+    frequency = Counter(element for elements in sets for element in elements)
+    # Rarest elements first: short postings, few candidates
+    ordered = [sorted(elements, key=lambda element: (frequency[element], element)) for elements in sets]
+    postings = defaultdict(list)
+    for item in sorted(range(len(sets)), key=lambda item: len(ordered[item])):
+        elements = ordered[item]
+        size = len(elements)
+        if not size:
+            continue
+        prefix = size - math.ceil(threshold * size) + 1
+        candidates = set()
+        for element in elements[:prefix]:
+            for other in postings[element]:
+                # Items are visited by size, so other is never larger; skip sizes that cannot reach the threshold
+                if len(ordered[other]) >= threshold * size:
+                    candidates.add(other)
+            postings[element].append(item)
+        mine = sets[item]
+        for other in candidates:
+            shared = len(mine & sets[other])
+            if shared / (size + len(sets[other]) - shared) >= threshold:
+                union_find.union(item, other)
+
+
+def cluster_keywords(keywords, token_threshold=0.75):
+    """Clusters of near-duplicate keywords, as lists of indices in input order (singletons omitted)"""
+    token_lists = [topic_tokens(keyword) for keyword in keywords]
+    union_find = _UnionFind(len(keywords))
+
+    # Same token set, or same letters once spaces are removed: same cluster without any comparison
+    first_with_tokens = {}
+    first_with_letters = {}
+    for item, tokens in enumerate(token_lists):
+        if tokens:
+            union_find.union(first_with_tokens.setdefault(frozenset(tokens), item), item)
+            union_find.union(first_with_letters.setdefault(''.join(tokens), item), item)
+
+    # The similarity join runs on one keyword per distinct token set
+    distinct = list(first_with_tokens.values())
+    subset = _UnionFind(len(distinct))
+    similarity_join([frozenset(token_lists[item]) for item in distinct], token_threshold, subset)
+    for position, item in enumerate(distinct):
+        union_find.union(distinct[subset.find(position)], item)
+
+    members = defaultdict(list)
+    for item in range(len(keywords)):
+        members[union_find.find(item)].append(item)
+    return [cluster for cluster in members.values() if len(cluster) > 1]
+
+
+def typo_clusters(keywords, typo_min_length=5, typo_min_ratio=3):
+    """Keywords that are likely typos of another keyword, as lists of indices (the correct one first)
+
+    A keyword is a typo of another when folding its rare tokens into their much
+    more frequent neighbours gives exactly the other keyword's tokens.
+    """
+    token_lists = [topic_tokens(keyword) for keyword in keywords]
+    corrections = typo_corrections(
+        Counter(token for tokens in token_lists for token in set(tokens)), typo_min_length, typo_min_ratio
+    )
+    if not corrections:
+        return []
+    first_with_tokens = {}
+    for item, tokens in enumerate(token_lists):
+        if tokens:
+            first_with_tokens.setdefault(frozenset(tokens), item)
+    typos = defaultdict(list)
+    for item, tokens in enumerate(token_lists):
+        corrected = frozenset(corrections.get(token, token) for token in tokens)
+        target = first_with_tokens.get(corrected)
+        if target is not None and corrected != frozenset(tokens):
+            typos[target].append(item)
+    return [[target] + items for target, items in typos.items()]
+
+
+def ingest_keywords(lines, processed=(), mode='report', token_threshold=0.75, typo_min_length=5, typo_min_ratio=3):
+    """Normalize, dedupe and cluster a keyword list
+
+    mode is 'report' (keep every distinct keyword), 'merge' (keep one keyword
+    per cluster: an already processed one if any, else the first) or 'off'
+    (no clustering). Returns a dict with the resulting `keywords`, the number
+    of `exact_duplicates` dropped, the near-duplicate `clusters` (lists of
+    keywords, representative first), the `merged` keywords dropped and the
+    `typo_clusters` (correct spelling first), which are only reported.
+    """
+    total = 0
+
+    def counted(source):
+        nonlocal total
+        for line in source:
+            if line.strip():
+                total += 1
+            yield line
+
+    keywords = list(iter_unique_keywords(counted(lines)))
+    result = {
+        'keywords': keywords,
+        'exact_duplicates': total - len(keywords),
+        'clusters': [],
+        'merged': [],
+        'typo_clusters': []
+    }
+    if mode == 'off' or len(keywords) < 2:
+        return result
+
+    processed_keys = {keyword_key(normalize_keyword(keyword)) for keyword in processed}
+    dropped = set()
+    for cluster in cluster_keywords(keywords, token_threshold):
+        done = [item for item in cluster if keyword_key(keywords[item]) in processed_keys]
+        representative = done[0] if done else cluster[0]
+        ordered = [representative] + [item for item in cluster if item != representative]
+        result['clusters'].append([keywords[item] for item in ordered])
+        # Keywords already generated stay listed; the other variants are dropped
+        dropped.update(item for item in ordered[1:] if item not in done)
+    # Typos are listed for review; a real word one letter off must never be merged away
+    result['typo_clusters'] = [
+        [keywords[item] for item in cluster] for cluster in typo_clusters(keywords, typo_min_length, typo_min_ratio)
+    ]
+
+    if mode == 'merge' and dropped:
+        result['merged'] = [keywords[item] for item in sorted(dropped)]
+        result['keywords'] = [keyword for item, keyword in enumerate(keywords) if item not in dropped]
+    return result
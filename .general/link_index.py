@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inverted index over article_links for internal-link retrieval
+
+Postings map each keyword and each category to the articles carrying it,
+ordered by when the article was first saved. Related articles are ranked by
+shared keywords (ties keep save order, as the former full scan did), so a
+lookup only reads the postings of the current subject's keywords plus the
+first few entries of its category postings.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+
+class LinkIndex:
+    """keyword -> articles and category -> articles, updated one article at a time"""
+
+    def __init__(self, article_links=None):
+        self.entries = {}       # subject -> (order, keywords, categories)
+        self.subjects = []      # order -> subject
+        self.by_keyword = defaultdict(list)   # sorted lists of order numbers
+        self.by_category = defaultdict(list)
+        for subject, data in (article_links or {}).items():
+            self.update(subject, data)
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def _remove(postings, key, order):
+        posting = postings[key]
+        position = bisect_left(posting, order)
+        if position < len(posting) and posting[position] == order:
+            posting.pop(position)
+        if not posting:
+            del postings[key]
+
+    def update(self, subject, data):
+        """Add an article or re-index it after its keywords/categories changed"""
+        keywords = frozenset(data.get('keywords') or ())
+        categories = frozenset(data.get('categories') or ())
+        entry = self.entries.get(subject)
+        if entry is None:
+            order = len(self.subjects)
+            self.subjects.append(subject)
+            old_keywords = old_categories = frozenset()
+        else:
+            order, old_keywords, old_categories = entry
+        for keyword in old_keywords - keywords:
+            self._remove(self.by_keyword, keyword, order)
+        for category in old_categories - categories:
+            self._remove(self.by_category, category, order)
+        for keyword in keywords - old_keywords:
+            insort(self.by_keyword[keyword], order)
+        for category in categories - old_categories:
+            insort(self.by_category[category], order)
+        self.entries[subject] = (order, keywords, categories)
+
+    def related(self, subject, keywords, categories, limit=3):
+        """Top `limit` (subject, relevance) sharing a keyword or category with the given ones
+
+        Relevance is the number of shared keywords; ties are broken by save
+        order, so the result matches a stable sort over every saved article.
+        """
+        keywords = [kw for kw in dict.fromkeys(keywords) if kw in self.by_keyword]
+        categories = [cat for cat in dict.fromkeys(categories) if cat in self.by_category]
+        excluded = self.entries[subject][0] if subject in self.entries else -1
+
+        relevance = defaultdict(int)
+        for keyword in keywords:
+            for order in self.by_keyword[keyword]:
+                if order != excluded:
+                    relevance[order] += 1
+        ranked = heapq.nsmallest(limit, relevance.items(), key=lambda item: (-item[1], item[0]))
+
+        # Category-only matches have relevance 0: take the earliest saved ones
+        if len(ranked) < limit and categories:
+            seen = set()
+            for order in heapq.merge(*(self.by_category[cat] for cat in categories)):
+                if len(ranked) >= limit:
+                    break
+                if order == excluded or order in relevance or order in seen:
+                    continue
+                seen.add(order)
+                ranked.append((order, 0))
+
+        return [(self.subjects[order], score) for order, score in ranked]
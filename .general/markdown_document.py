@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lightweight Markdown document model for the post-processing chain
+
+An article is parsed once into line blocks. Post-processing passes edit the
+blocks in place, and the article is serialized once when the post is built.
+The heading tree is derived from the blocks on demand.
+"""
+
+import re
+
+HEADING_PATTERN = re.compile(r'^(#{1,6}) ')
+
+
+class Block:
+    """One source line with its kind: heading, blank, bullet, image or text"""
+    __slots__ = ('text', 'kind', 'level')
+
+    def __init__(self, text):
+        self.set_text(text)
+
+    def set_text(self, text):
+        self.text = text
+        self.level = 0
+        heading = HEADING_PATTERN.match(text)
+        if heading:
+            self.kind = 'heading'
+            self.level = len(heading.group(1))
+        elif not text.strip():
+            self.kind = 'blank'
+        elif text.startswith('!['):
+            self.kind = 'image'
+        elif text.lstrip().startswith(('- ', '* ', '1. ')):
+            self.kind = 'bullet'
+        else:
+            self.kind = 'text'
+
+    @property
+    def heading_text(self):
+        return self.text[self.level + 1:].strip() if self.kind == 'heading' else ''
+
+    def __repr__(self):
+        return f"Block({self.kind}, {self.text[:40]!r})"
+
+
+class Section:
+    """Node of the heading tree: a heading, the blocks under it and its subsections"""
+    __slots__ = ('heading', 'blocks', 'children')
+
+    def __init__(self, heading=None):
+        self.heading = heading
+        self.blocks = []
+        self.children = []
+
+    @property
+    def level(self):
+        return self.heading.level if self.heading else 0
+
+    @property
+    def title(self):
+        return self.heading.heading_text if self.heading else ''
+
+
+class MarkdownDocument:
+    """Article as a list of blocks plus the names of the passes already applied"""
+
+    def __init__(self, lines=()):
+        self.blocks = [Block(line) for line in lines]
+        self.applied = set()
+        self.quality = None  # report of the post-generation quality check, when it ran
+
+    @classmethod
+    def parse(cls, text):
+        return cls(text.split('\n'))
+
+    @classmethod
+    def coerce(cls, content):
+        """Accept either a document or markdown text"""
+        return content if isinstance(content, cls) else cls.parse(content or '')
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __bool__(self):
+        return any(block.kind != 'blank' for block in self.blocks)
+
+    def texts(self):
+        return [block.text for block in self.blocks]
+
+    def to_markdown(self):
+        return '\n'.join(block.text for block in self.blocks)
+
+    __str__ = to_markdown
+
+    def strip(self):
+        """Drop surrounding blank lines and whitespace, like str.strip() on the text"""
+        while self.blocks and self.blocks[0].kind == 'blank':
+            self.blocks.pop(0)
+        while self.blocks and self.blocks[-1].kind == 'blank':
+            self.blocks.pop()
+        if self.blocks:
+            self.blocks[0].set_text(self.blocks[0].text.lstrip())
+            self.blocks[-1].set_text(self.blocks[-1].text.rstrip())
+        return self
+
+    def insert(self, index, lines):
+        self.blocks[index:index] = [Block(line) for line in lines]
+
+    def replace(self, start, end, lines):
+        """Replace blocks[start:end] with new lines"""
+        self.blocks[start:end] = [Block(line) for line in lines]
+
+    def headings(self, level=None):
+        """Yield (index, block) for headings, optionally of one level only"""
+        for index, block in enumerate(self.blocks):
+            if block.kind == 'heading' and (level is None or block.level == level):
+                yield index, block
+
+    def title(self):
+        """Text of the first H1, or None"""
+        for block in self.blocks:
+            if block.kind == 'heading' and block.level == 1 and len(block.text) > 2:
+                return block.text[2:]
+        return None
+
+    def first_paragraph(self):
+        """First non-empty line that is not a heading, stripped, or ''"""
+        for block in self.blocks:
+            if block.kind != 'blank' and not block.text.startswith('#'):
+                return block.text.strip()
+        return ''
+
+    def outline(self):
+        """Heading tree; the root holds the preamble and top-level sections"""
+        root = Section()
+        stack = [root]
+        for block in self.blocks:
+            if block.kind == 'heading':
+                while stack[-1].heading and stack[-1].level >= block.level:
+                    stack.pop()
+                section = Section(block)
+                stack[-1].children.append(section)
+                stack.append(section)
+            else:
+                stack[-1].blocks.append(block)
+        return root
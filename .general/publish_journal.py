@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Append-only journal of publish events, for recovery after a crash
+
+Uploading a post to GitHub is a side effect the state store cannot roll
+back. The journal brackets it: `uploading` is written before the upload,
+`published` right after it succeeds and `recorded` once the state store has
+the article (or `failed`). On startup every subject whose last event is
+`uploading` or `published` is an article that was in flight when the
+process died, and can be settled instead of being generated again.
+
+Events are JSON lines with a sequence number. `uploading` and `published`
+are fsynced before append returns; concurrent appends share one fsync, and
+other events are fsynced in batches (a process crash loses nothing written,
+a power loss at most the last unsynced batch of closing events). Every
+`compact_every` events the open entries are written to a snapshot and the
+log starts over, so recovery reads one small snapshot and a short log.
+
+A journal file has exactly one writer. Several processes can publish to the
+same repo, so a repo's journal is a folder with one file per process
+(`{owner}.jsonl`, its snapshot and `{owner}.lock`); within a process every
+user goes through get_publish_journal, which hands out one shared instance
+per folder. A process holds an exclusive lock on its `.lock` file for as
+long as it lives. take_recovered looks for lock files nobody holds - the
+journals of processes that died - and adopts their open entries: they are
+copied into this process's journal (fsynced) before the dead journal is
+deleted, so a crash during recovery loses nothing. Uploads still running in
+a live process are never settled as if they had been interrupted.
+"""
+
+import os
+import json
+import time
+import uuid
+import fcntl
+import socket
+import threading
+
+DURABLE_STATUSES = ('uploading', 'published')
+CLOSED_STATUSES = ('recorded', 'failed')
+
+
+def _journal_paths(path):
+    """(snapshot, lock file) next to a journal log"""
+    base = os.path.splitext(path)[0]
+    return f"{base}.snapshot.json", f"{base}.lock"
+
+
+def _read_journal(path):
+    """(open entries, last seq, events in the log, size of the log up to a torn last line)"""
+    snapshot_path = _journal_paths(path)[0]
+    entries = {}
+    snapshot_seq = 0
+    if os.path.exists(snapshot_path):
+        with open(snapshot_path, 'r', encoding='utf-8') as file:
+            snapshot = json.load(file)
+        snapshot_seq = snapshot['seq']
+        for event in snapshot['entries']:
+            entries[event['subject']] = event
+    seq, logged, valid_size = snapshot_seq, 0, 0
+    if os.path.exists(path):
+        with open(path, 'rb') as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    break  # torn last line after a crash
+                if not line.endswith(b'\n'):
+                    break
+                valid_size += len(line)
+                if event['seq'] > snapshot_seq:
+                    if event['status'] in CLOSED_STATUSES:
+                        entries.pop(event['subject'], None)
+                    else:
+                        entries[event['subject']] = event
+                    seq = max(seq, event['seq'])
+                logged += 1
+    return entries, seq, logged, valid_size
+
+
+class PublishJournal:
+    """One process's journal of publish events per subject; open entries survive restarts"""
+
+    def __init__(self, path, compact_every=1000, fsync_every=20):
+        self.path = path
+        self.snapshot_path, self.lock_path = _journal_paths(path)
+        self.compact_every = compact_every
+        self.fsync_every = fsync_every
+        self.entries = {}  # subject -> last event, open entries only
+        self._seq = 0
+        self._logged = 0
+        self._synced_seq = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Held until the process exits: an unlocked journal belongs to a process that died
+        self._owner_lock = open(self.lock_path, 'a')
+        fcntl.flock(self._owner_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._recover()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def __len__(self):
+        return len(self.entries)
+
+    def open_entries(self):
+        """subject -> last event for articles whose publish did not finish"""
+        with self._lock:
+            return {subject: dict(event) for subject, event in self.entries.items()}
+
+    def take_recovered(self):
+        """Adopt the open entries of journals whose process died; subject -> event, each handed out once"""
+        directory = os.path.dirname(self.path) or '.'
+        adopted = {}
+        for name in sorted(os.listdir(directory)):
+            lock_path = os.path.join(directory, name)
+            if not name.endswith('.lock') or lock_path == self.lock_path:
+                continue
+            try:
+                lock_file = open(lock_path, 'r')
+            except FileNotFoundError:
+                continue  # adopted by another process meanwhile
+            with lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # its process is alive
+                if os.fstat(lock_file.fileno()).st_nlink == 0:
+                    continue  # adopted and deleted by another process before we got the lock
+                log_path = f"{os.path.splitext(lock_path)[0]}.jsonl"
+                entries = _read_journal(log_path)[0]
+                for subject, event in entries.items():
+                    fields = {field: value for field, value in event.items()
+                              if field not in ('seq', 'subject', 'status', 'at')}
+                    seq = self.append(subject, event['status'], **fields)
+                    adopted[subject] = dict(fields, seq=seq, subject=subject, status=event['status'])
+                # Copies are durable before the dead journal goes away
+                self.sync()
+                for path in (log_path, _journal_paths(log_path)[0], lock_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+        return adopted
+
+    def append(self, subject, status, **fields):
+        """Record an event; returns its sequence number once it is as durable as its status requires"""
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+            event = dict(fields, seq=seq, subject=subject, status=status, at=time.time())
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._apply(event)
+            self._logged += 1
+            if self._logged >= self.compact_every:
+                self._compact()
+                return seq
+            durable = status in DURABLE_STATUSES or seq - self._synced_seq >= self.fsync_every
+        if durable:
+            self._sync_to(seq)
+        return seq
+
+    def sync(self):
+        """fsync everything appended so far"""
+        with self._lock:
+            seq = self._seq
+        self._sync_to(seq)
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            self._file.close()
+
+    def _sync_to(self, seq):
+        """Group commit: one fsync covers every event written before it started"""
+        with self._sync_lock:
+            if self._synced_seq >= seq:
+                return
+            with self._lock:
+                target = self._seq
+                # Own descriptor: compaction may close the file while this fsync runs
+                fileno = os.dup(self._file.fileno())
+            try:
+                os.fsync(fileno)
+            finally:
+                os.close(fileno)
+            self._synced_seq = max(self._synced_seq, target)
+
+    def _apply(self, event):
+        if event['status'] in CLOSED_STATUSES:
+            self.entries.pop(event['subject'], None)
+        else:
+            self.entries[event['subject']] = event
+
+    def _compact(self):
+        """Snapshot the open entries and start a new log (lock held)"""
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'seq': self._seq, 'entries': list(self.entries.values())}, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # A crash before the truncate only replays events the snapshot already covers
+        self._file.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._logged = 0
+        self._synced_seq = self._seq
+
+    def _recover(self):
+        self.entries, self._seq, self._logged, valid_size = _read_journal(self.path)
+        # Cut the torn line off, otherwise the next event would be appended onto it
+        if os.path.exists(self.path) and valid_size < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as file:
+                file.truncate(valid_size)
+        self._synced_seq = self._seq
+
+
+_shared_journals = {}
+_shared_journals_lock = threading.Lock()
+
+
+def get_publish_journal(directory, compact_every=1000, fsync_every=20):
+    """This process's journal in a repo's journal folder, shared by every processor of the repo"""
+    with _shared_journals_lock:
+        journal = _shared_journals.get(directory)
+        if journal is None:
+            owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            journal = PublishJournal(os.path.join(directory, f"{owner}.jsonl"),
+                                     compact_every=compact_every, fsync_every=fsync_every)
+            _shared_journals[directory] = journal
+        return journal
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Post-generation quality checks against the article outline
+
+QualityGate maps a generated MarkdownDocument onto the outline (intro, each
+H2 section, conclusion) and measures word count, headings, truncation and
+language. The report names the individual parts that are missing, cut off,
+too thin or in the wrong language, so only those parts have to be
+regenerated instead of the whole article.
+"""
+
+import re
+import math
+
+from langdetect import DetectorFactory, LangDetectException, detect
+
+# langdetect is randomized; a fixed seed makes the verdict repeatable
+DetectorFactory.seed = 0
+
+# Configured language -> langdetect codes accepted for it
+LANGUAGE_CODES = {
+    'english': ('en',),
+    'indonesian': ('id', 'ms'),  # short Indonesian passages are often reported as Malay
+    'malay': ('ms', 'id'),
+    'spanish': ('es',),
+    'portuguese': ('pt',),
+    'french': ('fr',),
+    'german': ('de',),
+}
+
+WORD_PATTERN = re.compile(r'\w+')
+HEADING_NOISE = re.compile(r'[*_`#:]+')
+SENTENCE_END = ('.', '!', '?', ':', ';', ')', '"', "'", '*', '`', '|')
+MIN_LANGUAGE_WORDS = 40
+
+
+def count_words(text):
+    return len(WORD_PATTERN.findall(text))
+
+
+def heading_tokens(text):
+    return set(WORD_PATTERN.findall(HEADING_NOISE.sub(' ', text).casefold()))
+
+
+def headings_match(expected, actual):
+    """Loose heading match: the model may add emphasis or reword slightly"""
+    expected_tokens, actual_tokens = heading_tokens(expected), heading_tokens(actual)
+    if not expected_tokens or not actual_tokens:
+        return False
+    shared = len(expected_tokens & actual_tokens)
+    return shared / len(expected_tokens | actual_tokens) >= 0.5
+
+
+def detect_language(text):
+    """langdetect code for a text, or None when it cannot tell"""
+    try:
+        return detect(text[:5000])
+    except LangDetectException:
+        return None
+
+
+class QualityGate:
+    """Checks a document against the outline parts it was generated from
+
+    `parts` is a list of (kind, heading, subheadings) in article order, kind
+    being 'intro', 'section' or 'conclusion' - the same parts the sectioned
+    generator requests.
+    """
+
+    def __init__(self, parts, min_words, target_headings, language):
+        self.parts = parts
+        self.min_words = min_words
+        self.target_headings = target_headings
+        self.language = (language or '').strip().lower()
+        self.accepted_codes = LANGUAGE_CODES.get(self.language, ())
+        sections = sum(1 for kind, _, _ in parts if kind == 'section') or 1
+        # A part counts as thin below half of its share of min_words
+        self.thin_words = max(min_words // sections // 2, 60)
+
+    def locate(self, document):
+        """Block spans (start, end) per part index; parts not found are absent"""
+        blocks = document.blocks
+        h2_indexes = [index for index, _ in document.headings(level=2)]
+        spans = {}
+        first_h2 = h2_indexes[0] if h2_indexes else len(blocks)
+        used = set()
+        for number, (kind, heading, _) in enumerate(self.parts):
+            if kind == 'intro':
+                start = next((index + 1 for index, _ in document.headings(level=1)), 0)
+                spans[number] = (min(start, first_h2), first_h2)
+                continue
+            for position, index in enumerate(h2_indexes):
+                if position not in used and headings_match(heading, blocks[index].heading_text):
+                    used.add(position)
+                    end = h2_indexes[position + 1] if position + 1 < len(h2_indexes) else len(blocks)
+                    spans[number] = (index, end)
+                    break
+        return spans
+
+    def assess(self, document, finish_reason=None):
+        """Measure the document; `regenerate` lists (part index, reason) in article order"""
+        blocks = document.blocks
+        spans = self.locate(document)
+        text_blocks = [block for block in blocks if block.kind in ('text', 'bullet')]
+        words = sum(count_words(block.text) for block in text_blocks)
+        headings = sum(1 for block in blocks if block.kind == 'heading' and block.level in (2, 3))
+        body = '\n'.join(block.text for block in text_blocks)
+        detected = detect_language(body) if body.strip() else None
+
+        reasons = {}
+        for number, (kind, heading, subheadings) in enumerate(self.parts):
+            span = spans.get(number)
+            if span is None or (kind == 'intro' and span[0] >= span[1]):
+                reasons[number] = 'missing'
+                continue
+            part_blocks = blocks[span[0]:span[1]]
+            part_text = '\n'.join(block.text for block in part_blocks if block.kind in ('text', 'bullet'))
+            part_words = count_words(part_text)
+            if not part_words:
+                reasons[number] = 'missing'
+            elif self._ends_mid_sentence(part_blocks):
+                reasons[number] = 'truncated'
+            elif subheadings:
+                found = [block.heading_text for block in part_blocks if block.kind == 'heading' and block.level == 3]
+                matched = sum(1 for sub in subheadings if any(headings_match(sub, title) for title in found))
+                if matched < math.ceil(len(subheadings) / 2):
+                    reasons[number] = 'missing subheadings'
+            if number not in reasons and self.accepted_codes and part_words >= MIN_LANGUAGE_WORDS:
+                part_language = detect_language(part_text)
+                if part_language and part_language not in self.accepted_codes:
+                    reasons[number] = f"language {part_language}"
+            if number not in reasons and kind == 'section' and words < self.min_words and part_words < self.thin_words:
+                reasons[number] = 'thin'
+
+        if finish_reason == 'MAX_TOKENS' and spans:
+            # Cut at maxOutputTokens: the part holding the last block is the one that was cut off
+            last = max(spans, key=lambda number: spans[number][1])
+            reasons.setdefault(last, 'truncated')
+        truncated = 'truncated' in reasons.values()
+
+        return {
+            'words': words,
+            'min_words': self.min_words,
+            'headings': headings,
+            'target_headings': self.target_headings,
+            'language': detected,
+            'language_ok': not self.accepted_codes or detected is None or detected in self.accepted_codes,
+            'truncated': truncated,
+            'finish_reason': finish_reason,
+            'regenerate': sorted(reasons.items()),
+            'passed': not reasons and words >= self.min_words and headings >= self.target_headings
+        }
+
+    @staticmethod
+    def _ends_mid_sentence(blocks):
+        """A part whose last paragraph stops without closing punctuation or bold was cut off"""
+        for block in reversed(blocks):
+            if block.kind == 'blank':
+                continue
+            if block.kind != 'text':
+                return False
+            text = block.text.rstrip()
+            return text.count('**') % 2 == 1 or not text.endswith(SENTENCE_END)
+        return False
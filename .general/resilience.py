@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Typed Gemini errors, retry backoff and a circuit breaker for gemini_request
+"""
+
+import time
+import random
+import threading
+
+import urllib3
+
+from http_client import HTTPResponseError
+
+
+class GeminiError(Exception):
+    """Base class for Gemini request failures"""
+    retryable = False
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class QuotaExceededError(GeminiError):
+    """429 / RESOURCE_EXHAUSTED, or every key is cooling down"""
+    retryable = True
+
+
+class ServiceUnavailableError(GeminiError):
+    """5xx responses, timeouts and connection failures"""
+    retryable = True
+
+
+class EmptyResponseError(GeminiError):
+    """The response had no usable candidate (e.g. blocked or malformed)"""
+    retryable = True
+
+
+class RequestRejectedError(GeminiError):
+    """4xx responses other than 429: bad request, invalid key, unknown model"""
+
+
+class CircuitOpenError(GeminiError):
+    """The circuit for this model is open; the call failed fast without a request"""
+
+
+def parse_retry_after(headers):
+    """Retry-After header in seconds, or None"""
+    if not headers:
+        return None
+    value = headers.get('Retry-After')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def classify_error(error):
+    """Map a transport exception onto the GeminiError hierarchy"""
+    if isinstance(error, GeminiError):
+        return error
+    if isinstance(error, HTTPResponseError):
+        retry_after = parse_retry_after(error.headers)
+        if error.status == 429:
+            return QuotaExceededError(str(error), error.status, retry_after)
+        if error.status >= 500:
+            return ServiceUnavailableError(str(error), error.status, retry_after)
+        return RequestRejectedError(str(error), error.status)
+    if isinstance(error, (urllib3.exceptions.HTTPError, TimeoutError, ConnectionError)):
+        return ServiceUnavailableError(f"{type(error).__name__}: {error}")
+    if isinstance(error, (ValueError, KeyError, IndexError, TypeError)):
+        return EmptyResponseError(f"Malformed response: {error}")
+    return GeminiError(str(error))
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than Retry-After"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Per-model circuit breaker
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail fast with CircuitOpenError for `reset_timeout` seconds. Then a single
+    trial call is let through (half-open); success closes the circuit, failure
+    re-opens it.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._circuits = {}
+
+    def _circuit(self, name):
+        return self._circuits.setdefault(name, {'failures': 0, 'opened_at': None, 'trial': False})
+
+    def before_call(self, name):
+        """Raise CircuitOpenError unless a call to `name` may proceed"""
+        with self._lock:
+            circuit = self._circuit(name)
+            if circuit['opened_at'] is None:
+                return
+            remaining = circuit['opened_at'] + self.reset_timeout - time.monotonic()
+            if remaining > 0 or circuit['trial']:
+                raise CircuitOpenError(
+                    f"Circuit open for {name}, retry in {max(remaining, 0):.0f}s",
+                    retry_after=max(remaining, 0)
+                )
+            circuit['trial'] = True
+
+    def record_success(self, name):
+        with self._lock:
+            circuit = self._circuit(name)
+            circuit.update(failures=0, opened_at=None, trial=False)
+
+    def record_failure(self, name):
+        with self._lock:
+            circuit = self._circuit(name)
+            circuit['failures'] += 1
+            if circuit['trial'] or circuit['failures'] >= self.failure_threshold:
+                circuit['opened_at'] = time.monotonic()
+            circuit['trial'] = False
+
+    def get_state(self, name):
+        with self._lock:
+            circuit = self._circuit(name)
+            if circuit['opened_at'] is None:
+                return 'closed'
+            if time.monotonic() - circuit['opened_at'] < self.reset_timeout:
+                return 'open'
+            return 'half-open'
+
+
+_shared_breakers = {}
+_shared_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(api_base, failure_threshold=5, reset_timeout=60.0):
+    """Process-wide breaker per API base and settings, so an overloaded model is tracked across instances"""
+    key = (api_base, failure_threshold, reset_timeout)
+    with _shared_breakers_lock:
+        breaker = _shared_breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, reset_timeout)
+            _shared_breakers[key] = breaker
+        return breaker
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed disk cache for Gemini responses with size/age based LRU eviction
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Disk cache keyed on model + prompt + generationConfig
+
+    Entries are stored as `{cache_dir}/{key[:2]}/{key}.json`. An in-memory
+    index ordered by last access keeps lookups and evictions O(1); file mtimes
+    carry the access order across restarts.
+    """
+
+    def __init__(self, cache_dir=".cache/gemini", max_bytes=200 * 1024 * 1024, max_age_seconds=7 * 24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._index = OrderedDict()  # key -> (size, last_access), oldest first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(model, prompt, generation_config):
+        """Stable content hash of everything that determines the response"""
+        material = json.dumps(
+            {'model': model, 'prompt': prompt, 'generationConfig': generation_config},
+            sort_keys=True,
+            ensure_ascii=False
+        )
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _load_index(self):
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, name[:-5], stat.st_size))
+
+        for mtime, key, size in sorted(entries):
+            self._index[key] = (size, mtime)
+            self._total_bytes += size
+        with self._lock:
+            self._evict(time.time())
+
+    def _remove(self, key):
+        size, _ = self._index.pop(key)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self, now):
+        """Drop expired entries and least recently used ones beyond max_bytes (lock held)"""
+        if self.max_age_seconds:
+            expired = [key for key, (_, accessed) in self._index.items()
+                       if now - accessed > self.max_age_seconds]
+            for key in expired:
+                self._remove(key)
+                self.evictions += 1
+
+        while self._index and self._total_bytes > self.max_bytes:
+            self._remove(next(iter(self._index)))
+            self.evictions += 1
+
+    def get(self, key):
+        """Return the cached text or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None or (self.max_age_seconds and now - entry[1] > self.max_age_seconds):
+                if entry is not None:
+                    self._remove(key)
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    text = json.load(file)['text']
+                os.utime(path, (now, now))
+            except (OSError, ValueError, KeyError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._index[key] = (entry[0], now)
+            self._index.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text, model=None):
+        """Store a response; the file is written atomically via rename"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = json.dumps({'model': model, 'created': time.time(), 'text': text}, ensure_ascii=False)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        now = time.time()
+        with self._lock:
+            if key in self._index:
+                self._total_bytes -= self._index[key][0]
+            self._index[key] = (size, now)
+            self._index.move_to_end(key)
+            self._total_bytes += size
+            self.writes += 1
+            self._evict(now)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._index),
+                'bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'writes': self.writes,
+                'evictions': self.evictions
+            }
+
+
+_shared_caches = {}
+_shared_caches_lock = threading.Lock()
+
+
+def get_response_cache(cache_dir=".cache/gemini", max_bytes=200 * 1024 * 1024, max_age_seconds=7 * 24 * 3600):
+    """Process-wide cache per folder, so one index enforces max_bytes for every generator instance"""
+    with _shared_caches_lock:
+        cache = _shared_caches.get(cache_dir)
+        if cache is None:
+            cache = ResponseCache(cache_dir, max_bytes=max_bytes, max_age_seconds=max_age_seconds)
+            _shared_caches[cache_dir] = cache
+        return cache
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hashed TF-IDF vectors of published articles for related-article selection
+
+Every article (title weighted over body) becomes a sparse vector over
+`dimensions` hashed features, keeping its `max_terms` strongest terms. All
+vectors live in flat NumPy arrays (row, feature, tf). A feature-sorted copy
+of those arrays serves as the postings lists, so a query only gathers the
+entries of its own terms and scores them with one bincount: a few
+milliseconds at 50k articles.
+
+IDF comes from the document frequencies and is refreshed (with the row
+norms) when the corpus has grown by `idf_refresh` since the last refresh, so
+adding an article never rewrites the others. Each row keeps its distinct
+terms, so re-indexing an article takes the old version's terms out of the
+document frequencies again. On disk the index is a `.npz`
+snapshot plus an append-only JSONL log of articles added since, folded into
+a new snapshot every `compact_every` additions.
+"""
+
+import os
+import re
+import json
+import zlib
+import threading
+from collections import Counter
+
+import numpy as np
+
+SIMILARITY_FOLDER = "data/similarity"
+SNAPSHOT_FILE = "vectors.npz"
+LOG_FILE = "vectors.jsonl"
+
+TOKEN_PATTERN = re.compile(r'[^\W\d_]{3,}')
+IMAGE_LINE = re.compile(r'^\s*!\[')
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    """Lowercase word tokens of 3+ letters, skipping markdown image lines"""
+    tokens = []
+    for line in text.lower().split('\n'):
+        if not IMAGE_LINE.match(line):
+            tokens.extend(TOKEN_PATTERN.findall(line))
+    return tokens
+
+
+class SimilarityIndex:
+    """Incremental, persistent hashed TF-IDF index with vectorized top-k queries"""
+
+    def __init__(self, index_dir=SIMILARITY_FOLDER, dimensions=2 ** 18, max_terms=64,
+                 compact_every=500, idf_refresh=0.05):
+        self.index_dir = index_dir
+        self.dimensions = dimensions
+        self.max_terms = max_terms
+        self.compact_every = compact_every
+        self.idf_refresh = idf_refresh
+        self._lock = threading.Lock()
+
+        self.subjects = []          # row -> subject
+        self.rows_by_subject = {}   # subject -> current row
+        self.replaced = set()       # rows superseded by a re-indexed article
+        self.row_terms = []         # row -> distinct features counted in doc_freq
+        self.doc_freq = np.zeros(dimensions, dtype=np.int32)
+        self.doc_count = 0
+        self._rows = np.zeros(0, dtype=np.int32)
+        self._features = np.zeros(0, dtype=np.int32)
+        self._tf = np.zeros(0, dtype=np.float32)
+        self._size = 0
+        self._pending = 0           # articles in the log, not yet in the snapshot
+
+        self._idf = None            # idf and row norms as of _idf_count documents
+        self._idf_count = 0
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._order = np.zeros(0, dtype=np.int64)      # entries sorted by feature: the postings
+        self._sorted_features = np.zeros(0, dtype=np.int32)
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        return len(self.rows_by_subject)
+
+    def __contains__(self, subject):
+        return subject in self.rows_by_subject
+
+    # Vectors ------------------------------------------------------------------
+
+    def _hash(self, token):
+        return zlib.crc32(token.encode('utf-8')) & (self.dimensions - 1)
+
+    def _counts(self, title, text):
+        """(features, weighted term counts) as arrays"""
+        counts = Counter()
+        for token in tokenize(title or ''):
+            counts[self._hash(token)] += TITLE_WEIGHT
+        for token in tokenize(text or ''):
+            counts[self._hash(token)] += 1
+        features = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        return features, values
+
+    def _current_idf(self):
+        """IDF vector, recomputed (with all row norms) once the corpus grew enough (lock held)"""
+        if self._idf is None or self.doc_count > self._idf_count * (1 + self.idf_refresh) + 1:
+            self._idf_count = self.doc_count
+            self._idf = (np.log((1.0 + self.doc_count) / (1.0 + self.doc_freq)) + 1.0).astype(np.float32)
+            size = self._size
+            weights = self._tf[:size] * self._idf[self._features[:size]]
+            norms = np.bincount(self._rows[:size], weights=weights * weights, minlength=len(self.subjects))
+            self._norms = np.sqrt(norms).astype(np.float32)
+        return self._idf
+
+    def _top_terms(self, weights):
+        """Indices of the `max_terms` largest weights"""
+        if len(weights) <= self.max_terms:
+            return np.arange(len(weights))
+        return np.argpartition(-weights, self.max_terms - 1)[:self.max_terms]
+
+    def _vectorize(self, title, text):
+        """(all features, kept features, sublinear tf of the kept ones) (lock held)"""
+        features, counts = self._counts(title, text)
+        if not len(features):
+            return [], [], []
+        tf = 1.0 + np.log(counts)
+        keep = self._top_terms(tf * self._current_idf()[features])
+        return features.tolist(), features[keep].tolist(), tf[keep].tolist()
+
+    def _append(self, subject, all_features, features, tf):
+        """Store one vector in memory (lock held)"""
+        previous = self.rows_by_subject.get(subject)
+        if previous is not None:
+            # The old version no longer counts as a document
+            self.replaced.add(previous)
+            self.doc_freq[self.row_terms[previous]] -= 1
+            self.doc_count -= 1
+        row = len(self.subjects)
+        self.subjects.append(subject)
+        self.row_terms.append(np.asarray(all_features, dtype=np.int32))
+        self.rows_by_subject[subject] = row
+
+        needed = self._size + len(features)
+        if needed > len(self._features):
+            capacity = max(needed, 2 * len(self._features), 1024)
+            for name in ('_rows', '_features', '_tf'):
+                grown = np.zeros(capacity, dtype=getattr(self, name).dtype)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+        self._rows[self._size:needed] = row
+        self._features[self._size:needed] = features
+        self._tf[self._size:needed] = tf
+        self._size = needed
+
+        # Document frequencies count every distinct term, not only the kept ones
+        self.doc_freq[self.row_terms[row]] += 1
+        self.doc_count += 1
+
+        if self._idf is not None:
+            if row >= len(self._norms):
+                self._norms = np.resize(self._norms, max(row + 1, 2 * len(self._norms)))
+            weights = np.asarray(tf, dtype=np.float32) * self._idf[np.asarray(features, dtype=np.int32)]
+            self._norms[row] = np.sqrt(np.dot(weights, weights))
+
+    def add(self, subject, title, text=''):
+        """Index (or re-index) an article and persist it"""
+        self.add_many([(subject, title, text)])
+
+    def add_many(self, articles):
+        """Index (subject, title, text) tuples with one log write, e.g. a backfill"""
+        with self._lock:
+            lines = []
+            for subject, title, text in articles:
+                all_features, features, tf = self._vectorize(title, text)
+                self._append(subject, all_features, features, tf)
+                record = {'subject': subject, 'all': all_features, 'features': features,
+                          'tf': [round(value, 4) for value in tf]}
+                lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+            if not lines:
+                return
+            if self._pending + len(lines) >= self.compact_every:
+                self._compact()
+                return
+            with open(os.path.join(self.index_dir, LOG_FILE), 'a', encoding='utf-8') as file:
+                file.writelines(lines)
+            self._pending += len(lines)
+
+    # Queries ------------------------------------------------------------------
+
+    def _postings(self):
+        """Feature-sorted entries; re-sorted once the unsorted tail gets large (lock held)"""
+        sorted_size = len(self._order)
+        if self._size - sorted_size > max(4096, sorted_size // 8):
+            self._order = np.argsort(self._features[:self._size], kind='stable')
+            self._sorted_features = self._features[self._order]
+        return self._order, self._sorted_features
+
+    def most_similar(self, title, text='', limit=3, exclude=(), min_score=0.05):
+        """Top `limit` (subject, cosine score) for an article, best first"""
+        with self._lock:
+            if not self.rows_by_subject:
+                return []
+            features, counts = self._counts(title, text)
+            if not len(features):
+                return []
+            idf = self._current_idf()
+            query = (1.0 + np.log(counts)) * idf[features]
+            keep = self._top_terms(query)
+            features, query = features[keep], query[keep] / np.linalg.norm(query[keep])
+
+            # Entries carrying a query term: slices of the postings plus the unsorted tail
+            order, sorted_features = self._postings()
+            starts = np.searchsorted(sorted_features, features, side='left')
+            ends = np.searchsorted(sorted_features, features, side='right')
+            hits = [order[start:end] for start, end in zip(starts, ends) if end > start]
+            hit_query = [np.repeat(query, ends - starts)]
+
+            tail = np.arange(len(order), self._size)
+            if len(tail):
+                dense = np.zeros(self.dimensions, dtype=np.float32)
+                dense[features] = query
+                tail_query = dense[self._features[tail]]
+                matched = tail_query != 0
+                hits.append(tail[matched])
+                hit_query.append(tail_query[matched])
+            hits = np.concatenate(hits) if hits else np.zeros(0, dtype=np.int64)
+            if not len(hits):
+                return []
+
+            contributions = self._tf[hits] * idf[self._features[hits]] * np.concatenate(hit_query)
+            scores = np.bincount(self._rows[hits], weights=contributions, minlength=len(self.subjects))
+            norms = self._norms[:len(scores)]
+            scores = np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+            if self.replaced:
+                scores[list(self.replaced)] = 0.0
+            for subject in exclude:
+                row = self.rows_by_subject.get(subject)
+                if row is not None:
+                    scores[row] = 0.0
+
+            count = min(limit, len(scores))
+            top = np.argpartition(-scores, count - 1)[:count]
+            top = top[np.argsort(-scores[top], kind='stable')]
+            return [(self.subjects[row], float(scores[row])) for row in top if 0 < scores[row] >= min_score]
+
+    # Persistence --------------------------------------------------------------
+
+    def _load(self):
+        snapshot = os.path.join(self.index_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot):
+            with np.load(snapshot, allow_pickle=False) as data:
+                if int(data['dimensions']) == self.dimensions:
+                    self.subjects = data['subjects'].tolist()
+                    self.doc_freq = data['doc_freq']
+                    self.doc_count = int(data['doc_count'])
+                    self._rows, self._features, self._tf = data['rows'], data['features'], data['tf']
+                    self._size = len(self._rows)
+                    self.rows_by_subject = {subject: row for row, subject in enumerate(self.subjects)}
+                    if 'terms' in data.files:
+                        terms, term_counts = data['terms'], data['term_counts']
+                    else:
+                        # Snapshot from before term lists were kept: the kept features are the best guess
+                        terms = self._features
+                        term_counts = np.bincount(self._rows, minlength=len(self.subjects))
+                    self.row_terms = np.split(terms, np.cumsum(term_counts)[:-1]) if len(self.subjects) else []
+        log_path = os.path.join(self.index_dir, LOG_FILE)
+        if os.path.exists(log_path):
+            with open(log_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    self._append(record['subject'], record['all'], record['features'], record['tf'])
+                    self._pending += 1
+
+    def _compact(self):
+        """Write a snapshot without replaced rows and truncate the log (lock held)"""
+        active = np.ones(len(self.subjects), dtype=bool)
+        active[list(self.replaced)] = False
+        keep_rows = np.flatnonzero(active)
+        renumber = np.full(len(self.subjects), -1, dtype=np.int32)
+        renumber[keep_rows] = np.arange(len(keep_rows), dtype=np.int32)
+        size = self._size
+        kept = active[self._rows[:size]]
+
+        self._rows = renumber[self._rows[:size][kept]]
+        self._features = self._features[:size][kept]
+        self._tf = self._tf[:size][kept]
+        self._size = len(self._rows)
+        self.subjects = [self.subjects[row] for row in keep_rows]
+        self.row_terms = [self.row_terms[row] for row in keep_rows]
+        self.rows_by_subject = {subject: row for row, subject in enumerate(self.subjects)}
+        self.replaced = set()
+        # Row numbers changed: rebuild norms and postings on next use
+        self._idf = None
+        self._order = np.zeros(0, dtype=np.int64)
+        self._sorted_features = np.zeros(0, dtype=np.int32)
+
+        snapshot = os.path.join(self.index_dir, SNAPSHOT_FILE)
+        temp_path = snapshot + '.tmp.npz'
+        np.savez(temp_path, dimensions=self.dimensions, subjects=np.array(self.subjects, dtype=str),
+                 doc_freq=self.doc_freq, doc_count=self.doc_count,
+                 rows=self._rows, features=self._features, tf=self._tf,
+                 terms=np.concatenate(self.row_terms) if self.row_terms else np.zeros(0, dtype=np.int32),
+                 term_counts=np.array([len(terms) for terms in self.row_terms], dtype=np.int64))
+        os.replace(temp_path, snapshot)
+        open(os.path.join(self.index_dir, LOG_FILE), 'w').close()
+        self._pending = 0
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+
+_shared_indexes = {}
+_shared_indexes_lock = threading.Lock()
+
+
+def get_similarity_index(index_dir=SIMILARITY_FOLDER):
+    """Process-wide index per folder, so every generator instance appends to the same one"""
+    with _shared_indexes_lock:
+        index = _shared_indexes.get(index_dir)
+        if index is None:
+            index = SimilarityIndex(index_dir)
+            _shared_indexes[index_dir] = index
+        return index
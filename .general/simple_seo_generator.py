@@ -3,16 +3,37 @@
 
 import os
 import re
+import argparse
 import time
 import json
 import random
 import datetime
+import threading
 import urllib.request
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from slugify import slugify
-from langdetect import detect
 import yaml
 
+from http_client import get_shared_client
+from response_cache import ResponseCache, get_response_cache
+from formatting_rules import FormattingRules, STEP_INDICATORS, TRANSITIONS, derive_seed
+from markdown_document import Block, MarkdownDocument
+from quality_gate import QualityGate
+from usage_tracker import get_usage_tracker
+from link_index import LinkIndex
+from similarity_index import get_similarity_index
+from state_store import LOCAL_STATUS, STATE_DB, get_state_store
+from artifact_store import ARTIFACT_DIR, LOCAL, ArtifactStore
+from tag_extractor import TagExtractor, get_tag_statistics
+from work_queue import WorkQueue
+from vocabulary import TermMatcher, load_matcher, VOCABULARY_DIR
+from batch_jobs import GeminiBatchClient, batch_job_path, write_batch_jsonl
+from resilience import (
+    EmptyResponseError, GeminiError, QuotaExceededError,
+    ServiceUnavailableError, backoff_delay, classify_error, get_circuit_breaker
+)
+
 # Configuration
 SUBJECTS_FILE = "KEYWORD.txt"
 CONFIG_FILE = "config.txt"
@@ -20,6 +41,38 @@ OUTPUT_FOLDER = "_posts"
 IMAGES_FOLDER = "assets/image"
 ARTICLE_LINKS_FILE = "article_links.json"
 PROCESSED_SUBJECTS_FILE = "processed_subjects.json"
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+RESPONSE_CACHE_FOLDER = ".cache/gemini"
+# Default order of the passes run on a parsed article (see post_process)
+POST_PROCESSING_PASSES = "format,images,links"
+
+# Fixed article outline: (H2 heading, [H3 headings]) per language, {title} is the subject
+ARTICLE_OUTLINES = {
+    'english': {
+        'sections': [
+            ("Understanding {title}", ["Core Concepts and Fundamentals", "Key Benefits and Applications", "Industry Context"]),
+            ("Complete {title} Guide", ["Step-by-Step Implementation", "Best Practices and Standards", "Essential Requirements"]),
+            ("Advanced {title} Strategies", ["Professional Techniques", "Expert Methods", "Optimization Tips"]),
+            ("Tools and Resources", ["Essential Platforms", "Recommended Solutions", "Implementation Tools"]),
+            ("Common Challenges", ["Typical Issues and Solutions", "Problem Prevention", "Troubleshooting Guide"]),
+            ("Implementation Results", ["Success Metrics", "Case Studies", "ROI Optimization"]),
+            ("Future Outlook", ["Emerging Trends", "Technology Impact", "Strategic Planning"]),
+        ],
+        'conclusion': ("Conclusion", "[Key takeaways and action steps]")
+    },
+    'indonesian': {
+        'sections': [
+            ("Memahami {title}", ["Konsep Dasar dan Fundamental", "Manfaat Utama dan Aplikasi", "Konteks Industri"]),
+            ("Panduan Lengkap {title}", ["Implementasi Step-by-Step", "Best Practices dan Standar", "Persyaratan Penting"]),
+            ("Strategi Advanced {title}", ["Teknik Profesional", "Metode Expert", "Tips Optimasi"]),
+            ("Tools dan Resources", ["Platform Essential", "Solusi Terpercaya", "Tools Implementasi"]),
+            ("Tantangan Umum", ["Masalah Tipikal dan Solusi", "Pencegahan Masalah", "Panduan Troubleshooting"]),
+            ("Implementasi dan Hasil", ["Metrik Kesuksesan", "Studi Kasus", "Optimasi ROI"]),
+            ("Outlook Masa Depan", ["Tren yang Muncul", "Dampak Teknologi", "Perencanaan Strategis"]),
+        ],
+        'conclusion': ("Kesimpulan", "[Rangkuman dan langkah tindak lanjut]")
+    }
+}
 
 class SimpleConfigManager:
     def __init__(self, config_file=CONFIG_FILE):
@@ -41,7 +94,39 @@ class SimpleConfigManager:
             'author_name': 'Admin',
             'enable_auto_images': 'true',
             'images_per_article': '5',
-            'min_images_per_article': '1'
+            'min_images_per_article': '1',
+            'api_rpm_limit': '15',
+            'api_tpm_limit': '1000000',
+            'api_quota_cooldown': '60',
+            'enable_response_cache': 'true',
+            'response_cache_max_mb': '200',
+            'response_cache_max_age_hours': '168',
+            'generation_mode': 'single',
+            'section_concurrency': '4',
+            'gemini_api_base': GEMINI_API_BASE,
+            'batch_poll_interval': '30',
+            'api_max_retries': '4',
+            'retry_base_delay': '1',
+            'retry_max_delay': '30',
+            'circuit_failure_threshold': '5',
+            'circuit_reset_seconds': '60',
+            'post_processing_passes': POST_PROCESSING_PASSES,
+            'seeded_output': 'true',
+            'output_seed': '',
+            'vocabulary_dir': '',
+            'enable_similarity_links': 'true',
+            'similarity_index_dir': 'data/similarity',
+            'enable_quality_gate': 'true',
+            'quality_max_sections': '4',
+            'tag_source': 'tfidf',
+            'max_tags': '5',
+            'tag_stats_dir': 'data/tags',
+            'state_db': STATE_DB,
+            'queue_visibility_timeout': '1800',
+            'queue_bulk_visibility_timeout': '86400',
+            'queue_max_attempts': '3',
+            'queue_retry_delay': '300',
+            'artifact_dir': ARTIFACT_DIR
         }
         
         if not os.path.exists(self.config_file):
@@ -70,42 +155,286 @@ class SimpleConfigManager:
         value = self.config.get(key, str(default)).lower()
         return value in ['true', '1', 'yes', 'on']
 
+class TokenBucket:
+    """Token bucket that refills continuously up to `capacity` tokens per minute"""
+    
+    def __init__(self, capacity_per_minute):
+        self.capacity = float(capacity_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / 60.0)
+            self.updated = now
+    
+    def wait_time(self, amount, now):
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60.0 / self.capacity
+    
+    def consume(self, amount, now):
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+    
+    def refund(self, amount):
+        self.tokens = min(self.capacity, self.tokens + amount)
+    
+    def utilization(self, now):
+        self._refill(now)
+        return 1.0 - max(self.tokens, 0.0) / self.capacity
+
+
+class APIKeyState:
+    """Rate limit buckets and health state for a single API key"""
+    
+    def __init__(self, key, rpm_limit, tpm_limit):
+        self.key = key
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.request_bucket = TokenBucket(rpm_limit)
+        self.token_bucket = TokenBucket(tpm_limit)
+        self.in_flight = 0
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.quota_errors = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.last_error = None
+    
+    def wait_time(self, estimated_tokens, now):
+        if self.cooldown_until > now:
+            return self.cooldown_until - now
+        return max(self.request_bucket.wait_time(1, now),
+                   self.token_bucket.wait_time(estimated_tokens, now))
+    
+    def load(self, now):
+        """Load score used for least-loaded selection"""
+        return (self.in_flight,
+                max(self.request_bucket.utilization(now), self.token_bucket.utilization(now)))
+
+
 class SimpleAPIManager:
-    def __init__(self, filename="apikey.txt"):
+    """Thread-safe pool of Gemini API keys with per-key RPM/TPM limits and quota cooldown
+    
+    apikey.txt holds one key per line, optionally followed by per-key limits:
+        AIza... rpm=15 tpm=1000000
+    """
+    
+    def __init__(self, filename="apikey.txt", rpm_limit=15, tpm_limit=1000000, cooldown_seconds=60):
         self.filename = filename
-        self.api_keys = self._load_api_keys()
+        self.default_rpm_limit = rpm_limit
+        self.default_tpm_limit = tpm_limit
+        self.cooldown_seconds = cooldown_seconds
+        self._condition = threading.Condition()
+        self._mtime = self._file_mtime()
+        self.key_states = self._load_api_keys()
         self.current_index = 0
-        
+    
+    def _file_mtime(self):
+        return os.path.getmtime(self.filename) if os.path.exists(self.filename) else None
+    
     def _load_api_keys(self):
-        """Load API keys from file"""
+        """Load API keys and optional per-key limits from file"""
         if not os.path.exists(self.filename):
             return []
         
-        keys = []
+        states = []
+        seen = set()
         with open(self.filename, "r", encoding='utf-8') as file:
             for line in file:
                 line = line.strip()
-                if line and not line.startswith('#'):
-                    if line.startswith('AIza') and len(line) > 30:
-                        keys.append(line)
-        return keys
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split()
+                key = parts[0]
+                if not (key.startswith('AIza') and len(key) > 30) or key in seen:
+                    continue
+                
+                options = {}
+                for part in parts[1:]:
+                    if '=' in part:
+                        name, value = part.split('=', 1)
+                        options[name.strip().lower()] = value.strip()
+                try:
+                    rpm_limit = int(options.get('rpm', self.default_rpm_limit))
+                    tpm_limit = int(options.get('tpm', self.default_tpm_limit))
+                except ValueError:
+                    rpm_limit, tpm_limit = self.default_rpm_limit, self.default_tpm_limit
+                
+                seen.add(key)
+                states.append(APIKeyState(key, max(rpm_limit, 1), max(tpm_limit, 1)))
+        return states
+    
+    def refresh(self):
+        """Reload the key file if it changed; keys kept with the same limits keep their buckets and cooldown"""
+        mtime = self._file_mtime()
+        if mtime == self._mtime:
+            return
+        states = self._load_api_keys()
+        with self._condition:
+            self._mtime = mtime
+            current = {state.key: state for state in self.key_states}
+            for position, state in enumerate(states):
+                old = current.get(state.key)
+                if old and (old.rpm_limit, old.tpm_limit) == (state.rpm_limit, state.tpm_limit):
+                    states[position] = old
+            self.key_states = states
+            self.current_index = 0
+            self._condition.notify_all()
+    
+    @property
+    def api_keys(self):
+        return [state.key for state in self.key_states]
+    
+    def _get_state(self, key):
+        for state in self.key_states:
+            if state.key == key:
+                return state
+        return None
+    
+    def _pick_state(self, estimated_tokens, now):
+        """Return (state, 0) for the least-loaded ready key, or (None, seconds to wait)"""
+        ready = []
+        min_wait = None
+        count = len(self.key_states)
+        for offset in range(count):
+            state = self.key_states[(self.current_index + offset) % count]
+            wait = state.wait_time(estimated_tokens, now)
+            if wait <= 0:
+                ready.append(state)
+            elif min_wait is None or wait < min_wait:
+                min_wait = wait
+        if ready:
+            # min() keeps the first of equal loads, so ties follow rotation order
+            return min(ready, key=lambda state: state.load(now)), 0.0
+        return None, min_wait
+    
+    def acquire_key(self, estimated_tokens=0, timeout=None):
+        """Reserve capacity on the least-loaded healthy key, waiting if all are saturated
+        
+        Returns the key, or None if there are no keys or `timeout` seconds pass first.
+        Every acquired key must be handed back with release_key().
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self.key_states:
+                now = time.monotonic()
+                state, wait = self._pick_state(estimated_tokens, now)
+                if state:
+                    state.request_bucket.consume(1, now)
+                    state.token_bucket.consume(estimated_tokens, now)
+                    state.in_flight += 1
+                    state.total_requests += 1
+                    return state.key
+                
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = min(wait, remaining)
+                self._condition.wait(wait)
+        return None
+    
+    def release_key(self, key, estimated_tokens=0, tokens_used=None):
+        """Return a key acquired with acquire_key(), reconciling the token estimate"""
+        with self._condition:
+            state = self._get_state(key)
+            if not state:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            if tokens_used is not None:
+                state.total_tokens += tokens_used
+                if tokens_used < estimated_tokens:
+                    state.token_bucket.refund(estimated_tokens - tokens_used)
+                else:
+                    state.token_bucket.consume(tokens_used - estimated_tokens, time.monotonic())
+            self._condition.notify_all()
+    
+    def mark_quota_exceeded(self, key, retry_after=None):
+        """Put a key in cooldown after a 429 / RESOURCE_EXHAUSTED response"""
+        with self._condition:
+            state = self._get_state(key)
+            if not state:
+                return
+            cooldown = retry_after if retry_after and retry_after > 0 else self.cooldown_seconds
+            state.cooldown_until = max(state.cooldown_until, time.monotonic() + cooldown)
+            state.quota_errors += 1
+            state.last_error = "quota exceeded"
+            self._condition.notify_all()
+    
+    def mark_failure(self, key, error):
+        """Record a non-quota failure for a key"""
+        with self._condition:
+            state = self._get_state(key)
+            if state:
+                state.failures += 1
+                state.last_error = str(error)
     
     def get_current_key(self):
-        """Get current API key"""
-        if not self.api_keys:
+        """Get the key acquire_key() would pick right now, without reserving capacity"""
+        if not self.key_states:
             return None
-        return self.api_keys[self.current_index]
+        with self._condition:
+            state, _ = self._pick_state(0, time.monotonic())
+            return state.key if state else self.key_states[self.current_index].key
     
     def rotate_key(self):
-        """Rotate to next API key"""
-        if len(self.api_keys) > 1:
-            self.current_index = (self.current_index + 1) % len(self.api_keys)
+        """Rotate the tie-break order to the next API key"""
+        with self._condition:
+            if len(self.key_states) > 1:
+                self.current_index = (self.current_index + 1) % len(self.key_states)
+    
+    def get_stats(self):
+        """Per-key usage and health snapshot"""
+        with self._condition:
+            now = time.monotonic()
+            return [{
+                'key': f"{state.key[:8]}...{state.key[-4:]}",
+                'in_flight': state.in_flight,
+                'total_requests': state.total_requests,
+                'total_tokens': state.total_tokens,
+                'quota_errors': state.quota_errors,
+                'failures': state.failures,
+                'cooling_down': state.cooldown_until > now,
+                'cooldown_remaining': round(max(0.0, state.cooldown_until - now), 1),
+                'rpm_limit': state.rpm_limit,
+                'tpm_limit': state.tpm_limit,
+                'last_error': state.last_error
+            } for state in self.key_states]
+
+
+_shared_api_managers = {}
+_shared_api_managers_lock = threading.Lock()
+
+
+def get_api_manager(filename="apikey.txt", rpm_limit=15, tpm_limit=1000000, cooldown_seconds=60):
+    """Process-wide key pool per key file, so every generator shares its rate limits and quota cooldowns
+
+    The limits apply when the pool is created; later calls reload the key file if it changed.
+    """
+    path = os.path.abspath(filename)
+    with _shared_api_managers_lock:
+        manager = _shared_api_managers.get(path)
+        if manager is None:
+            manager = SimpleAPIManager(filename, rpm_limit, tpm_limit, cooldown_seconds)
+            _shared_api_managers[path] = manager
+    manager.refresh()
+    return manager
 
 class SimpleImageScraper:
     """Enhanced image scraper for downloading relevant images with multiple fallback sources"""
     
-    def __init__(self, images_folder="assets/image"):
+    def __init__(self, images_folder="assets/image", seed=None, image_terms=None):
         self.images_folder = images_folder
+        # With a seed, image URLs are derived from (seed, query) instead of random
+        self.seed = seed
+        # Matcher mapping subject terms to English search terms (vocabulary/*/image_terms.txt)
+        self.image_terms = image_terms if image_terms is not None else load_matcher('image_terms')
         self.ensure_images_folder()
         self.downloaded_cache = set()  # Track downloaded images to avoid duplicates
         
@@ -165,11 +494,12 @@ class SimpleImageScraper:
             # Different image dimensions for variety
             dimensions = ['1200x800', '1600x900', '800x600', '1920x1080', '1024x768', '1280x720']
             
+            rng = random.Random(derive_seed(self.seed, query)) if self.seed is not None else random
             for i in range(count):
                 dim = dimensions[i % len(dimensions)]
                 # Create unique URLs with different keyword combinations
                 keyword_variant = self._get_keyword_variant(keywords, i)
-                img_url = f"https://source.unsplash.com/{dim}/?{keyword_variant}&sig={random.randint(1, 1000)}"
+                img_url = f"https://source.unsplash.com/{dim}/?{keyword_variant}&sig={rng.randint(1, 1000)}"
                 images.append(img_url)
             
             return images
@@ -180,24 +510,8 @@ class SimpleImageScraper:
     
     def _process_keywords(self, query):
         """Process and enhance keywords for better image search"""
-        # Extract key business terms and translate to English for better results
-        business_terms = {
-            'bisnis': 'business',
-            'investasi': 'investment',
-            'startup': 'startup',
-            'teknologi': 'technology',
-            'marketing': 'marketing',
-            'digital': 'digital',
-            'keuangan': 'finance',
-            'saham': 'stocks',
-            'produktivitas': 'productivity',
-            'strategi': 'strategy'
-        }
-        
-        keywords = query.lower()
-        for indo, eng in business_terms.items():
-            if indo in keywords:
-                keywords = keywords.replace(indo, eng)
+        # Translate key business terms to English for better results, in one pass
+        keywords = self.image_terms.replace(query)
         
         # Clean and format keywords
         keywords = re.sub(r'[^\w\s]', '', keywords)
@@ -319,88 +633,338 @@ class SimpleImageScraper:
             return None
 
 class SimpleSEOGenerator:
-    def __init__(self):
+    def __init__(self, repo_name=None):
         self.config = SimpleConfigManager()
-        self.api_manager = SimpleAPIManager()
-        self.image_scraper = SimpleImageScraper()
+        # Token usage is accounted per repo (e.g. the Jekyll repo an ArticleProcessor publishes to)
+        self.repo_name = repo_name or 'default'
+        self.usage_tracker = get_usage_tracker()
+        # One key pool per process: the scheduler, UI batches and reruns share its buckets and cooldowns
+        self.api_manager = get_api_manager(
+            rpm_limit=self.config.get_int('api_rpm_limit', 15),
+            tpm_limit=self.config.get_int('api_tpm_limit', 1000000),
+            cooldown_seconds=self.config.get_int('api_quota_cooldown', 60)
+        )
+        # Seeded output: the same model text gives the same markdown for a given repo and keyword
+        self.seeded_output = self.config.get_bool('seeded_output', True)
+        self.output_seed = self.config.get('output_seed', '')
+        # Term lists for keywords, tags, categories and image search live in vocabulary files
+        self.language = self.config.get('language', 'Indonesian') or 'Indonesian'
+        self.vocabulary_dir = self.config.get('vocabulary_dir') or VOCABULARY_DIR
+        self.image_scraper = SimpleImageScraper(
+            seed=derive_seed(self.repo_name, self.output_seed) if self.seeded_output else None,
+            image_terms=self.vocabulary('image_terms')
+        )
+        self.category_matcher = self._build_category_matcher()
+        # Tags by TF-IDF against this repo's earlier articles; tag_source=vocabulary keeps the fixed list
+        self.tag_extractor = TagExtractor(
+            get_tag_statistics(os.path.join(self.config.get('tag_stats_dir') or 'data/tags', slugify(self.repo_name))),
+            stopwords=self.vocabulary('stopwords').ranks,
+            max_tags=self.config.get_int('max_tags', 5)
+        ) if self.config.get('tag_source', 'tfidf').lower() == 'tfidf' else None
+        self.formatting_rules = FormattingRules()
+        self.post_processing_passes = {
+            'format': self.format_pass,
+            'images': self.images_pass,
+            'links': self.links_pass
+        }
+        self.http_client = get_shared_client()
+        self.api_base = (self.config.get('gemini_api_base') or GEMINI_API_BASE).rstrip('/')
+        # Shared with every instance using the same API base and settings; configured only when created
+        self.circuit_breaker = get_circuit_breaker(
+            self.api_base,
+            failure_threshold=self.config.get_int('circuit_failure_threshold', 5),
+            reset_timeout=self.config.get_int('circuit_reset_seconds', 60)
+        )
+        # One cache (and LRU index) per process, so max_bytes holds across generator instances
+        self.response_cache = get_response_cache(
+            RESPONSE_CACHE_FOLDER,
+            max_bytes=self.config.get_int('response_cache_max_mb', 200) * 1024 * 1024,
+            max_age_seconds=self.config.get_int('response_cache_max_age_hours', 168) * 3600
+        ) if self.config.get_bool('enable_response_cache', True) else None
+        # finishReason of the last request made by each thread
+        self._request_state = threading.local()
         
         # Ensure directories exist
         os.makedirs(OUTPUT_FOLDER, exist_ok=True)
         os.makedirs(IMAGES_FOLDER, exist_ok=True)
         
-        # Article links database for internal linking
+        # Article links, processed subjects and keywords live in the SQLite state store;
+        # article_links.json and processed_subjects.json are only read for a one-time import
+        self.state_store = get_state_store(self.config.get('state_db') or STATE_DB)
+        # Subjects are leased from the store, so concurrent runs and the app never take the same one
+        self.subjects_file = SUBJECTS_FILE
+        # Status recorded for a subject once its post is written to OUTPUT_FOLDER
+        self.local_status = 'published'
+        # Every built post is kept (gzip, by content hash) before it is written or uploaded
+        self.artifact_store = ArtifactStore(self.state_store, self.config.get('artifact_dir') or ARTIFACT_DIR)
+        self.work_queue = WorkQueue(
+            self.state_store, self.repo_name,
+            visibility_timeout=self.config.get_int('queue_visibility_timeout', 1800),
+            max_attempts=self.config.get_int('queue_max_attempts', 3),
+            retry_delay=self.config.get_int('queue_retry_delay', 300)
+        )
         self.article_links_file = ARTICLE_LINKS_FILE
+        # TF-IDF vectors of this repo's published articles; related articles are picked by text similarity
+        self.similarity_index = get_similarity_index(
+            os.path.join(self.config.get('similarity_index_dir') or 'data/similarity', slugify(self.repo_name))
+        ) if self.config.get_bool('enable_similarity_links', True) else None
         self.load_article_links()
     
-    def gemini_request(self, prompt, model="gemini-1.5-flash", max_retries=2):
-        """Optimized Gemini API request for GitHub Actions"""
+    def gemini_request(self, prompt, model="gemini-1.5-flash", max_retries=None, use_cache=True):
+        """Optimized Gemini API request for GitHub Actions
+        
+        Retries transient failures with jittered exponential backoff that honors
+        Retry-After, and raises a GeminiError subclass when the request fails.
+        Successful responses are cached on disk; pass use_cache=False to force a fresh generation.
+        """
+        max_output_tokens = 5120  # Reduced for faster processing
+        # Rough estimate (~4 chars per token) used to reserve TPM capacity up front
+        estimated_tokens = len(prompt) // 4 + max_output_tokens
+        if max_retries is None:
+            max_retries = max(1, self.config.get_int('api_max_retries', 4))
+        
+        self._request_state.finish_reason = None
+        cache_key = self._cache_key(model, prompt, max_output_tokens) if use_cache else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         for attempt in range(max_retries):
+            api_key = None
+            tokens_used = None
+            requested = False
+            recorded = False
             try:
-                api_key = self.api_manager.get_current_key()
-                if not api_key:
-                    raise Exception("No API key available")
+                api_key = self._acquire_api_key(estimated_tokens)
+                self.circuit_breaker.before_call(model)
+                requested = True
+                request_started = time.perf_counter()
                 
-                url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
+                url = f"{self.api_base}/models/{model}:generateContent?key={api_key}"
+                data = self._build_generation_payload(prompt, max_output_tokens)
                 
-                data = {
-                    "contents": [{
-                        "parts": [{"text": prompt}]
-                    }],
-                    "generationConfig": {
-                        "temperature": 0.6,
-                        "topK": 30,
-                        "topP": 0.9,
-                        "maxOutputTokens": 5120,  # Reduced for faster processing
-                    }
-                }
+                # Pooled keep-alive connection shared across workers
+                result, _ = self.http_client.post_json(url, data, timeout=40)
+                usage = result.get('usageMetadata', {})
+                tokens_used = usage.get('totalTokenCount')
+                self.usage_tracker.record_call(self.repo_name, api_key, model, usage,
+                                               time.perf_counter() - request_started)
+                recorded = True
+                content = self._extract_text(result)
+                self.circuit_breaker.record_success(model)
+                finish_reason = result['candidates'][0].get('finishReason')
+                self._request_state.finish_reason = finish_reason
                 
-                # Convert to JSON and encode
-                json_data = json.dumps(data).encode('utf-8')
+                # Output cut at maxOutputTokens is not cached, so a retry gets a fresh generation
+                if cache_key and finish_reason != 'MAX_TOKENS':
+                    self.response_cache.put(cache_key, content, model)
+                return content
+                    
+            except Exception as e:
+                if requested and not recorded:
+                    self.usage_tracker.record_call(self.repo_name, api_key, model,
+                                                   latency=time.perf_counter() - request_started, ok=False)
+                error = self._handle_request_error(model, api_key, e, requested)
+                print(f"API request attempt {attempt + 1} failed: {type(error).__name__}: {error}")
+                if not error.retryable or attempt == max_retries - 1:
+                    raise error from (None if error is e else e)
+                time.sleep(self._retry_delay(attempt, error))
+            finally:
+                if api_key:
+                    self.api_manager.release_key(api_key, estimated_tokens, tokens_used)
+    
+    def _acquire_api_key(self, estimated_tokens):
+        api_key = self.api_manager.acquire_key(estimated_tokens, timeout=120)
+        if not api_key:
+            if not self.api_manager.api_keys:
+                raise GeminiError("No API key available")
+            raise QuotaExceededError("All API keys are rate limited or cooling down")
+        return api_key
+    
+    def _extract_text(self, result):
+        candidates = result.get('candidates') or []
+        if not candidates:
+            reason = result.get('promptFeedback', {}).get('blockReason', 'no candidates')
+            raise EmptyResponseError(f"Empty response: {reason}")
+        return candidates[0]['content']['parts'][0]['text'].strip()
+    
+    def last_finish_reason(self):
+        """finishReason of this thread's last request (e.g. STOP, MAX_TOKENS), None for a cache hit"""
+        return getattr(self._request_state, 'finish_reason', None)
+    
+    def _handle_request_error(self, model, api_key, error, requested):
+        """Classify a failure and update circuit and key health accordingly"""
+        error = classify_error(error)
+        if requested:
+            if isinstance(error, ServiceUnavailableError):
+                self.circuit_breaker.record_failure(model)
+            else:
+                # The service answered, so the model itself is reachable
+                self.circuit_breaker.record_success(model)
+        if api_key:
+            if isinstance(error, QuotaExceededError):
+                self.api_manager.mark_quota_exceeded(api_key, error.retry_after)
+            elif requested:
+                self.api_manager.mark_failure(api_key, error)
+        return error
+    
+    def _retry_delay(self, attempt, error):
+        base = float(self.config.get_int('retry_base_delay', 1))
+        cap = float(self.config.get_int('retry_max_delay', 30))
+        if isinstance(error, QuotaExceededError):
+            # Retry-After is enforced per key by the key pool cooldown; the next
+            # attempt can go straight to another key
+            return backoff_delay(attempt, base / 2, cap)
+        return backoff_delay(attempt, base, cap, error.retry_after)
+    
+    def _build_generation_payload(self, prompt, max_output_tokens):
+        """Request body shared by generateContent and streamGenerateContent"""
+        return {
+            "contents": [{
+                "parts": [{"text": prompt}]
+            }],
+            "generationConfig": {
+                "temperature": 0.6,
+                "topK": 30,
+                "topP": 0.9,
+                "maxOutputTokens": max_output_tokens,
+            }
+        }
+    
+    def _cache_key(self, model, prompt, max_output_tokens):
+        """Response cache key, or None when the cache is disabled"""
+        if not self.response_cache:
+            return None
+        generation_config = self._build_generation_payload(prompt, max_output_tokens)['generationConfig']
+        return ResponseCache.make_key(model, prompt, generation_config)
+    
+    def gemini_stream(self, prompt, model="gemini-1.5-flash", max_retries=None, use_cache=True):
+        """Stream generated text chunks from streamGenerateContent (SSE)
+        
+        Retries only happen before the first chunk arrives; once text has been
+        yielded a GeminiError is raised to the caller. A cache hit is yielded as
+        a single chunk.
+        """
+        max_output_tokens = 5120
+        estimated_tokens = len(prompt) // 4 + max_output_tokens
+        if max_retries is None:
+            max_retries = max(1, self.config.get_int('api_max_retries', 4))
+        
+        self._request_state.finish_reason = None
+        cache_key = self._cache_key(model, prompt, max_output_tokens) if use_cache else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        for attempt in range(max_retries):
+            api_key = None
+            tokens_used = None
+            response = None
+            started = False
+            requested = False
+            recorded = False
+            usage = {}
+            try:
+                api_key = self._acquire_api_key(estimated_tokens)
+                self.circuit_breaker.before_call(model)
+                requested = True
+                request_started = time.perf_counter()
                 
-                # Create request
-                req = urllib.request.Request(
+                url = f"{self.api_base}/models/{model}:streamGenerateContent?alt=sse&key={api_key}"
+                response = self.http_client.request(
+                    'POST',
                     url,
-                    data=json_data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'User-Agent': 'SEO-Generator/1.0'
-                    }
+                    body=json.dumps(self._build_generation_payload(prompt, max_output_tokens)).encode('utf-8'),
+                    headers={'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+                    timeout=120,
+                    stream=True
                 )
                 
-                # Reduced timeout for GitHub Actions efficiency
-                with urllib.request.urlopen(req, timeout=40) as response:
-                    result = json.loads(response.read().decode('utf-8'))
-                    
-                    if 'candidates' in result and result['candidates']:
-                        content = result['candidates'][0]['content']['parts'][0]['text']
-                        return content.strip()
+                parts = []
+                usage = {}
+                finish_reason = None
+                for event in self._iter_sse_events(response):
+                    if event.get('usageMetadata', {}).get('totalTokenCount'):
+                        usage = event['usageMetadata']
+                        tokens_used = usage['totalTokenCount']
+                    for candidate in event.get('candidates', [])[:1]:
+                        finish_reason = candidate.get('finishReason') or finish_reason
+                        for part in candidate.get('content', {}).get('parts', []):
+                            text = part.get('text')
+                            if text:
+                                started = True
+                                parts.append(text)
+                                yield text
+                self.usage_tracker.record_call(self.repo_name, api_key, model, usage,
+                                               time.perf_counter() - request_started)
+                recorded = True
+                if not parts:
+                    raise EmptyResponseError("Empty streamed response")
+                self.circuit_breaker.record_success(model)
+                self._request_state.finish_reason = finish_reason
+                if cache_key and finish_reason != 'MAX_TOKENS':
+                    self.response_cache.put(cache_key, ''.join(parts).strip(), model)
+                return
                 
-                if len(self.api_manager.api_keys) > 1:
-                    self.api_manager.rotate_key()
-                    
             except Exception as e:
-                print(f"API request attempt {attempt + 1} failed: {str(e)}")
-                if attempt == max_retries - 1:
-                    return f"Error generating content: {str(e)}"
-                if len(self.api_manager.api_keys) > 1:
-                    self.api_manager.rotate_key()
-                time.sleep(1)  # Faster retry
-        
-        return "Failed to generate content after multiple attempts"
+                if requested and not recorded:
+                    self.usage_tracker.record_call(self.repo_name, api_key, model, usage,
+                                                   latency=time.perf_counter() - request_started, ok=False)
+                error = self._handle_request_error(model, api_key, e, requested)
+                print(f"API stream attempt {attempt + 1} failed: {type(error).__name__}: {error}")
+                if started or not error.retryable or attempt == max_retries - 1:
+                    raise error from (None if error is e else e)
+                time.sleep(self._retry_delay(attempt, error))
+            finally:
+                if response is not None:
+                    response.release_conn()
+                if api_key:
+                    self.api_manager.release_key(api_key, estimated_tokens, tokens_used)
+    
+    def _iter_sse_events(self, response):
+        """Decode `data:` events from a server-sent event stream"""
+        buffer = b''
+        data_lines = []
+        for chunk in response.stream(4096):
+            buffer += chunk
+            while b'\n' in buffer:
+                raw_line, buffer = buffer.split(b'\n', 1)
+                line = raw_line.rstrip(b'\r').decode('utf-8')
+                if line.startswith('data:'):
+                    data_lines.append(line[5:].strip())
+                elif not line and data_lines:
+                    yield json.loads('\n'.join(data_lines))
+                    data_lines = []
+        if data_lines:
+            yield json.loads('\n'.join(data_lines))
+    
+    def iter_completed_lines(self, chunks):
+        """Re-chunk a text stream into complete lines as soon as each newline arrives"""
+        pending = ''
+        for chunk in chunks:
+            pending += chunk
+            while '\n' in pending:
+                line, pending = pending.split('\n', 1)
+                yield line
+        if pending:
+            yield pending
     
     def load_article_links(self):
         """Load existing article links for internal linking"""
-        try:
-            if os.path.exists(self.article_links_file):
-                with open(self.article_links_file, 'r', encoding='utf-8') as file:
-                    self.article_links = json.load(file)
-            else:
-                self.article_links = {}
-        except:
-            self.article_links = {}
+        self.state_store.import_article_links_file(self.article_links_file)
+        self.article_links = self.state_store.article_links()
+        self.link_index = LinkIndex(self.article_links)
+        if self.similarity_index is not None:
+            # Articles saved before the similarity index existed are indexed by title
+            missing = [(subject, data.get('title', ''), '') for subject, data in self.article_links.items()
+                       if subject not in self.similarity_index]
+            self.similarity_index.add_many(missing)
     
-    def save_article_link(self, subject, title, slug, categories):
-        """Save article link for future internal linking"""
+    def save_article_link(self, subject, title, slug, categories, content=None):
+        """Save article link for future internal linking; `content` (text or document) feeds the similarity index"""
         link_data = {
             'title': title,
             'slug': slug,
@@ -408,209 +972,167 @@ class SimpleSEOGenerator:
             'keywords': self._extract_keywords_from_subject(subject)
         }
         self.article_links[subject] = link_data
-        
-        with open(self.article_links_file, 'w', encoding='utf-8') as file:
-            json.dump(self.article_links, file, ensure_ascii=False, indent=2)
+        self.link_index.update(subject, link_data)
+        if self.similarity_index is not None:
+            self.similarity_index.add(subject, f"{subject} {title}", self._article_text(content))
+        self.state_store.save_article_link(subject, link_data)
+    
+    def vocabulary(self, name):
+        """Shared matcher for a vocabulary file (common terms plus the configured language's)"""
+        return load_matcher(name, self.language, self.vocabulary_dir)
     
     def _extract_keywords_from_subject(self, subject):
         """Extract keywords from subject for internal linking"""
-        keywords = []
-        subject_lower = subject.lower()
-        
-        # Common business keywords for matching
-        keyword_patterns = [
-            'bisnis', 'marketing', 'strategi', 'keuangan', 'investasi',
-            'startup', 'teknologi', 'digital', 'online', 'e-commerce',
-            'seo', 'content', 'social media', 'fintech', 'umkm'
-        ]
-        
-        for pattern in keyword_patterns:
-            if pattern in subject_lower:
-                keywords.append(pattern)
-        
-        return keywords
+        # Vocabulary order is kept, so keywords[:2] stays the same for a subject
+        return self.vocabulary('subject_keywords').find(subject)
     
-    def find_related_articles(self, current_subject, current_categories):
-        """Find related articles for internal linking"""
-        related = []
-        current_keywords = self._extract_keywords_from_subject(current_subject)
+    @staticmethod
+    def _article_text(content):
+        if isinstance(content, MarkdownDocument):
+            return content.to_markdown()
+        return content or ''
+    
+    def find_related_articles(self, current_subject, current_categories, content=None, limit=3):
+        """Find related articles for internal linking
         
-        for subject, data in self.article_links.items():
-            if subject == current_subject:
-                continue
-                
-            # Check category match
-            category_match = any(cat in current_categories for cat in data['categories'])
-            
-            # Check keyword match
-            keyword_match = any(kw in current_keywords for kw in data['keywords'])
-            
-            if category_match or keyword_match:
-                related.append({
-                    'title': data['title'],
-                    'slug': data['slug'],
-                    'relevance': len(set(current_keywords) & set(data['keywords']))
-                })
-        
-        # Sort by relevance and return top 3
-        related.sort(key=lambda x: x['relevance'], reverse=True)
-        return related[:3]
-    
-    def enhance_content_with_formatting(self, content, subject):
+        Most similar published articles (TF-IDF over title and body) first; any
+        remaining slots are filled by shared keywords and categories.
+        """
+        related = []
+        if self.similarity_index is not None:
+            similar = self.similarity_index.most_similar(
+                current_subject, self._article_text(content), limit=limit, exclude=(current_subject,)
+            )
+            for subject, score in similar:
+                data = self.article_links.get(subject)
+                if data:
+                    related.append((subject, round(score, 3)))
+        
+        if len(related) < limit:
+            # Top matches by shared keywords, read from the keyword/category postings only
+            current_keywords = self._extract_keywords_from_subject(current_subject)
+            chosen = {subject for subject, _ in related}
+            for subject, relevance in self.link_index.related(current_subject, current_keywords, current_categories,
+                                                              limit=limit + len(chosen)):
+                if subject not in chosen and len(related) < limit:
+                    related.append((subject, relevance))
+        
+        return [{
+            'title': self.article_links[subject]['title'],
+            'slug': self.article_links[subject]['slug'],
+            'relevance': relevance
+        } for subject, relevance in related]
+    
+    def enhance_content_with_formatting(self, content, subject, rng=None):
         """Enhance content with optimized heading structure, bullet points, and professional formatting"""
+        return '\n'.join(self.iter_enhanced_lines(content.split('\n'), subject, rng=rng))
+    
+    def output_rng(self, subject):
+        """Random source for post-processing choices
+        
+        In seeded mode (the default) this is a Random seeded from repo, keyword
+        and output_seed, so identical model output always gives identical
+        markdown; otherwise the shared `random` module.
+        """
+        if not self.seeded_output:
+            return random
+        return random.Random(derive_seed(self.repo_name, subject, self.output_seed))
+    
+    def iter_enhanced_lines(self, lines, subject, rng=None):
+        """Apply the formatting rules line by line; `lines` may be a live stream
+        
+        Each line is classified once and only the rules for its kind run, using
+        the patterns precompiled in self.formatting_rules. `rng` defaults to
+        output_rng(subject).
+        """
+        rules = self.formatting_rules
+        rng = rng or self.output_rng(subject)
         keywords = self._extract_keywords_from_subject(subject)
-        main_keyword = subject.split()[0].lower() if subject else ""
+        bullet_keywords = keywords[:2]
+        paragraph_keywords = keywords[:3]
+        bullet_styles = rules.bullet_styles
         
-        lines = content.split('\n')
-        enhanced_lines = []
         in_h3_section = False
         bullet_count = 0
-        current_h2 = ""
-        
-        # Professional bullet styles with ASCII symbols
-        bullet_styles = [
-            "• ", "◦ ", "▪ ", "▫ ", "→ ", "✓ ", "★ ", "▷ ", "‣ ", "⋄ ",
-            "► ", "⚬ ", "◆ ", "◇ ", "⬥ ", "⬦ ", "⬧ ", "⬨ ", "○ ", "● "
-        ]
-        
-        # Enhanced punctuation patterns for better readability
-        punctuation_fixes = [
-            (r'([a-zA-Z])\s*,\s*([a-zA-Z])', r'\1, \2'),  # Proper comma spacing
-            (r'([a-zA-Z])\s*\.\s*([A-Z])', r'\1. \2'),     # Proper period spacing
-            (r'([a-zA-Z])\s*:\s*([a-zA-Z])', r'\1: \2'),   # Proper colon spacing
-            (r'([a-zA-Z])\s*;\s*([a-zA-Z])', r'\1; \2'),   # Proper semicolon spacing
-            (r'([a-zA-Z])\s*\!\s*([A-Z])', r'\1! \2'),     # Proper exclamation spacing
-            (r'([a-zA-Z])\s*\?\s*([A-Z])', r'\1? \2'),     # Proper question spacing
-        ]
         
+        prev_line = ""
         for i, line in enumerate(lines):
-            enhanced_line = line
+            previous, prev_line = prev_line, line
             
             # Track heading levels for structure optimization
-            if line.startswith('### '):
-                in_h3_section = True
-                bullet_count = 0
-                enhanced_lines.append(enhanced_line)
-                continue
-            elif line.startswith('## '):
-                in_h3_section = False
-                current_h2 = line[3:].strip()
-                enhanced_lines.append(enhanced_line)
-                continue
-            elif line.startswith('#'):
-                in_h3_section = False
-                enhanced_lines.append(enhanced_line)
+            if line.startswith('#'):
+                in_h3_section = line.startswith('### ')
+                if in_h3_section:
+                    bullet_count = 0
+                yield line
                 continue
             
             # Skip empty lines
-            if not line.strip():
-                enhanced_lines.append(enhanced_line)
+            stripped = line.strip()
+            if not stripped:
+                yield line
                 continue
             
             # Enhanced bullet point formatting for H3 sections
-            if in_h3_section and (line.strip().startswith('* ') or line.strip().startswith('- ')):
+            if in_h3_section and stripped.startswith(('* ', '- ')):
                 # Use varied bullet styles for visual appeal
-                bullet_style = bullet_styles[bullet_count % len(bullet_styles)]
-                enhanced_line = re.sub(r'^(\s*)[\*\-]\s+', rf'\1{bullet_style}', line)
+                enhanced_line = rules.bullet(line, bullet_styles[bullet_count % len(bullet_styles)])
                 bullet_count += 1
                 
                 # Bold important terms in bullet points
-                for keyword in keywords[:2]:
-                    if keyword.lower() in enhanced_line.lower():
-                        enhanced_line = re.sub(
-                            r'\b' + re.escape(keyword) + r'\b',
-                            f'**{keyword}**',
-                            enhanced_line,
-                            count=1,
-                            flags=re.IGNORECASE
-                        )
-                        break
+                yield rules.bold_first_keyword(enhanced_line, bullet_keywords)
+                continue
             
             # Convert simple lists to numbered format for step-by-step content
-            elif in_h3_section and any(indicator in line.lower() for indicator in ['langkah', 'tahap', 'fase', 'step', 'cara']):
-                if line.strip() and not line.startswith(('1.', '2.', '3.')) and len(line.strip()) > 30:
-                    if not line.strip().startswith(tuple(bullet_styles)):
-                        enhanced_line = f"1. {line.strip()}"
+            if in_h3_section and any(indicator in line.lower() for indicator in STEP_INDICATORS):
+                if not line.startswith(('1.', '2.', '3.')) and len(stripped) > 30 and not stripped.startswith(bullet_styles):
+                    yield f"1. {stripped}"
+                else:
+                    yield line
+                continue
             
             # Professional content enhancement for paragraphs
-            elif line.strip() and not line.startswith('#'):
-                # Apply punctuation fixes
-                for pattern, replacement in punctuation_fixes:
-                    enhanced_line = re.sub(pattern, replacement, enhanced_line)
-                
-                # Bold main keywords naturally
-                for keyword in keywords[:3]:
-                    if keyword.lower() in enhanced_line.lower() and f"**{keyword}" not in enhanced_line:
-                        enhanced_line = re.sub(
-                            r'\b' + re.escape(keyword) + r'\b',
-                            f'**{keyword}**',
-                            enhanced_line,
-                            count=1,
-                            flags=re.IGNORECASE
-                        )
-                        break
-                
-                # Italic for emphasis on important phrases
-                emphasis_patterns = [
-                    r'\b(sangat penting|crucial|essential|kunci utama|fundamental)\b',
-                    r'\b(best practice|tips terbaik|strategi efektif|solusi optimal)\b',
-                    r'\b(pertumbuhan bisnis|peningkatan profit|hasil maksimal)\b',
-                    r'\b(terbukti efektif|highly recommended|wajib diterapkan)\b'
-                ]
-                
-                for pattern in emphasis_patterns:
-                    enhanced_line = re.sub(
-                        pattern,
-                        r'*\1*',
-                        enhanced_line,
-                        flags=re.IGNORECASE
-                    )
-                
-                # Ensure proper sentence endings
-                if len(enhanced_line.strip()) > 50:
-                    if not enhanced_line.strip().endswith(('.', '!', '?', ':', ';')):
-                        if enhanced_line.strip().endswith(','):
-                            enhanced_line = enhanced_line.rstrip(',') + '.'
-                        else:
-                            enhanced_line += '.'
-                
-                # Add transitional phrases for better flow (occasionally)
-                if i > 0 and len(enhanced_line) > 60 and random.random() < 0.12:
-                    prev_line = lines[i-1].strip() if i > 0 else ""
-                    if prev_line and not prev_line.startswith('#') and not enhanced_line.startswith(('Selanjutnya', 'Lebih lanjut', 'Di samping itu')):
-                        transitions = [
-                            'Selanjutnya', 'Lebih lanjut', 'Di samping itu', 
-                            'Berdasarkan hal tersebut', 'Dalam konteks ini',
-                            'Sebagai tambahan', 'Yang perlu diperhatikan'
-                        ]
-                        transition = random.choice(transitions)
-                        enhanced_line = f"{transition}, {enhanced_line.lower()}"
+            enhanced_line = rules.fix_punctuation(line)
             
-            enhanced_lines.append(enhanced_line)
-        
-        return '\n'.join(enhanced_lines)
+            # Bold main keywords naturally
+            enhanced_line = rules.bold_first_keyword(enhanced_line, paragraph_keywords, skip_bolded=True)
+            
+            # Italic for emphasis on important phrases
+            enhanced_line = rules.emphasize(enhanced_line)
+            
+            # Ensure proper sentence endings
+            enhanced_stripped = enhanced_line.strip()
+            if len(enhanced_stripped) > 50 and not enhanced_stripped.endswith(('.', '!', '?', ':', ';')):
+                if enhanced_stripped.endswith(','):
+                    enhanced_line = enhanced_line.rstrip(',') + '.'
+                else:
+                    enhanced_line += '.'
+            
+            # Add transitional phrases for better flow (occasionally)
+            if i > 0 and len(enhanced_line) > 60 and rng.random() < 0.12:
+                previous = previous.strip()
+                if previous and not previous.startswith('#') and not enhanced_line.startswith(TRANSITIONS[:3]):
+                    transition = rng.choice(TRANSITIONS)
+                    enhanced_line = f"{transition}, {enhanced_line.lower()}"
+            
+            yield enhanced_line
     
     def add_internal_links(self, content, subject, categories):
         """Add internal links to related articles"""
-        related_articles = self.find_related_articles(subject, categories)
+        document = MarkdownDocument.parse(content)
+        self._insert_internal_links(document, subject, categories)
+        return document.to_markdown()
+    
+    def _insert_internal_links(self, document, subject, categories):
+        related_articles = self.find_related_articles(subject, categories, content=document)
         
         if not related_articles:
-            return content
+            return
         
         # Find a good spot to add internal links (after first H2 section)
-        lines = content.split('\n')
-        insert_index = -1
-        
-        h2_count = 0
-        for i, line in enumerate(lines):
-            if line.startswith('## '):
-                h2_count += 1
-                if h2_count == 2:  # After first H2 section
-                    insert_index = i
-                    break
-        
-        if insert_index == -1:
-            return content
+        h2_indexes = [index for index, _ in document.headings(level=2)]
+        if len(h2_indexes) < 2:
+            return
         
         # Create internal links section
         links_section = [
@@ -627,9 +1149,7 @@ class SimpleSEOGenerator:
         links_section.append("")
         
         # Insert links
-        lines[insert_index:insert_index] = links_section
-        
-        return '\n'.join(lines)
+        document.insert(h2_indexes[1], links_section)
     
     def _generate_keyword_variations(self, title):
         """Generate LSI keyword variations for better SEO targeting"""
@@ -659,8 +1179,345 @@ class SimpleSEOGenerator:
         
         return variations[:8]  # Return top 8 variations
     
-    def generate_enhanced_article(self, subject):
-        """Generate enhanced article with deep content structure and 20+ headings"""
+    def generate_enhanced_article(self, subject, stream_callback=None, use_cache=True):
+        """Generate enhanced article with deep content structure and 20+ headings
+        
+        Returns the post-processed markdown, or None when nothing was generated.
+        See generate_article_document for the arguments.
+        """
+        document = self.generate_article_document(subject, stream_callback=stream_callback, use_cache=use_cache)
+        return document.to_markdown() if document is not None else None
+    
+    def generate_article_document(self, subject, stream_callback=None, use_cache=True):
+        """Generate an article and run the post-processing passes on its parsed form
+        
+        When `stream_callback` is given the article is requested with
+        streamGenerateContent and each formatted line is passed to the callback
+        as soon as it is complete. use_cache=False bypasses the response cache.
+        Returns a MarkdownDocument, or None when the response was empty.
+        Generation failures raise a GeminiError subclass.
+        """
+        sectioned = self.config.get('generation_mode', 'single').lower() == 'sectioned'
+        
+        if sectioned or stream_callback:
+            if sectioned:
+                source = self.iter_sectioned_lines(subject, use_cache=use_cache)
+            else:
+                chunks = self.gemini_stream(self._build_article_prompt(subject), use_cache=use_cache)
+                source = self.iter_completed_lines(chunks)
+            
+            lines = []
+            for line in self.iter_enhanced_lines(source, subject):
+                lines.append(line)
+                if stream_callback:
+                    stream_callback(line)
+            document = MarkdownDocument(lines).strip()
+            if not document:
+                return None
+            # Lines were formatted while streaming
+            document.applied.add('format')
+            # Sections finish on worker threads; their truncation is detected from the text
+            finish_reason = None if sectioned else self.last_finish_reason()
+        else:
+            content = self.gemini_request(self._build_article_prompt(subject), use_cache=use_cache)
+            finish_reason = self.last_finish_reason()
+            document = MarkdownDocument.parse(content)
+        
+        self.check_quality(document, subject, finish_reason)
+        return self.post_process(document, subject)
+    
+    def check_quality(self, document, subject, finish_reason=None):
+        """Measure a generated document and regenerate only the parts that fail
+        
+        Parts of the outline (intro, H2 sections, conclusion) that are missing,
+        cut off, thin while the article is under min_word_count or not in the
+        configured language are requested again with their section prompt and
+        spliced in place - at most quality_max_sections of them, most severe
+        first. The final report is kept on document.quality.
+        """
+        if not self.config.get_bool('enable_quality_gate', True) or not document:
+            return document
+        
+        parts = self._article_parts(subject.strip())
+        gate = QualityGate(
+            parts,
+            min_words=self.config.get_int('min_word_count', 5000),
+            target_headings=self.config.get_int('target_headings', 20),
+            language=self.language
+        )
+        report = gate.assess(document, finish_reason)
+        severity = ('missing', 'truncated', 'missing subheadings')
+        failing = sorted(report['regenerate'], key=lambda item: (
+            severity.index(item[1]) if item[1] in severity else len(severity), item[0]
+        ))[:max(0, self.config.get_int('quality_max_sections', 4))]
+        
+        if failing:
+            failing.sort()
+            summary = ', '.join(f"{parts[number][1] or 'intro'} ({reason})" for number, reason in failing)
+            print(f"🔍 Kualitas: {report['words']}/{report['min_words']} kata, "
+                  f"{report['headings']}/{report['target_headings']} heading - regenerasi {summary}")
+            regenerated = self._regenerate_parts(document, subject, parts, gate.locate(document), failing)
+            report = gate.assess(document)
+            report['regenerated'] = regenerated
+        document.quality = report
+        return document
+    
+    def _regenerate_parts(self, document, subject, parts, spans, failing):
+        """Request failing parts again and splice them over their old blocks, or into place when missing
+        
+        Returns the (heading, reason) pairs that were replaced; a part whose
+        request fails keeps its old text.
+        """
+        title = subject.strip()
+        word_range = self._section_word_range()
+        max_workers = max(1, min(self.config.get_int('section_concurrency', 4), len(failing)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section") as executor:
+            # use_cache=False: the cached answer for a section prompt is the text that failed
+            futures = [
+                executor.submit(self.gemini_request, self._part_prompt(title, parts[number], word_range), use_cache=False)
+                for number, _ in failing
+            ]
+        
+        edits = []
+        regenerated = []
+        for (number, reason), future in zip(failing, futures):
+            kind, heading, _ = parts[number]
+            try:
+                text = future.result()
+            except GeminiError as e:
+                print(f"⚠️ Regenerasi {heading or 'intro'} gagal: {e}")
+                continue
+            lines = self._normalize_section(text, heading).split('\n')
+            if 'format' in document.applied:
+                lines = list(self.iter_enhanced_lines(lines, subject))
+            if number in spans:
+                start, end = spans[number]
+            else:
+                start = end = self._insertion_point(spans, number, len(document))
+            edits.append((start, end, number, lines))
+            regenerated.append((heading or 'intro', reason))
+        
+        # Back to front so earlier spans keep their indexes
+        for start, end, _, lines in sorted(edits, reverse=True):
+            if start > 0 and document.blocks[start - 1].kind != 'blank':
+                lines = [''] + lines
+            document.replace(start, end, lines + [''])
+        document.strip()
+        return regenerated
+    
+    @staticmethod
+    def _insertion_point(spans, number, length):
+        """Block index for a missing part: after the closest earlier part, else before the next one"""
+        before = [spans[other][1] for other in spans if other < number]
+        if before:
+            return max(before)
+        after = [spans[other][0] for other in spans if other > number]
+        return min(after) if after else length
+    
+    def post_process(self, document, subject, passes=None):
+        """Run post-processing passes on a document, in order, each at most once
+        
+        `passes` defaults to the post_processing_passes config value
+        (format,images,links); unknown names are ignored.
+        """
+        if passes is None:
+            passes = self.config.get('post_processing_passes', POST_PROCESSING_PASSES).split(',')
+        for name in passes:
+            name = name.strip()
+            run_pass = self.post_processing_passes.get(name)
+            if run_pass and name not in document.applied:
+                run_pass(document, subject)
+                document.applied.add(name)
+        return document
+    
+    def format_pass(self, document, subject):
+        """Keyword formatting and natural language improvements, line for line"""
+        blocks = document.blocks
+        for block, line in zip(blocks, self.iter_enhanced_lines(document.texts(), subject)):
+            if line is not block.text:
+                block.set_text(line)
+    
+    def images_pass(self, document, subject):
+        """Insert the strategic images"""
+        self._insert_strategic_images(document, subject)
+    
+    def links_pass(self, document, subject):
+        """Insert links to related articles, using the subject's categories"""
+        self._insert_internal_links(document, subject, self.generate_categories(subject))
+    
+    def iter_bulk_articles(self, subjects, job_name="bulk", model="gemini-1.5-flash", status_callback=None):
+        """Generate many articles through one Batch API job
+        
+        Writes every prompt to a JSONL file, submits it, polls until the job
+        finishes and yields (subject, document, error) as result lines stream in;
+        each MarkdownDocument has already been through the post-processing passes.
+        """
+        subjects = list(dict.fromkeys(subject.strip() for subject in subjects if subject.strip()))
+        if not subjects:
+            return
+        
+        api_key = self.api_manager.get_current_key()
+        if not api_key:
+            raise Exception("No API key available")
+        
+        max_output_tokens = 5120
+        jsonl_path = batch_job_path(job_name)
+        count = write_batch_jsonl(jsonl_path, (
+            (subject, self._build_generation_payload(self._build_article_prompt(subject), max_output_tokens))
+            for subject in subjects
+        ))
+        print(f"📦 Batch file ditulis: {jsonl_path} ({count} prompt)")
+        
+        client = GeminiBatchClient(self.http_client, api_key, self.api_base)
+        file_name = client.upload_jsonl(jsonl_path, os.path.basename(jsonl_path))
+        batch_name = client.create_batch(model, file_name, os.path.basename(jsonl_path))
+        print(f"🚀 Batch job dikirim: {batch_name}")
+        if status_callback:
+            status_callback(f"submitted {batch_name}")
+        
+        batch = client.wait(
+            batch_name,
+            poll_interval=self.config.get_int('batch_poll_interval', 30),
+            status_callback=status_callback
+        )
+        
+        for subject, text, error in client.iter_results(batch):
+            if error:
+                yield subject, None, error
+                continue
+            # Cache raw output so a failed publish can retry without regenerating
+            if self.response_cache:
+                prompt = self._build_article_prompt(subject)
+                self.response_cache.put(self._cache_key(model, prompt, max_output_tokens), text, model)
+            document = self.check_quality(MarkdownDocument.parse(text), subject)
+            yield subject, self.post_process(document, subject), None
+    
+    def _get_outline(self, language):
+        return ARTICLE_OUTLINES['english' if language.lower() == 'english' else 'indonesian']
+    
+    def _format_outline(self, outline, title):
+        """Render the outline as the markdown skeleton used in prompts"""
+        blocks = [f"# {title}"]
+        for heading, subheadings in outline['sections']:
+            lines = [f"## {heading.format(title=title)}"]
+            lines.extend(f"### {sub}" for sub in subheadings)
+            blocks.append('\n'.join(lines))
+        conclusion, hint = outline['conclusion']
+        blocks.append(f"## {conclusion}\n{hint}")
+        return '\n\n'.join(blocks)
+    
+    def _build_section_prompt(self, title, part, heading=None, subheadings=None, word_range=None):
+        """Prompt for one part of a sectioned article: 'intro', 'section' or 'conclusion'"""
+        language = self.config.get('language', 'Indonesian') or 'Indonesian'
+        outline = self._format_outline(self._get_outline(language), title)
+        english = language.lower() == 'english'
+        
+        if part == 'intro':
+            task = (f"Write only the introduction (2-3 paragraphs, no headings) that follows the \"# {title}\" title "
+                    f"and previews the sections in the outline.") if english else (
+                    f"Tulis hanya pembukaan (2-3 paragraf, tanpa heading) setelah judul \"# {title}\" "
+                    f"yang memperkenalkan bagian-bagian dalam struktur.")
+        elif part == 'conclusion':
+            task = (f"Write only the \"## {heading}\" section: key takeaways from every section in the outline "
+                    f"and concrete action steps.") if english else (
+                    f"Tulis hanya bagian \"## {heading}\": rangkuman dari setiap bagian dalam struktur "
+                    f"dan langkah tindak lanjut yang konkret.")
+        else:
+            sub_lines = '\n'.join(f"### {sub}" for sub in subheadings)
+            min_words, max_words = word_range
+            task = (f"Write only the \"## {heading}\" section ({min_words}-{max_words} words) with exactly these H3 "
+                    f"subsections:\n{sub_lines}\nEach H3 needs bullet points using varied symbols (•, ◦, →, ✓). "
+                    f"Do not repeat material that belongs to other sections.") if english else (
+                    f"Tulis hanya bagian \"## {heading}\" ({min_words}-{max_words} kata) dengan H3 berikut:\n{sub_lines}\n"
+                    f"Setiap H3 wajib memakai bullet points dengan simbol bervariasi (•, ◦, →, ✓). "
+                    f"Jangan mengulang materi milik bagian lain.")
+        
+        if english:
+            return f"""You are writing one part of a professional SEO article titled "{title}".
+
+FULL ARTICLE OUTLINE (for context):
+{outline}
+
+TASK:
+{task}
+
+REQUIREMENTS:
+- Start directly with the content{'' if part == 'intro' else f' beginning with "## {heading}"'}
+- **Bold** keywords naturally
+- Professional tone with examples
+- Output markdown only, no commentary"""
+        
+        return f"""Anda menulis satu bagian dari artikel SEO profesional berjudul "{title}".
+
+STRUKTUR LENGKAP ARTIKEL (sebagai konteks):
+{outline}
+
+TUGAS:
+{task}
+
+PERSYARATAN:
+- Langsung mulai dengan konten{'' if part == 'intro' else f' diawali "## {heading}"'}
+- **Bold** keyword secara natural
+- Tone profesional dengan contoh
+- Output hanya markdown, tanpa komentar"""
+    
+    def _normalize_section(self, text, heading=None):
+        """Strip stray H1 titles and make sure a section starts with its H2"""
+        lines = [line for line in text.strip().split('\n') if not line.startswith('# ')]
+        while lines and not lines[0].strip():
+            lines.pop(0)
+        if heading and (not lines or not lines[0].startswith('## ')):
+            lines.insert(0, f"## {heading}")
+            lines.insert(1, '')
+        return '\n'.join(lines).strip()
+    
+    def _article_parts(self, title):
+        """Outline parts in article order: (kind, heading, subheadings), kind being 'intro', 'section' or 'conclusion'"""
+        outline = self._get_outline(self.language)
+        parts = [('intro', None, None)]
+        parts.extend(('section', heading.format(title=title), subheadings) for heading, subheadings in outline['sections'])
+        parts.append(('conclusion', outline['conclusion'][0], None))
+        return parts
+    
+    def _section_word_range(self):
+        """(min, max) words asked for each H2 section"""
+        sections = len(self._get_outline(self.language)['sections'])
+        min_words = self.config.get_int('min_word_count', 5000)
+        max_words = self.config.get_int('max_word_count', 8000)
+        return max(min_words // sections, 200), max(max_words // sections, 300)
+    
+    def _part_prompt(self, title, part, word_range):
+        kind, heading, subheadings = part
+        return self._build_section_prompt(title, kind, heading, subheadings, word_range if kind == 'section' else None)
+    
+    def iter_sectioned_lines(self, subject, use_cache=True):
+        """Generate intro, each H2 section and conclusion as concurrent requests
+        
+        Yields the stitched article line by line in outline order; each part is
+        emitted as soon as it and every part before it have finished.
+        """
+        title = subject.strip()
+        parts = self._article_parts(title)
+        word_range = self._section_word_range()
+        
+        max_workers = max(1, self.config.get_int('section_concurrency', 4))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="section") as executor:
+            futures = [executor.submit(self.gemini_request, self._part_prompt(title, part, word_range), use_cache=use_cache)
+                       for part in parts]
+            try:
+                yield f"# {title}"
+                yield ""
+                for (kind, heading, _), future in zip(parts, futures):
+                    text = future.result()
+                    for line in self._normalize_section(text, heading).split('\n'):
+                        yield line
+                    yield ""
+            finally:
+                for future in futures:
+                    future.cancel()
+    
+    def _build_article_prompt(self, subject):
+        """Build the generation prompt with the fixed H2/H3 outline"""
         title = subject.strip()
         domain = self.config.get('domain', 'example.com')
         language = self.config.get('language', 'Indonesian') or 'Indonesian'
@@ -671,6 +1528,7 @@ class SimpleSEOGenerator:
         # Generate keyword variations for better SEO targeting
         keyword_variations = self._generate_keyword_variations(title) if title else []
         related_keywords = self._extract_keywords_from_subject(subject)
+        structure = self._format_outline(self._get_outline(language), title)
         
         if language.lower() == 'english':
             prompt = f"""Write a professional SEO article for: "{title}"
@@ -682,45 +1540,7 @@ SPECIFICATIONS:
 - Keywords: {', '.join(keyword_variations[:3])}
 
 STRUCTURE:
-# {title}
-
-## Understanding {title}
-### Core Concepts and Fundamentals
-### Key Benefits and Applications
-### Industry Context
-
-## Complete {title} Guide
-### Step-by-Step Implementation
-### Best Practices and Standards
-### Essential Requirements
-
-## Advanced {title} Strategies
-### Professional Techniques
-### Expert Methods
-### Optimization Tips
-
-## Tools and Resources
-### Essential Platforms
-### Recommended Solutions
-### Implementation Tools
-
-## Common Challenges
-### Typical Issues and Solutions
-### Problem Prevention
-### Troubleshooting Guide
-
-## Implementation Results
-### Success Metrics
-### Case Studies
-### ROI Optimization
-
-## Future Outlook
-### Emerging Trends
-### Technology Impact
-### Strategic Planning
-
-## Conclusion
-[Key takeaways and action steps]
+{structure}
 
 REQUIREMENTS:
 - Each H2: 300-400 words with practical insights
@@ -741,45 +1561,7 @@ SPESIFIKASI:
 - Keywords: {', '.join(keyword_variations[:3])}
 
 STRUKTUR:
-# {title}
-
-## Memahami {title}
-### Konsep Dasar dan Fundamental
-### Manfaat Utama dan Aplikasi
-### Konteks Industri
-
-## Panduan Lengkap {title}
-### Implementasi Step-by-Step
-### Best Practices dan Standar
-### Persyaratan Penting
-
-## Strategi Advanced {title}
-### Teknik Profesional
-### Metode Expert
-### Tips Optimasi
-
-## Tools dan Resources
-### Platform Essential
-### Solusi Terpercaya
-### Tools Implementasi
-
-## Tantangan Umum
-### Masalah Tipikal dan Solusi
-### Pencegahan Masalah
-### Panduan Troubleshooting
-
-## Implementasi dan Hasil
-### Metrik Kesuksesan
-### Studi Kasus
-### Optimasi ROI
-
-## Outlook Masa Depan
-### Tren yang Muncul
-### Dampak Teknologi
-### Perencanaan Strategis
-
-## Kesimpulan
-[Rangkuman dan langkah tindak lanjut]
+{structure}
 
 PERSYARATAN:
 - Setiap H2: 300-400 kata dengan insight praktis
@@ -791,32 +1573,19 @@ PERSYARATAN:
 
 Tulis artikel lengkap:"""
         
-        content = self.gemini_request(prompt)
-        
-        if content.startswith("Error") or content.startswith("Failed"):
-            return None
-        
-        # Enhance content with keyword formatting and natural language improvements
-        content = self.enhance_content_with_formatting(content, subject)
-        
-        # Add strategic image placeholders
-        content = self.add_strategic_images(content, subject)
-        
-        # Generate categories for internal linking
-        categories = self.generate_categories(subject)
-        
-        # Add internal links to related articles
-        content = self.add_internal_links(content, subject, categories)
-        
-        return content
+        return prompt
     
     def add_strategic_images(self, content, subject):
         """Add external images without downloading to optimize performance"""
+        document = MarkdownDocument.parse(content)
+        self._insert_strategic_images(document, subject)
+        return document.to_markdown()
+    
+    def _insert_strategic_images(self, document, subject):
         if not self.config.get_bool('enable_auto_images', True):
-            return content
-            
-        lines = content.split('\n')
-        new_lines = []
+            return
+        
+        blocks = []
         image_count = 0
         max_images = self.config.get_int('images_per_article', 2)
         
@@ -833,60 +1602,83 @@ Tulis artikel lengkap:"""
         ]
         
         # Add images at strategic positions
-        for i, line in enumerate(lines):
-            new_lines.append(line)
+        for block in document.blocks:
+            blocks.append(block)
             
-            if line.startswith('## ') and image_count < max_images:
-                heading = line[3:].strip().lower()
+            if block.kind == 'heading' and block.level == 2 and image_count < max_images:
+                heading = block.heading_text.lower()
                 # Skip conclusion-type headings
                 if not any(skip in heading for skip in ['conclusion', 'kesimpulan', 'action', 'outlook']):
                     # Use external image URL
                     image_url = external_image_sources[image_count % len(external_image_sources)]
                     alt_text = f"{subject} - professional guide"
                     
-                    new_lines.append('')
-                    new_lines.append(f'![{alt_text}]({image_url})')
-                    new_lines.append('')
+                    blocks.extend(Block(line) for line in ('', f'![{alt_text}]({image_url})', ''))
                     image_count += 1
                     print(f"Added external image: {image_url}")
-                    
-                    # Break early if we have enough images
-                    if image_count >= max_images:
-                        break
+        document.blocks = blocks
         
         # Add one featured image at the beginning if no images were added
         if image_count == 0:
             featured_image = external_image_sources[0]
             alt_text = f"{subject} - complete guide"
-            new_lines.insert(10, '')
-            new_lines.insert(11, f'![{alt_text}]({featured_image})')
-            new_lines.insert(12, '')
+            document.insert(10, ['', f'![{alt_text}]({featured_image})', ''])
             image_count += 1
             print(f"Added featured image: {featured_image}")
         
         print(f"Total external images added: {image_count}")
-        return '\n'.join(new_lines)
+    
+    def extract_title(self, content, subject):
+        """Use the article's H1 as title, falling back to the subject; content may be a MarkdownDocument"""
+        return MarkdownDocument.coerce(content).title() or subject
     
     def create_markdown_post(self, title, content, subject):
         """Create markdown post with frontmatter"""
+        filename, post_content = self.build_markdown_post(title, content, subject)
+        artifact = self.artifact_store.put(self.repo_name, subject, post_content, filename, LOCAL)
+        filepath = os.path.join(OUTPUT_FOLDER, filename)
+        
+        with open(filepath, 'w', encoding='utf-8') as file:
+            file.write(post_content)
+        self.artifact_store.mark(self.repo_name, subject, artifact['digest'], 'published', filepath)
+        
+        print(f"✅ Artikel berhasil dibuat: {filename}")
+        return filename
+    
+    def write_stored_post(self, subject, artifact):
+        """Write a post from the artifact store and record its link"""
+        filepath = os.path.join(OUTPUT_FOLDER, artifact['filename'])
+        with open(filepath, 'w', encoding='utf-8') as file:
+            file.write(self.artifact_store.read(artifact['digest']))
+        self.save_article_link(
+            subject, artifact['title'], slugify(artifact['title'])[:50], self.generate_categories(subject),
+            self.artifact_store.read_body(artifact['digest'])
+        )
+        self.artifact_store.mark(self.repo_name, subject, artifact['digest'], 'published', filepath)
+        print(f"✅ Artikel dari artifact store ditulis: {artifact['filename']}")
+        return artifact['filename']
+    
+    def build_markdown_post(self, title, content, subject):
+        """Build (filename, markdown with frontmatter) without touching the filesystem
+        
+        `content` may be markdown text or a MarkdownDocument; the document is
+        serialized only here.
+        """
+        document = MarkdownDocument.coerce(content)
         date = datetime.datetime.now()
         slug = slugify(title)[:50]
         filename = f"{date.strftime('%Y-%m-%d')}-{slug}.md"
-        filepath = os.path.join(OUTPUT_FOLDER, filename)
         
         # Extract excerpt from content
-        lines = content.split('\n')
-        excerpt = ""
-        for line in lines:
-            if line.strip() and not line.startswith('#'):
-                excerpt = line.strip()[:150] + "..."
-                break
+        excerpt = document.first_paragraph()
+        if excerpt:
+            excerpt = excerpt[:150] + "..."
         
         # Generate categories
         categories = self.generate_categories(subject)
         
         # Generate tags
-        tags = self.generate_tags(content)
+        tags = self.generate_tags(document, subject)
         
         # Enhanced frontmatter
         frontmatter_data = {
@@ -906,82 +1698,103 @@ Tulis artikel lengkap:"""
         post_content = f"""---
 {yaml.dump(frontmatter_data, default_flow_style=False, allow_unicode=True)}---
 
-{content}
+{document.to_markdown()}
 """
         
-        with open(filepath, 'w', encoding='utf-8') as file:
-            file.write(post_content)
-        
-        print(f"✅ Artikel berhasil dibuat: {filename}")
-        return filename
+        return filename, post_content
     
-    def generate_categories(self, subject):
-        """Generate categories based on subject"""
+    def _build_category_matcher(self):
+        """One matcher for all categories: base category prefixes plus vocabulary/*/categories.txt"""
         base_categories_str = self.config.get('base_categories', 'Teknologi')
         if base_categories_str:
-            base_categories = [cat.strip() for cat in base_categories_str.split(',') if cat.strip()]
+            self.base_categories = [cat.strip() for cat in base_categories_str.split(',') if cat.strip()]
         else:
-            base_categories = ['Teknologi']
-        
-        # Simple keyword matching for categories
-        subject_lower = subject.lower()
-        matched_categories = []
-        
-        for category in base_categories:
-            if any(keyword in subject_lower for keyword in [category.lower()[:3]]):
-                matched_categories.append(category.strip())
+            self.base_categories = ['Teknologi']
+        
+        matcher = TermMatcher()
+        # A base category matches on its first three letters
+        for category in self.base_categories:
+            matcher.add(category.lower()[:3])
+        self.category_vocabulary = self.vocabulary('categories')
+        for term in self.category_vocabulary.ranks:
+            matcher.add(term)
+        return matcher.build()
+    
+    def generate_categories(self, subject):
+        """Generate categories based on subject"""
+        found = self.category_matcher.find(subject)
+        matched_categories = [cat for cat in self.base_categories if cat.lower()[:3] in found]
+        for term in found:
+            category = self.category_vocabulary.values.get(term)
+            if category and category not in matched_categories:
+                matched_categories.append(category)
         
         if not matched_categories:
-            matched_categories = [base_categories[0]]
+            matched_categories = [self.base_categories[0]]
         
         return matched_categories[:2]
     
-    def generate_tags(self, content):
-        """Generate tags from content"""
-        # Simple tag extraction based on common Indonesian business terms
-        common_tags = [
-            'bisnis', 'teknologi', 'keuangan', 'marketing', 'strategi',
-            'tips', 'panduan', 'tutorial', 'analisis', 'tren'
-        ]
-        
-        content_lower = content.lower()
-        found_tags = []
-        
-        for tag in common_tags:
-            if tag in content_lower:
-                found_tags.append(tag)
-        
-        return found_tags[:5]
+    def generate_tags(self, content, subject=None):
+        """Generate tags from content (markdown text or a MarkdownDocument)
+        
+        With a subject the article is also added to the repo's tag statistics
+        (once per subject), so later articles are scored against it.
+        """
+        if isinstance(content, MarkdownDocument):
+            content = content.texts()
+        elif content:
+            content = content.split('\n')
+        if self.tag_extractor:
+            return self.tag_extractor.extract(content or [], key=subject)
+        # Tag vocabulary, Indonesian business terms by default; first five in vocabulary order
+        return self.vocabulary('tags').find(content or '', limit=self.config.get_int('max_tags', 5))
     
     def load_subjects(self):
         """Load subjects from file"""
-        if not os.path.exists(SUBJECTS_FILE):
-            print(f"File {SUBJECTS_FILE} tidak ditemukan!")
+        if not os.path.exists(self.subjects_file):
+            print(f"File {self.subjects_file} tidak ditemukan!")
             return []
         
-        with open(SUBJECTS_FILE, 'r', encoding='utf-8') as file:
+        with open(self.subjects_file, 'r', encoding='utf-8') as file:
             subjects = [line.strip() for line in file if line.strip()]
         
         return subjects
     
+    def use_app_queue(self):
+        """Take subjects from the app's queue for this repo (keywords/<repo>.txt)
+        
+        Posts written here are not uploaded, so they are recorded as
+        written_local: the app still treats them as pending and uploads its
+        own, while this generator skips them.
+        """
+        self.subjects_file = os.path.join('keywords', f"{self.repo_name}.txt")
+        self.local_status = LOCAL_STATUS
+        self.work_queue.skip_statuses = (LOCAL_STATUS,)
+    
+    def lease_subjects(self, limit=None, visibility_timeout=None):
+        """Lease unprocessed subjects from the work queue, after syncing the subjects file"""
+        if not os.path.exists(self.subjects_file):
+            print(f"File {self.subjects_file} tidak ditemukan!")
+            return []
+        self.load_processed_subjects()
+        self.state_store.sync_keywords(self.repo_name, self.subjects_file)
+        subjects = self.work_queue.lease(limit, visibility_timeout)
+        if not subjects:
+            counts = self.state_store.keyword_counts(self.repo_name)
+            if counts['pending']:
+                print(f"⏳ {counts['pending']} subjects pending, semuanya sedang diproses worker lain atau menunggu retry")
+            else:
+                print("✅ Semua subjects sudah diproses!")
+        return subjects
+    
     def load_processed_subjects(self):
         """Load processed subjects"""
-        if not os.path.exists(PROCESSED_SUBJECTS_FILE):
-            return []
-        
-        try:
-            with open(PROCESSED_SUBJECTS_FILE, 'r', encoding='utf-8') as file:
-                return json.load(file)
-        except:
-            return []
+        self.state_store.import_processed_file(self.repo_name, PROCESSED_SUBJECTS_FILE)
+        return self.state_store.processed_subjects(self.repo_name)
     
-    def save_processed_subject(self, subject):
+    def save_processed_subject(self, subject, status='published', detail=None):
         """Save processed subject"""
-        processed = self.load_processed_subjects()
-        if subject not in processed:
-            processed.append(subject)
-            with open(PROCESSED_SUBJECTS_FILE, 'w', encoding='utf-8') as file:
-                json.dump(processed, file, ensure_ascii=False, indent=2)
+        self.state_store.mark_processed(self.repo_name, subject, status, detail)
     
     def run_generation(self):
         """Run the enhanced article generation process"""
@@ -989,33 +1802,33 @@ Tulis artikel lengkap:"""
         print(f"📝 Target artikel per run: {self.config.get_int('articles_per_run', 2)}")
         print(f"🖼️  Target gambar per artikel: {self.config.get_int('images_per_article', 5)}")
         
-        subjects = self.load_subjects()
+        articles_per_run = self.config.get_int('articles_per_run', 2)
+        subjects = self.lease_subjects(articles_per_run)
         if not subjects:
-            print("❌ Tidak ada subjects untuk diproses!")
-            return
-        
-        processed_subjects = self.load_processed_subjects()
-        unprocessed_subjects = [s for s in subjects if s not in processed_subjects]
-        
-        if not unprocessed_subjects:
-            print("✅ Semua subjects sudah diproses!")
             return
         
-        articles_per_run = self.config.get_int('articles_per_run', 2)
         generated_count = 0
         
-        for subject in unprocessed_subjects[:articles_per_run]:
+        for subject in subjects:
             try:
+                stored = self.artifact_store.latest(self.repo_name, subject, LOCAL)
+                if stored:
+                    # Built by an earlier run that did not finish: write the stored post, do not generate again
+                    self.write_stored_post(subject, stored)
+                    self.work_queue.ack(subject, self.local_status)
+                    generated_count += 1
+                    continue
+                
                 print(f"\n🔄 Membuat artikel untuk: {subject}")
                 
-                content = self.generate_enhanced_article(subject)
+                content = self.generate_article_document(subject)
                 if not content:
                     print(f"❌ Gagal membuat artikel untuk: {subject}")
+                    self.work_queue.nack(subject, "Gagal membuat artikel")
                     continue
                 
                 # Extract title from content or use subject
-                title_match = re.search(r'^# (.+)$', content, re.MULTILINE)
-                title = title_match.group(1) if title_match else subject
+                title = self.extract_title(content, subject)
                 
                 # Generate categories and slug for linking
                 categories = self.generate_categories(subject)
@@ -1025,10 +1838,10 @@ Tulis artikel lengkap:"""
                 filename = self.create_markdown_post(title, content, subject)
                 
                 # Save article link for future internal linking
-                self.save_article_link(subject, title, slug, categories)
+                self.save_article_link(subject, title, slug, categories, content)
                 
-                # Mark as processed
-                self.save_processed_subject(subject)
+                # Mark as processed (releases the lease)
+                self.work_queue.ack(subject, self.local_status)
                 
                 generated_count += 1
                 print(f"✅ Artikel lengkap berhasil dibuat: {filename}")
@@ -1038,15 +1851,74 @@ Tulis artikel lengkap:"""
                 
             except Exception as e:
                 print(f"❌ Error memproses subject '{subject}': {str(e)}")
+                self.work_queue.nack(subject, f"Error: {str(e)}")
                 continue
         
         print(f"\n✅ Proses selesai! Total artikel dibuat: {generated_count}")
+    
+    def run_bulk_generation(self):
+        """Generate every unprocessed subject through a single Batch API job"""
+        print("📦 Memulai bulk generation via Batch API...")
+        
+        # A batch job can take hours; its subjects are leased for the whole job
+        unprocessed_subjects = self.lease_subjects(
+            visibility_timeout=self.config.get_int('queue_bulk_visibility_timeout', 86400)
+        )
+        if not unprocessed_subjects:
+            return
+        
+        generated_count = 0
+        # Subjects built by an earlier run are written from the artifact store, not submitted again
+        remaining_subjects = []
+        for subject in unprocessed_subjects:
+            stored = self.artifact_store.latest(self.repo_name, subject, LOCAL)
+            if stored:
+                self.write_stored_post(subject, stored)
+                self.work_queue.ack(subject, self.local_status)
+                generated_count += 1
+            else:
+                remaining_subjects.append(subject)
+        
+        results = self.iter_bulk_articles(
+            remaining_subjects,
+            status_callback=lambda state: print(f"⏳ Status batch: {state}")
+        )
+        for subject, content, error in results:
+            if error:
+                print(f"❌ Gagal membuat artikel untuk: {subject} ({error})")
+                self.work_queue.nack(subject, f"Error: {error}")
+                continue
+            try:
+                title = self.extract_title(content, subject)
+                self.create_markdown_post(title, content, subject)
+                self.save_article_link(subject, title, slugify(title)[:50], self.generate_categories(subject), content)
+                self.work_queue.ack(subject, self.local_status)
+                generated_count += 1
+            except Exception as e:
+                print(f"❌ Error memproses subject '{subject}': {str(e)}")
+                self.work_queue.nack(subject, f"Error: {str(e)}")
+        
+        print(f"\n✅ Bulk generation selesai! Total artikel dibuat: {generated_count}")
 
 def main():
-    """Main function"""
+    """Main function
+
+    Several generators may run at once (also next to the app): each leases
+    its own subjects. --repo NAME works on the app's keywords/NAME.txt queue;
+    posts written locally stay pending there until the app uploads them.
+    """
+    parser = argparse.ArgumentParser(description="Simple SEO Article Generator")
+    parser.add_argument('--bulk', action='store_true', help="generate every pending subject via the Batch API")
+    parser.add_argument('--repo', help="repo whose keyword queue to work on (default: KEYWORD.txt)")
+    args = parser.parse_args()
     try:
-        generator = SimpleSEOGenerator()
-        generator.run_generation()
+        generator = SimpleSEOGenerator(repo_name=args.repo)
+        if args.repo:
+            generator.use_app_queue()
+        if args.bulk:
+            generator.run_bulk_generation()
+        else:
+            generator.run_generation()
     except KeyboardInterrupt:
         print("\n⏸️  Proses dibatalkan oleh user")
     except Exception as e:
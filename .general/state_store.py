@@ -0,0 +1,773 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Embedded SQLite state store for keywords, processed subjects and article links
+
+Per-article bookkeeping used to reread and rewrite whole JSON files; here
+each article is one indexed row write. The database runs in WAL mode, so
+the Streamlit app and the command line generator can share it.
+
+- keywords: mirror of each repo's keyword file in file order. The file stays
+  the editable source and is read again only when its size or mtime changes:
+  from the stored byte offset when it was only appended to (checked by the
+  crc32 of the part already read), in full otherwise.
+- keyword_state: per repo counters (total, done) kept up to date on every
+  write, and a cursor before which every keyword is done, so "next N
+  pending" starts where the previous lookup stopped instead of at line one.
+- processed: one row per (repo, subject) with status (published, skipped,
+  failed, dead, written_local), detail and timestamp. Subjects count as done
+  when published, skipped or dead (given up after too many attempts, see
+  requeue_dead). written_local marks a post the command line generator only
+  wrote to a local folder: still pending for the app, which uploads it.
+- leases: the work queue over pending keywords (see work_queue.WorkQueue).
+  A lease names its owner and expiry; a keyword whose lease expired is
+  handed out again, and one that failed waits out a retry delay first.
+- article_links: metadata for internal linking, in first-save order.
+- artifacts: index of generated posts kept by artifact_store.ArtifactStore,
+  by repo, keyword, destination (github, local) and state (generated,
+  published, failed, skipped).
+
+The legacy JSON files are imported once (tracked in the meta table) and left
+in place. Run this module to import them up front:
+
+    python .general/state_store.py --db data/state.db --data-dir data --keywords-dir keywords
+"""
+
+import os
+import json
+import glob
+import zlib
+import sqlite3
+import argparse
+import datetime
+import time
+import threading
+from contextlib import contextmanager
+
+STATE_DB = "data/state.db"
+DEAD_STATUS = 'dead'
+# Finished with an article (or a deliberate skip); dead is done too, but nothing was published
+COMPLETED_STATUSES = ('published', 'skipped')
+DONE_STATUSES = COMPLETED_STATUSES + (DEAD_STATUS,)
+LOCAL_STATUS = 'written_local'
+# Fixed status names, inlined into the queries below
+DONE_SQL = ', '.join(f"'{status}'" for status in DONE_STATUSES)
+PENDING_CONDITION = f"""NOT EXISTS (
+    SELECT 1 FROM processed AS p
+    WHERE p.repo = k.repo AND p.subject = k.keyword AND p.status IN ({DONE_SQL})
+)"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    UNIQUE (repo, keyword)
+);
+CREATE INDEX IF NOT EXISTS keywords_position ON keywords (repo, position);
+CREATE TABLE IF NOT EXISTS keyword_state (
+    repo TEXT PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    cursor INTEGER NOT NULL DEFAULT 0,
+    next_position INTEGER NOT NULL DEFAULT 0,
+    file_stamp TEXT,
+    file_offset INTEGER NOT NULL DEFAULT 0,
+    file_crc INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS processed (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    status TEXT NOT NULL,
+    detail TEXT,
+    processed_at TEXT NOT NULL,
+    UNIQUE (repo, subject)
+);
+CREATE INDEX IF NOT EXISTS processed_status ON processed (repo, status);
+CREATE TABLE IF NOT EXISTS leases (
+    repo TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    owner TEXT,
+    expires_at REAL NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (repo, keyword)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    keyword TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    destination TEXT NOT NULL DEFAULT 'github',
+    filename TEXT NOT NULL,
+    title TEXT NOT NULL,
+    front_matter TEXT NOT NULL,
+    images TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    detail TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    UNIQUE (repo, keyword, digest)
+);
+CREATE INDEX IF NOT EXISTS artifacts_state ON artifacts (repo, state);
+CREATE TABLE IF NOT EXISTS article_links (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    categories TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    saved_at TEXT NOT NULL
+);
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec='seconds')
+
+
+def _file_stamp(path):
+    """Size and mtime of a file, or None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def _prefix_crc(file, length):
+    """crc32 of the first `length` bytes of a binary file"""
+    file.seek(0)
+    crc = 0
+    while length > 0:
+        chunk = file.read(min(length, 1 << 20))
+        if not chunk:
+            return None
+        crc = zlib.crc32(chunk, crc)
+        length -= len(chunk)
+    return crc
+
+
+class _LineReader:
+    """Decoded lines of a binary file, tracking offset and crc32 up to the last complete line"""
+
+    def __init__(self, file, offset, crc):
+        self.file = file
+        self.offset = offset
+        self.crc = crc
+        self.partial = False
+
+    def __iter__(self):
+        for raw in self.file:
+            # An unterminated last line may still grow; it is read again next time
+            if raw.endswith(b'\n'):
+                self.offset += len(raw)
+                self.crc = zlib.crc32(raw, self.crc)
+            else:
+                self.partial = bool(raw.strip())
+            yield raw.decode('utf-8', errors='replace')
+
+
+class StateStore:
+    """Keywords, processed subjects and article links in one SQLite database"""
+
+    def __init__(self, path=STATE_DB):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by the threads of a process, serialized by the lock
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """Columns added after a table was first created"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(artifacts)")}
+        if 'destination' not in columns:
+            self._conn.execute("ALTER TABLE artifacts ADD COLUMN destination TEXT NOT NULL DEFAULT 'github'")
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction on the shared connection"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _write(self, statements):
+        """Run (sql, params) statements in one transaction"""
+        with self._transaction() as conn:
+            for sql, params in statements:
+                if isinstance(params, list):
+                    conn.executemany(sql, params)
+                else:
+                    conn.execute(sql, params)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def get_meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def _meta_statement(self, key, value):
+        return "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value", (key, value)
+
+    # Keywords -----------------------------------------------------------------
+
+    def _keyword_state(self, conn, repo):
+        """(total, done, cursor, next_position, file_stamp, file_offset, file_crc) of a repo (in a transaction)"""
+        conn.execute("INSERT OR IGNORE INTO keyword_state (repo) VALUES (?)", (repo,))
+        return conn.execute(
+            "SELECT total, done, cursor, next_position, file_stamp, file_offset, file_crc "
+            "FROM keyword_state WHERE repo = ?", (repo,)
+        ).fetchone()
+
+    def _insert_keywords(self, conn, repo, lines, position):
+        """Insert new keywords from `position` on; returns (inserted, inserted done, next position)"""
+        start = position
+
+        def rows():
+            nonlocal position
+            for line in lines:
+                keyword = line.strip()
+                if keyword:
+                    yield repo, keyword, position
+                    position += 1
+
+        changes = conn.total_changes
+        conn.executemany("INSERT OR IGNORE INTO keywords (repo, keyword, position) VALUES (?, ?, ?)", rows())
+        inserted = conn.total_changes - changes
+        pending = conn.execute(
+            f"SELECT COUNT(*) FROM keywords AS k WHERE k.repo = ? AND k.position >= ? AND {PENDING_CONDITION}",
+            (repo, start)
+        ).fetchone()[0]
+        return inserted, inserted - pending, position
+
+    def _reload_keywords(self, conn, repo, lines):
+        """Replace a repo's keywords (in a transaction); returns (total, done, next position)"""
+        conn.execute("DELETE FROM keywords WHERE repo = ?", (repo,))
+        return self._insert_keywords(conn, repo, lines, 0)
+
+    def replace_keywords(self, repo, keywords, path=None):
+        """Store a repo's keyword list in order; `path` is the file just written with it"""
+        with self._transaction() as conn:
+            self._keyword_state(conn, repo)
+            total, done, next_position = self._reload_keywords(conn, repo, keywords)
+            stamp, offset, crc = None, 0, 0
+            if path and os.path.exists(path):
+                stamp = _file_stamp(path)
+                with open(path, 'rb') as file:
+                    offset = int(stamp.split(':')[0])
+                    crc = _prefix_crc(file, offset)
+            conn.execute(
+                "UPDATE keyword_state SET total = ?, done = ?, cursor = 0, next_position = ?, "
+                "file_stamp = ?, file_offset = ?, file_crc = ? WHERE repo = ?",
+                (total, done, next_position, stamp, offset, crc, repo)
+            )
+        return total
+
+    def sync_keywords(self, repo, path):
+        """Mirror the keyword file if it changed since it was last read; True when it did
+
+        A file that only grew past the part read before (same crc32) is read
+        from the stored byte offset; any other change reloads it.
+        """
+        stamp = _file_stamp(path)
+        if stamp is None:
+            return False
+        with self._transaction() as conn:
+            total, done, cursor, next_position, file_stamp, offset, crc = self._keyword_state(conn, repo)
+            if stamp == file_stamp:
+                return False
+            with open(path, 'rb') as file:
+                if offset and int(stamp.split(':')[0]) >= offset and _prefix_crc(file, offset) == crc:
+                    # A keyword read from an unterminated last line is dropped and read again
+                    stale, stale_pending = conn.execute(
+                        f"SELECT COUNT(*), TOTAL({PENDING_CONDITION}) FROM keywords AS k "
+                        f"WHERE k.repo = ? AND k.position >= ?", (repo, next_position)
+                    ).fetchone()
+                    if stale:
+                        conn.execute("DELETE FROM keywords WHERE repo = ? AND position >= ?", (repo, next_position))
+                        total -= stale
+                        done -= stale - int(stale_pending)
+                        cursor = min(cursor, next_position)
+                    file.seek(offset)
+                    reader = _LineReader(file, offset, crc)
+                    inserted, inserted_done, next_position = self._insert_keywords(conn, repo, reader, next_position)
+                    total += inserted
+                    done += inserted_done
+                else:
+                    file.seek(0)
+                    reader = _LineReader(file, 0, 0)
+                    total, done, next_position = self._reload_keywords(conn, repo, reader)
+                    cursor = 0
+            if reader.partial:
+                next_position -= 1
+            conn.execute(
+                "UPDATE keyword_state SET total = ?, done = ?, cursor = ?, next_position = ?, "
+                "file_stamp = ?, file_offset = ?, file_crc = ? WHERE repo = ?",
+                (total, done, cursor, next_position, stamp, reader.offset, reader.crc, repo)
+            )
+        return True
+
+    def keywords(self, repo):
+        return [row[0] for row in self._query(
+            "SELECT keyword FROM keywords WHERE repo = ? ORDER BY position", (repo,)
+        )]
+
+    def pending_keywords(self, repo, limit=None):
+        """Keywords not yet published or skipped, in file order, read from the pending cursor"""
+        with self._transaction() as conn:
+            _, _, cursor, next_position, _, _, _ = self._keyword_state(conn, repo)
+            rows = conn.execute(
+                f"SELECT keyword, position FROM keywords AS k "
+                f"WHERE k.repo = ? AND k.position >= ? AND {PENDING_CONDITION} ORDER BY k.position LIMIT ?",
+                (repo, cursor, -1 if limit is None else limit)
+            ).fetchall()
+            # Everything before the first pending keyword is done
+            first_pending = rows[0][1] if rows else next_position
+            if first_pending != cursor:
+                conn.execute("UPDATE keyword_state SET cursor = ? WHERE repo = ?", (first_pending, repo))
+        return [row[0] for row in rows]
+
+    def keyword_counts(self, repo):
+        """{'total', 'processed', 'pending', 'leased', 'dead'} keyword counts
+
+        total and pending come from the maintained counters; dead counts the
+        listed keywords given up on and processed the other done ones
+        (published or skipped); leased counts unexpired leases.
+        """
+        rows = self._query("SELECT total, done FROM keyword_state WHERE repo = ?", (repo,))
+        total, done = rows[0] if rows else (0, 0)
+        leased = self._query(
+            "SELECT COUNT(*) FROM leases WHERE repo = ? AND owner IS NOT NULL AND expires_at > ?", (repo, time.time())
+        )[0][0]
+        dead = self._query(
+            "SELECT COUNT(*) FROM processed AS p JOIN keywords AS k ON k.repo = p.repo AND k.keyword = p.subject "
+            "WHERE p.repo = ? AND p.status = ?", (repo, DEAD_STATUS)
+        )[0][0]
+        return {'total': total, 'processed': done - dead, 'pending': total - done, 'leased': leased, 'dead': dead}
+
+    def _recount(self, conn, repo):
+        """Recompute a repo's done counter and reset its cursor after a bulk change (in a transaction)"""
+        self._keyword_state(conn, repo)
+        conn.execute(
+            f"UPDATE keyword_state SET cursor = 0, done = total - ("
+            f"SELECT COUNT(*) FROM keywords AS k WHERE k.repo = ? AND {PENDING_CONDITION}) WHERE repo = ?",
+            (repo, repo)
+        )
+
+    # Processed subjects -------------------------------------------------------
+
+    def mark_processed(self, repo, subject, status='published', detail=None):
+        """Record the outcome for a subject; a later outcome replaces the earlier one
+
+        A done status also drops the subject's lease (acknowledges it).
+        """
+        with self._transaction() as conn:
+            self._mark_processed(conn, repo, subject, status, detail)
+
+    def _mark_processed(self, conn, repo, subject, status, detail):
+        """mark_processed in a transaction"""
+        if status in DONE_STATUSES:
+            conn.execute("DELETE FROM leases WHERE repo = ? AND keyword = ?", (repo, subject))
+        previous = conn.execute(
+            "SELECT status FROM processed WHERE repo = ? AND subject = ?", (repo, subject)
+        ).fetchone()
+        conn.execute(
+            """INSERT INTO processed (repo, subject, status, detail, processed_at) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT (repo, subject) DO UPDATE SET
+                   status = excluded.status, detail = excluded.detail, processed_at = excluded.processed_at""",
+            (repo, subject, status, detail, _now())
+        )
+        was_done = previous is not None and previous[0] in DONE_STATUSES
+        is_done = status in DONE_STATUSES
+        if was_done == is_done:
+            return
+        keyword = conn.execute(
+            "SELECT position FROM keywords WHERE repo = ? AND keyword = ?", (repo, subject)
+        ).fetchone()
+        # Counters only cover subjects in the keyword list
+        if keyword and is_done:
+            conn.execute("UPDATE keyword_state SET done = done + 1 WHERE repo = ?", (repo,))
+        elif keyword:
+            # Pending again: the cursor must not be past it
+            conn.execute(
+                "UPDATE keyword_state SET done = done - 1, cursor = MIN(cursor, ?) WHERE repo = ?",
+                (keyword[0], repo)
+            )
+
+    def rename_processed(self, repo, renames):
+        """Move processed rows to new subject spellings, e.g. after keywords were normalized
+
+        `renames` is a list of (old, new). When both spellings have a row, a
+        done outcome wins over one that is not.
+        """
+        with self._transaction() as conn:
+            for old, new in renames:
+                rows = dict(conn.execute(
+                    "SELECT subject, status FROM processed WHERE repo = ? AND subject IN (?, ?)", (repo, old, new)
+                ).fetchall())
+                if old not in rows:
+                    continue
+                if new in rows:
+                    if rows[new] in DONE_STATUSES or rows[old] not in DONE_STATUSES:
+                        conn.execute("DELETE FROM processed WHERE repo = ? AND subject = ?", (repo, old))
+                        continue
+                    conn.execute("DELETE FROM processed WHERE repo = ? AND subject = ?", (repo, new))
+                conn.execute("UPDATE processed SET subject = ? WHERE repo = ? AND subject = ?", (new, repo, old))
+            self._recount(conn, repo)
+
+    def processed_subjects(self, repo, statuses=COMPLETED_STATUSES):
+        """Subjects with one of the given statuses, in first-processed order"""
+        placeholders = ', '.join('?' * len(statuses))
+        return [row[0] for row in self._query(
+            f"SELECT subject FROM processed WHERE repo = ? AND status IN ({placeholders}) ORDER BY id",
+            (repo, *statuses)
+        )]
+
+    def is_processed(self, repo, subject):
+        return bool(self._query(
+            f"SELECT 1 FROM processed WHERE repo = ? AND subject = ? AND status IN ({DONE_SQL})", (repo, subject)
+        ))
+
+    def recent_processed(self, repo, limit=5):
+        """Most recently published or skipped subjects, newest last"""
+        placeholders = ', '.join('?' * len(COMPLETED_STATUSES))
+        rows = self._query(
+            f"SELECT subject FROM processed WHERE repo = ? AND status IN ({placeholders}) "
+            f"ORDER BY processed_at DESC, id DESC LIMIT ?", (repo, *COMPLETED_STATUSES, limit)
+        )
+        return [row[0] for row in reversed(rows)]
+
+    def processed_records(self, repo):
+        """(subject, status, detail, processed_at) rows, in first-processed order"""
+        return self._query(
+            "SELECT subject, status, detail, processed_at FROM processed WHERE repo = ? ORDER BY id", (repo,)
+        )
+
+    # Work queue ---------------------------------------------------------------
+
+    def lease_keywords(self, repo, owner, limit, visibility_timeout, max_attempts, skip_statuses=()):
+        """Lease up to `limit` pending keywords (None: all) to `owner`, in file order
+
+        Keywords leased to someone else, waiting out a retry delay, or with
+        one of `skip_statuses`, are skipped. An expired lease that still has an owner is work lost with
+        its worker; after `max_attempts` such a keyword is dead-lettered
+        instead of being handed out again.
+        """
+        leased = []
+        skip_condition = ''
+        if skip_statuses:
+            skip_condition = (
+                f"AND NOT EXISTS (SELECT 1 FROM processed AS s WHERE s.repo = k.repo AND s.subject = k.keyword "
+                f"AND s.status IN ({', '.join('?' * len(skip_statuses))})) "
+            )
+        with self._transaction() as conn:
+            now = time.time()
+            _, _, position, _, _, _, _ = self._keyword_state(conn, repo)
+            while limit is None or len(leased) < limit:
+                wanted = 500 if limit is None else limit - len(leased)
+                rows = conn.execute(
+                    f"SELECT k.keyword, k.position, l.owner, l.attempts FROM keywords AS k "
+                    f"LEFT JOIN leases AS l ON l.repo = k.repo AND l.keyword = k.keyword "
+                    f"WHERE k.repo = ? AND k.position >= ? AND {PENDING_CONDITION} "
+                    f"AND (l.keyword IS NULL OR (l.expires_at <= ? AND l.available_at <= ?)) {skip_condition}"
+                    f"ORDER BY k.position LIMIT ?",
+                    (repo, position, now, now, *skip_statuses, wanted)
+                ).fetchall()
+                for keyword, _, holder, attempts in rows:
+                    if holder is not None and attempts >= max_attempts:
+                        self._mark_processed(
+                            conn, repo, keyword, DEAD_STATUS,
+                            f"lease kedaluwarsa setelah {attempts} percobaan (terakhir oleh {holder})"
+                        )
+                        continue
+                    self._take_lease(conn, repo, keyword, owner, now + visibility_timeout)
+                    leased.append(keyword)
+                if len(rows) < wanted:
+                    break
+                position = rows[-1][1] + 1
+        return leased
+
+    def claim_keyword(self, repo, keyword, owner, visibility_timeout):
+        """Lease one keyword to `owner`, or extend the lease it already holds
+
+        Returns False when the keyword is done or leased to someone else. A
+        retry delay does not apply: claiming is an explicit request for it.
+        """
+        with self._transaction() as conn:
+            now = time.time()
+            if conn.execute(
+                f"SELECT 1 FROM processed WHERE repo = ? AND subject = ? AND status IN ({DONE_SQL})", (repo, keyword)
+            ).fetchone():
+                return False
+            lease = conn.execute(
+                "SELECT owner, expires_at FROM leases WHERE repo = ? AND keyword = ?", (repo, keyword)
+            ).fetchone()
+            if lease and lease[0] == owner:
+                conn.execute(
+                    "UPDATE leases SET expires_at = ? WHERE repo = ? AND keyword = ?",
+                    (now + visibility_timeout, repo, keyword)
+                )
+                return True
+            if lease and lease[0] is not None and lease[1] > now:
+                return False
+            self._take_lease(conn, repo, keyword, owner, now + visibility_timeout)
+            return True
+
+    def _take_lease(self, conn, repo, keyword, owner, expires_at):
+        """Give a keyword a new lease, counting the attempt (in a transaction)"""
+        conn.execute(
+            """INSERT INTO leases (repo, keyword, owner, expires_at, available_at, attempts) VALUES (?, ?, ?, ?, 0, 1)
+               ON CONFLICT (repo, keyword) DO UPDATE SET
+                   owner = excluded.owner, expires_at = excluded.expires_at, attempts = attempts + 1""",
+            (repo, keyword, owner, expires_at)
+        )
+
+    def ack_keyword(self, repo, keyword, status='published', detail=None):
+        """Acknowledgement: record the outcome and drop the lease, whatever the status"""
+        with self._transaction() as conn:
+            self._mark_processed(conn, repo, keyword, status, detail)
+            conn.execute("DELETE FROM leases WHERE repo = ? AND keyword = ?", (repo, keyword))
+
+    def release_keyword(self, repo, keyword, owner, detail, retry_delay, max_attempts):
+        """Negative acknowledgement: record the failure and retry later, or dead-letter the keyword
+
+        The retry delay doubles with each attempt. Returns 'retry', 'dead' or
+        None when `owner` does not hold the lease (it expired and was taken).
+        """
+        with self._transaction() as conn:
+            lease = conn.execute(
+                "SELECT owner, attempts FROM leases WHERE repo = ? AND keyword = ?", (repo, keyword)
+            ).fetchone()
+            if lease is None or lease[0] != owner:
+                return None
+            attempts = lease[1]
+            if attempts >= max_attempts:
+                self._mark_processed(conn, repo, keyword, DEAD_STATUS, f"{detail} (menyerah setelah {attempts} percobaan)")
+                return 'dead'
+            self._mark_processed(conn, repo, keyword, 'failed', detail)
+            conn.execute(
+                "UPDATE leases SET owner = NULL, expires_at = 0, available_at = ? WHERE repo = ? AND keyword = ?",
+                (time.time() + retry_delay * 2 ** (attempts - 1), repo, keyword)
+            )
+            return 'retry'
+
+    def requeue_dead(self, repo):
+        """Put dead-lettered keywords back in the queue with fresh attempts; returns how many"""
+        with self._transaction() as conn:
+            subjects = [row[0] for row in conn.execute(
+                "SELECT subject FROM processed WHERE repo = ? AND status = ?", (repo, DEAD_STATUS)
+            )]
+            conn.execute(
+                "UPDATE processed SET status = 'failed' WHERE repo = ? AND status = ?", (repo, DEAD_STATUS)
+            )
+            conn.executemany(
+                "DELETE FROM leases WHERE repo = ? AND keyword = ?", [(repo, subject) for subject in subjects]
+            )
+            self._recount(conn, repo)
+        return len(subjects)
+
+    # Article links ------------------------------------------------------------
+
+    def save_article_link(self, subject, data):
+        """Insert or update link metadata; an updated subject keeps its original position"""
+        self._write([(
+            """INSERT INTO article_links (subject, title, slug, categories, keywords, saved_at) VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (subject) DO UPDATE SET
+                   title = excluded.title, slug = excluded.slug, categories = excluded.categories,
+                   keywords = excluded.keywords, saved_at = excluded.saved_at""",
+            self._link_row(subject, data)
+        )])
+
+    @staticmethod
+    def _link_row(subject, data):
+        return (
+            subject,
+            data.get('title', ''),
+            data.get('slug', ''),
+            json.dumps(data.get('categories', []), ensure_ascii=False),
+            json.dumps(data.get('keywords', []), ensure_ascii=False),
+            _now()
+        )
+
+    def article_links(self):
+        """subject -> {title, slug, categories, keywords}, in first-save order"""
+        return {
+            subject: {
+                'title': title,
+                'slug': slug,
+                'categories': json.loads(categories),
+                'keywords': json.loads(keywords)
+            }
+            for subject, title, slug, categories, keywords in self._query(
+                "SELECT subject, title, slug, categories, keywords FROM article_links ORDER BY id"
+            )
+        }
+
+    # Artifacts ----------------------------------------------------------------
+
+    def save_artifact(self, repo, keyword, digest, destination, filename, title, front_matter, images, size):
+        """Index a stored post as 'generated'; storing the same post again keeps a published state"""
+        now = _now()
+        self._write([(
+            """INSERT INTO artifacts (repo, keyword, digest, destination, filename, title, front_matter, images, size,
+                                     state, created_at, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'generated', ?, ?)
+               ON CONFLICT (repo, keyword, digest) DO UPDATE SET
+                   state = CASE WHEN state = 'published' THEN state ELSE 'generated' END,
+                   detail = NULL, updated_at = excluded.updated_at""",
+            (repo, keyword, digest, destination, filename, title,
+             json.dumps(front_matter, ensure_ascii=False, default=str),
+             json.dumps(images, ensure_ascii=False), size, now, now)
+        )])
+
+    def set_artifact_state(self, repo, keyword, digest, state, detail=None):
+        self._write([(
+            "UPDATE artifacts SET state = ?, detail = ?, updated_at = ? WHERE repo = ? AND keyword = ? AND digest = ?",
+            (state, detail, _now(), repo, keyword, digest)
+        )])
+
+    def artifacts(self, repo, keyword=None, digest=None, destination=None, states=None, newest_only=False, limit=None):
+        """Indexed artifacts of a repo, newest first
+
+        Filters by keyword, digest, destination and states; with newest_only a
+        keyword's artifact is only listed when no later artifact of it exists
+        (for the same destination).
+        """
+        conditions, params = ["a.repo = ?"], [repo]
+        if keyword is not None:
+            conditions.append("a.keyword = ?")
+            params.append(keyword)
+        if digest is not None:
+            conditions.append("a.digest = ?")
+            params.append(digest)
+        if destination is not None:
+            conditions.append("a.destination = ?")
+            params.append(destination)
+        if states:
+            conditions.append(f"a.state IN ({', '.join('?' * len(states))})")
+            params.extend(states)
+        if newest_only:
+            conditions.append(
+                "NOT EXISTS (SELECT 1 FROM artifacts AS n WHERE n.repo = a.repo AND n.keyword = a.keyword "
+                "AND n.destination = a.destination AND n.id > a.id)"
+            )
+        rows = self._query(
+            f"SELECT a.repo, a.keyword, a.digest, a.destination, a.filename, a.title, a.front_matter, a.images, a.size, a.state, "
+            f"a.detail, a.created_at, a.updated_at FROM artifacts AS a WHERE {' AND '.join(conditions)} "
+            f"ORDER BY a.id DESC LIMIT ?",
+            (*params, -1 if limit is None else limit)
+        )
+        columns = ('repo', 'keyword', 'digest', 'destination', 'filename', 'title', 'front_matter', 'images', 'size',
+                   'state', 'detail', 'created_at', 'updated_at')
+        artifacts = []
+        for row in rows:
+            artifact = dict(zip(columns, row))
+            artifact['front_matter'] = json.loads(artifact['front_matter'])
+            artifact['images'] = json.loads(artifact['images'])
+            artifacts.append(artifact)
+        return artifacts
+
+    def artifact_counts(self, repo):
+        """state -> number of artifacts"""
+        return dict(self._query("SELECT state, COUNT(*) FROM artifacts WHERE repo = ? GROUP BY state", (repo,)))
+
+    # Legacy import ------------------------------------------------------------
+
+    def _read_legacy_json(self, path):
+        """Contents of a legacy JSON file, or None if it is missing, already imported or unreadable"""
+        if not os.path.exists(path) or self.get_meta(f"imported:{os.path.abspath(path)}"):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            # Not marked as imported: a repaired file is picked up next time
+            print(f"⚠️ Gagal membaca {path}, tidak diimpor: {e}")
+            return None
+
+    def import_processed_file(self, repo, path):
+        """One-time import of a `*_processed_subjects.json` list; returns the number of subjects read"""
+        subjects = self._read_legacy_json(path)
+        if subjects is None:
+            return 0
+        stamp = datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+        rows = [(repo, subject, 'published', 'imported', stamp) for subject in dict.fromkeys(subjects)]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO processed (repo, subject, status, detail, processed_at) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            conn.execute(*self._meta_statement(f"imported:{os.path.abspath(path)}", _now()))
+            self._recount(conn, repo)
+        return len(rows)
+
+    def import_article_links_file(self, path):
+        """One-time import of `article_links.json`; returns the number of links read"""
+        links = self._read_legacy_json(path)
+        if links is None:
+            return 0
+        rows = [self._link_row(subject, data) for subject, data in links.items()]
+        self._write([
+            ("INSERT OR IGNORE INTO article_links (subject, title, slug, categories, keywords, saved_at) "
+             "VALUES (?, ?, ?, ?, ?, ?)", rows),
+            self._meta_statement(f"imported:{os.path.abspath(path)}", _now())
+        ])
+        return len(rows)
+
+
+_shared_stores = {}
+_shared_stores_lock = threading.Lock()
+
+
+def get_state_store(path=STATE_DB):
+    """Process-wide store per database file"""
+    with _shared_stores_lock:
+        store = _shared_stores.get(path)
+        if store is None:
+            store = StateStore(path)
+            _shared_stores[path] = store
+        return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import legacy JSON/txt state into the SQLite state store")
+    parser.add_argument('--db', default=STATE_DB)
+    parser.add_argument('--data-dir', default='data', help="folder with <repo>_processed_subjects.json files")
+    parser.add_argument('--keywords-dir', default='keywords', help="folder with <repo>.txt keyword files")
+    parser.add_argument('--article-links', default='article_links.json')
+    args = parser.parse_args()
+
+    store = StateStore(args.db)
+    suffix = '_processed_subjects.json'
+    for path in sorted(glob.glob(os.path.join(args.data_dir, f"*{suffix}"))):
+        repo = os.path.basename(path)[:-len(suffix)]
+        print(f"processed  {repo}: {store.import_processed_file(repo, path)} subjek diimpor")
+    for path in sorted(glob.glob(os.path.join(args.keywords_dir, '*.txt'))):
+        repo = os.path.splitext(os.path.basename(path))[0]
+        store.sync_keywords(repo, path)
+        print(f"keywords   {repo}: {len(store.keywords(repo))} keyword")
+    print(f"links      {store.import_article_links_file(args.article_links)} link diimpor")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tag extraction by TF-IDF against a repo's own corpus statistics
+
+Articles are tokenized line by line (markdown links, images and code are
+skipped, headings weigh double) into unigram and bigram counts. Tags are the
+terms that are frequent in the article but rare across the repo's earlier
+articles, so posts on different topics stop getting the same tags.
+
+Document frequencies are kept per repo in TagStatistics and updated
+incrementally: each article appends its distinct terms to a JSONL log that
+is folded into a JSON snapshot every `compact_every` articles. Bigrams only
+count when they occur at least twice in an article - the same condition
+that makes them a tag candidate - which keeps the table from filling up
+with one-off word pairs.
+"""
+
+import os
+import re
+import json
+import math
+import threading
+from collections import Counter
+
+WORD_PATTERN = re.compile(r"[^\W\d_](?:[\w'-]*[^\W_])?")
+PHRASE_BREAK = re.compile(r'[.,;:!?()\[\]"“”|/•◦→✓]+')
+MARKUP = re.compile(r'!\[[^\]]*\]\([^)]*\)|\]\([^)]*\)|https?://\S+|`[^`]*`|\*\*|__|<[^>]+>')
+HEADING_WEIGHT = 2
+MIN_BIGRAM_COUNT = 2
+
+
+def iter_phrases(lines):
+    """Yield (weight, words) for each phrase, lowercase, in text order"""
+    in_code = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_code = not in_code
+            continue
+        if in_code or not stripped or stripped.startswith('!['):
+            continue
+        weight = HEADING_WEIGHT if stripped.startswith('#') else 1
+        for phrase in PHRASE_BREAK.split(MARKUP.sub(' ', stripped).lower()):
+            words = WORD_PATTERN.findall(phrase)
+            if words:
+                yield weight, words
+
+
+class TagStatistics:
+    """Document frequencies of tag terms over one repo's articles, persisted incrementally"""
+
+    def __init__(self, path, compact_every=500):
+        self.snapshot_path = f"{path}.json"
+        self.log_path = f"{path}.jsonl"
+        self.compact_every = compact_every
+        self.documents = 0
+        self.df = Counter()
+        self.keys = set()
+        self._logged = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(self.snapshot_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def __len__(self):
+        return self.documents
+
+    def idf(self, term, pending=0):
+        """Smoothed IDF; `pending` counts a document being scored that is not recorded yet"""
+        documents = self.documents + pending
+        return math.log((documents + 1) / (self.df.get(term, 0) + pending + 1)) + 1
+
+    def add(self, key, terms):
+        """Record one article's distinct terms; returns False if the key was already recorded"""
+        terms = sorted(set(terms))
+        with self._lock:
+            if key in self.keys:
+                return False
+            with open(self.log_path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps({'key': key, 'terms': terms}, ensure_ascii=False) + '\n')
+            self._apply(key, terms)
+            self._logged += 1
+            if self._logged >= self.compact_every:
+                self._compact()
+            return True
+
+    def _apply(self, key, terms):
+        self.keys.add(key)
+        self.documents += 1
+        self.df.update(terms)
+
+    def _compact(self):
+        """Fold the log into the snapshot (lock held)"""
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({'documents': self.documents, 'keys': sorted(self.keys), 'df': self.df},
+                      file, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.snapshot_path)
+        # A crash before this truncate only replays entries whose keys the snapshot already has
+        open(self.log_path, 'w').close()
+        self._logged = 0
+
+    def _load(self):
+        if os.path.exists(self.snapshot_path):
+            # Written through a temporary file, so it is either the old or the new snapshot
+            with open(self.snapshot_path, 'r', encoding='utf-8') as file:
+                snapshot = json.load(file)
+            self.documents = snapshot['documents']
+            self.keys = set(snapshot['keys'])
+            self.df = Counter(snapshot['df'])
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if record['key'] not in self.keys:
+                        self._apply(record['key'], record['terms'])
+                    self._logged += 1
+
+
+class TagExtractor:
+    """Top TF-IDF unigrams and bigrams of an article, scored against TagStatistics"""
+
+    def __init__(self, statistics, stopwords=(), max_tags=5, min_length=3):
+        self.statistics = statistics
+        self.stopwords = frozenset(stopwords)
+        self.max_tags = max_tags
+        self.min_length = min_length
+
+    def _is_term(self, word):
+        return len(word) >= self.min_length and word not in self.stopwords
+
+    def term_counts(self, lines):
+        """Weighted counts of candidate unigrams and bigrams (adjacent words within a phrase)"""
+        counts = Counter()
+        for weight, words in iter_phrases(lines):
+            previous = None
+            for word in words:
+                if not self._is_term(word):
+                    previous = None
+                    continue
+                counts[word] += weight
+                if previous:
+                    counts[f"{previous} {word}"] += weight
+                previous = word
+        return counts
+
+    def extract(self, lines, key=None, limit=None):
+        """Tags for an article given as lines; with a key the article is added to the statistics
+
+        Each term is scored (1 + log tf) * idf and tags are taken best first,
+        skipping terms that share a word with a tag already taken.
+        """
+        counts = self.term_counts(lines)
+        for term in [term for term, count in counts.items() if ' ' in term and count < MIN_BIGRAM_COUNT]:
+            del counts[term]
+        pending = 1
+        if key is not None:
+            self.statistics.add(key, counts)
+            pending = 0
+
+        # A word that mostly occurs inside one phrase ("open" in "open rate") is tagged as the phrase
+        phrases = {}
+        for term, count in counts.items():
+            if ' ' in term:
+                for word in term.split(' '):
+                    best = phrases.get(word)
+                    if best is None or count > counts[best]:
+                        phrases[word] = term
+
+        idf = self.statistics.idf
+        ranked = sorted(counts, key=lambda term: (-(1 + math.log(counts[term])) * idf(term, pending), term))
+        tags = []
+        used = set()
+        for term in ranked:
+            phrase = phrases.get(term)
+            if phrase and counts[phrase] * 2 >= counts[term]:
+                term = phrase
+            words = term.split(' ')
+            if used.intersection(words):
+                continue
+            tags.append(term)
+            used.update(words)
+            if len(tags) >= (limit or self.max_tags):
+                break
+        return tags
+
+
+_shared_statistics = {}
+_shared_statistics_lock = threading.Lock()
+
+
+def get_tag_statistics(path):
+    """Process-wide statistics per path, so concurrent generators update the same table"""
+    with _shared_statistics_lock:
+        statistics = _shared_statistics.get(path)
+        if statistics is None:
+            statistics = TagStatistics(path)
+            _shared_statistics[path] = statistics
+        return statistics
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-call Gemini token and latency accounting, persisted per day
+
+Every call is appended to `{usage_dir}/usage-YYYY-MM-DD.jsonl`; daily
+aggregates per repo, per key and per model are kept in memory. Scheduler runs
+are recorded too so the average cost of one article can be estimated.
+"""
+
+import os
+import json
+import time
+import datetime
+import threading
+from collections import defaultdict
+
+USAGE_FOLDER = "data/usage"
+
+
+def mask_key(api_key):
+    """Short form of an API key that is safe to write to disk"""
+    if not api_key:
+        return 'none'
+    return f"{api_key[:8]}...{api_key[-4:]}"
+
+
+def _empty_totals():
+    return {
+        'requests': 0,
+        'errors': 0,
+        'prompt_tokens': 0,
+        'output_tokens': 0,
+        'total_tokens': 0,
+        'latency_total': 0.0
+    }
+
+
+def _add_call(totals, record):
+    totals['requests'] += 1
+    if not record.get('ok', True):
+        totals['errors'] += 1
+    totals['prompt_tokens'] += record.get('prompt_tokens', 0)
+    totals['output_tokens'] += record.get('output_tokens', 0)
+    totals['total_tokens'] += record.get('total_tokens', 0)
+    totals['latency_total'] += record.get('latency', 0.0)
+
+
+def _summarize(totals):
+    summary = {key: value for key, value in totals.items() if key != 'latency_total'}
+    summary['avg_latency'] = round(totals['latency_total'] / totals['requests'], 3) if totals['requests'] else 0.0
+    return summary
+
+
+class UsageTracker:
+    """Thread-safe token/request accounting with daily JSONL persistence"""
+
+    def __init__(self, usage_dir=USAGE_FOLDER, history_days=7):
+        self.usage_dir = usage_dir
+        self.history_days = history_days
+        self._lock = threading.Lock()
+        self._days = {}
+        self._runs = []
+        os.makedirs(self.usage_dir, exist_ok=True)
+        self._load_history()
+
+    @staticmethod
+    def _today():
+        return datetime.date.today().isoformat()
+
+    def _path(self, day):
+        return os.path.join(self.usage_dir, f"usage-{day}.jsonl")
+
+    def _day(self, day):
+        if day not in self._days:
+            self._days[day] = {
+                'total': _empty_totals(),
+                'by_repo': defaultdict(_empty_totals),
+                'by_key': defaultdict(_empty_totals),
+                'by_model': defaultdict(_empty_totals)
+            }
+        return self._days[day]
+
+    def _apply(self, day, record):
+        if record.get('type') == 'run':
+            self._runs.append(record)
+            return
+        aggregates = self._day(day)
+        _add_call(aggregates['total'], record)
+        _add_call(aggregates['by_repo'][record.get('repo', 'default')], record)
+        _add_call(aggregates['by_key'][record.get('key', 'none')], record)
+        _add_call(aggregates['by_model'][record.get('model', 'unknown')], record)
+
+    def _load_history(self):
+        today = datetime.date.today()
+        for offset in range(self.history_days - 1, -1, -1):
+            day = (today - datetime.timedelta(days=offset)).isoformat()
+            path = self._path(day)
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        self._apply(day, json.loads(line))
+                    except ValueError:
+                        continue  # torn last line after a crash
+
+    def _append(self, day, record):
+        """Persist and aggregate one record (lock held)"""
+        with open(self._path(day), 'a', encoding='utf-8') as file:
+            file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._apply(day, record)
+
+    def record_call(self, repo, api_key, model, usage=None, latency=0.0, ok=True):
+        """Record one Gemini request; `usage` is the response's usageMetadata"""
+        usage = usage or {}
+        prompt_tokens = int(usage.get('promptTokenCount', 0) or 0)
+        output_tokens = int(usage.get('candidatesTokenCount', 0) or 0)
+        record = {
+            'type': 'call',
+            'ts': round(time.time(), 3),
+            'repo': repo or 'default',
+            'key': mask_key(api_key),
+            'model': model,
+            'prompt_tokens': prompt_tokens,
+            'output_tokens': output_tokens,
+            'total_tokens': int(usage.get('totalTokenCount', 0) or prompt_tokens + output_tokens),
+            'latency': round(latency, 3),
+            'ok': ok
+        }
+        with self._lock:
+            self._append(self._today(), record)
+
+    def record_run(self, repo, articles, total_tokens, requests):
+        """Record what a scheduler run spent, for per-article cost estimates"""
+        record = {
+            'type': 'run',
+            'ts': round(time.time(), 3),
+            'repo': repo or 'default',
+            'articles': articles,
+            'total_tokens': total_tokens,
+            'requests': requests
+        }
+        with self._lock:
+            self._append(self._today(), record)
+
+    def get_totals(self, repo=None, day=None):
+        """Totals for a day (default today), optionally for one repo"""
+        with self._lock:
+            aggregates = self._days.get(day or self._today())
+            if not aggregates:
+                return _summarize(_empty_totals())
+            if repo is None:
+                return _summarize(aggregates['total'])
+            return _summarize(aggregates['by_repo'].get(repo, _empty_totals()))
+
+    def get_aggregates(self, day=None):
+        """Totals for a day broken down by repo, key and model"""
+        day = day or self._today()
+        with self._lock:
+            aggregates = self._days.get(day) or self._day(day)
+            return {
+                'day': day,
+                'total': _summarize(aggregates['total']),
+                'by_repo': {name: _summarize(totals) for name, totals in aggregates['by_repo'].items()},
+                'by_key': {name: _summarize(totals) for name, totals in aggregates['by_key'].items()},
+                'by_model': {name: _summarize(totals) for name, totals in aggregates['by_model'].items()}
+            }
+
+    def article_cost(self, repo=None):
+        """Average (tokens, requests) per article over recorded runs, or None without history"""
+        with self._lock:
+            runs = [run for run in self._runs if repo is None or run['repo'] == repo]
+        articles = sum(run['articles'] for run in runs)
+        if not articles:
+            return self.article_cost() if repo is not None else None
+        # Spend of failed articles is spread over the successful ones
+        return (sum(run['total_tokens'] for run in runs) / articles,
+                sum(run['requests'] for run in runs) / articles)
+
+
+_shared_tracker = None
+_shared_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker():
+    """Process-wide tracker so budgets cover every repo and generator instance"""
+    global _shared_tracker
+    with _shared_tracker_lock:
+        if _shared_tracker is None:
+            _shared_tracker = UsageTracker()
+        return _shared_tracker
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-pattern vocabulary matching (Aho-Corasick) over external term files
+
+Vocabularies live in `vocabulary/common/<name>.txt` plus optional
+`vocabulary/<language>/<name>.txt` files that extend them. One term per
+line, lines starting with `#` are comments; mapping vocabularies use
+`term=value`. Matching is case-insensitive substring matching, the same as
+the `term in text` checks it replaces, but one scan finds every term
+regardless of vocabulary size.
+"""
+
+import os
+import threading
+from collections import deque
+
+VOCABULARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vocabulary')
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over lowercase terms
+
+    Terms keep the order they were added in (their rank); lookups return
+    terms in rank order so the result does not depend on where they occur.
+    """
+
+    def __init__(self, terms=()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._term_at = [None]
+        self._output = [()]
+        self.ranks = {}
+        self.values = {}
+        self._built = False
+        for entry in terms:
+            if isinstance(entry, tuple):
+                self.add(*entry)
+            else:
+                self.add(entry)
+
+    def __len__(self):
+        return len(self.ranks)
+
+    def add(self, term, value=None):
+        """Add a term; later duplicates are ignored"""
+        term = term.strip().lower()
+        if not term or term in self.ranks:
+            return
+        self.ranks[term] = len(self.ranks)
+        self.values[term] = term if value is None else value
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._term_at.append(None)
+                self._output.append(())
+                self._goto[node][char] = next_node
+            node = next_node
+        self._term_at[node] = term
+        self._built = False
+
+    def build(self):
+        """Compute failure links (breadth-first); called lazily on first scan"""
+        self._output = [(term,) if term else () for term in self._term_at]
+        queue = deque(self._goto[0].values())
+        for node in queue:
+            self._fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """Yield (start, end, term) for every occurrence in `text` (lowercased here)"""
+        if not self._built:
+            self.build()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        for index, char in enumerate(text.lower()):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for term in output[node]:
+                yield index + 1 - len(term), index + 1, term
+
+    def find(self, texts, limit=None):
+        """Distinct terms found in a string or an iterable of strings, in rank order"""
+        if isinstance(texts, str):
+            texts = (texts,)
+        found = set()
+        for text in texts:
+            for _, _, term in self.iter_matches(text):
+                found.add(term)
+            if len(found) == len(self.ranks):
+                break
+        ordered = sorted(found, key=self.ranks.__getitem__)
+        return ordered[:limit] if limit is not None else ordered
+
+    def find_values(self, texts, limit=None):
+        """Like find() but returns the mapped values, without duplicates"""
+        values = list(dict.fromkeys(self.values[term] for term in self.find(texts)))
+        return values[:limit] if limit is not None else values
+
+    def replace(self, text):
+        """Replace leftmost-longest, non-overlapping occurrences with their values
+
+        The text is lowercased, as the callers expect lowercase output.
+        """
+        text = text.lower()
+        matches = sorted(self.iter_matches(text), key=lambda match: (match[0], -match[1]))
+        parts = []
+        position = 0
+        for start, end, term in matches:
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append(self.values[term])
+            position = end
+        parts.append(text[position:])
+        return ''.join(parts)
+
+
+def read_vocabulary(path):
+    """(term, value) pairs from a vocabulary file; value is None without `=`"""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '=' in line:
+                term, value = line.split('=', 1)
+                entries.append((term.strip(), value.strip()))
+            else:
+                entries.append((line, None))
+    return entries
+
+
+_matchers = {}
+_matchers_lock = threading.Lock()
+
+
+def load_matcher(name, language='', vocabulary_dir=VOCABULARY_DIR):
+    """Matcher for a vocabulary (common terms first, then the language's), built once per process"""
+    language = (language or '').strip().lower()
+    cache_key = (vocabulary_dir, language, name)
+    with _matchers_lock:
+        matcher = _matchers.get(cache_key)
+        if matcher is None:
+            matcher = TermMatcher()
+            for folder in ('common', language):
+                path = os.path.join(vocabulary_dir, folder, f"{name}.txt") if folder else None
+                if path and os.path.exists(path):
+                    for term, value in read_vocabulary(path):
+                        matcher.add(term, value)
+            matcher.build()
+            _matchers[cache_key] = matcher
+        return matcher
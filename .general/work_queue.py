@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Work queue over a repo's pending keywords, for several workers at once
+
+The Streamlit scheduler, a manual batch and the command line generator can
+run at the same time, in one process or several. Each takes keywords
+through a WorkQueue instead of reading the pending list, so no keyword is
+generated twice:
+
+- lease(limit) hands out pending keywords nobody holds and leases them to
+  this queue's owner for `visibility_timeout` seconds; claim(keyword) does
+  the same for one chosen keyword and extends a lease already held.
+- ack(keyword) records the outcome (published, skipped) and drops the lease.
+- nack(keyword, detail) records the failure and puts the keyword back after
+  a retry delay that doubles per attempt; after `max_attempts` it is
+  dead-lettered (status dead) instead. requeue_dead() gives those a new start.
+
+A worker that dies keeps its leases until they expire; the keyword is then
+handed out again and the lost lease counts as an attempt. Leases live in
+the shared SQLite state store (`state_store.leases`), whose write lock
+makes leasing atomic across processes. Workers on several hosts need the
+database on storage with working file locks, and clocks that roughly agree.
+"""
+
+import os
+import uuid
+import socket
+
+
+class WorkQueue:
+    """Leases of one repo's pending keywords, held under this queue's owner id"""
+
+    def __init__(self, store, repo, visibility_timeout=1800, max_attempts=3, retry_delay=300, owner=None,
+                 skip_statuses=()):
+        self.store = store
+        self.repo = repo
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Pending keywords this worker leaves alone (e.g. ones it already wrote locally)
+        self.skip_statuses = tuple(skip_statuses)
+
+    def lease(self, limit=None, visibility_timeout=None):
+        """Lease up to `limit` pending keywords (None: all of them), in file order"""
+        return self.store.lease_keywords(
+            self.repo, self.owner, limit, visibility_timeout or self.visibility_timeout, self.max_attempts,
+            self.skip_statuses
+        )
+
+    def claim(self, keyword, visibility_timeout=None):
+        """Lease one keyword or extend our lease on it; False if it is done or held by another worker"""
+        return self.store.claim_keyword(
+            self.repo, keyword, self.owner, visibility_timeout or self.visibility_timeout
+        )
+
+    def ack(self, keyword, status='published', detail=None):
+        """Record a finished keyword; this also releases its lease"""
+        self.store.ack_keyword(self.repo, keyword, status, detail)
+
+    def nack(self, keyword, detail=None):
+        """Record a failure; returns 'retry', 'dead' or None when the lease was no longer ours"""
+        return self.store.release_keyword(
+            self.repo, keyword, self.owner, detail, self.retry_delay, self.max_attempts
+        )
+
+    def requeue_dead(self):
+        return self.store.requeue_dead(self.repo)
@@ -7,17 +7,20 @@ Aplikasi untuk mengelola posting artikel otomatis ke GitHub repository
 
 import streamlit as st
 import os
-import json
+import io
 import time
 from datetime import datetime
 import schedule
 import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 import pandas as pd
 from github import Github
 from github import GithubException
+from slugify import slugify
 import requests
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import yaml
 import logging
 from io import StringIO
@@ -26,10 +29,19 @@ import sys
 # Import komponen dari generator yang sudah ada
 sys.path.append('.general')
 from simple_seo_generator import SimpleSEOGenerator, SimpleConfigManager, SimpleAPIManager
+from resilience import GeminiError
+from duplicate_index import get_duplicate_index
+from publish_journal import get_publish_journal
+from artifact_store import GITHUB
+from keyword_ingest import ingest_keywords, keyword_key, normalize_keyword, write_keywords
 
 # Import template admin
 from template_admin import render_template_admin
 
+from config import (
+    DUPLICATE_SETTINGS, GITHUB_API_BASE_URL, JOURNAL_SETTINGS, KEYWORD_SETTINGS, SCHEDULER_SETTINGS
+)
+
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -115,9 +127,9 @@ class ConfigManager:
 class GitHubManager:
     """Mengelola operasi GitHub API"""
     
-    def __init__(self, token: str):
+    def __init__(self, token: str, base_url: str = GITHUB_API_BASE_URL):
         self.token = token
-        self.github = Github(token)
+        self.github = Github(token, base_url=base_url)
         self.user = self.github.get_user()
         
     def get_repositories(self) -> List[Dict]:
@@ -168,6 +180,16 @@ class GitHubManager:
             logger.error(f"Error creating _posts folder: {e}")
             return False
     
+    def file_exists(self, repo_name: str, path: str) -> bool:
+        """Cek apakah file ada di repository; error selain 404 diteruskan"""
+        try:
+            self.github.get_repo(repo_name).get_contents(path)
+            return True
+        except GithubException as e:
+            if e.status == 404:
+                return False
+            raise
+    
     def upload_article(self, repo_name: str, article_path: str, article_content: str) -> bool:
         """Upload artikel ke repository"""
         try:
@@ -227,6 +249,14 @@ class GitHubManager:
             logger.error(f"Error uploading image: {e}")
             return False
 
+_publish_locks = {}
+_publish_locks_lock = threading.Lock()
+
+def get_publish_lock(repo_name: str) -> threading.Lock:
+    """Lock upload per repo untuk seluruh proses: scheduler dan processor setiap rerun memakai lock yang sama"""
+    with _publish_locks_lock:
+        return _publish_locks.setdefault(repo_name, threading.Lock())
+
 class ArticleProcessor:
     """Mengelola pemrosesan artikel"""
     
@@ -235,84 +265,384 @@ class ArticleProcessor:
         self.github_manager = github_manager
         self.processed_file = f"data/{repo_name}_processed_subjects.json"
         self.keywords_file = f"keywords/{repo_name}.txt"
-        self.generator = SimpleSEOGenerator()
+        self.generator = SimpleSEOGenerator(repo_name=repo_name)
+        # State SQLite bersama generator; file JSON lama hanya diimpor sekali
+        self.state_store = self.generator.state_store
+        # Keyword dikerjakan lewat lease, agar scheduler, batch manual dan generator CLI tidak bentrok
+        self.queue = self.generator.work_queue
+        # Post yang sudah dibuat disimpan sebelum upload, agar upload gagal tidak berarti generate ulang
+        self.artifact_store = self.generator.artifact_store
+        
+        # Index MinHash artikel yang sudah dipublikasi, untuk cek near-duplicate sebelum upload;
+        # satu instance per repo untuk seluruh proses, agar publikasi scheduler dan UI saling terlihat
+        self.duplicate_action = DUPLICATE_SETTINGS.get('action', 'skip')
+        self.duplicate_index = get_duplicate_index(
+            f"data/{repo_name}_published_minhash.jsonl",
+            threshold=DUPLICATE_SETTINGS.get('threshold', 0.5),
+            num_perm=DUPLICATE_SETTINGS.get('num_perm', 128),
+            shingle_size=DUPLICATE_SETTINGS.get('shingle_size', 3)
+        ) if self.duplicate_action != 'off' else None
+        
+        # Lock untuk link index di memori, dan lock upload GitHub + cek duplikat yang dipakai bersama per repo
+        self._state_lock = threading.Lock()
+        self._upload_lock = get_publish_lock(repo_name)
         
         # Buat direktori jika tidak ada
         os.makedirs("data", exist_ok=True)
         os.makedirs("keywords", exist_ok=True)
+        self.state_store.import_processed_file(repo_name, self.processed_file)
+        
+        # Journal upload GitHub: satu file per proses di folder journal repo, satu instance per proses
+        # (lihat recover_publishes)
+        self.journal = get_publish_journal(
+            f"data/{repo_name}_publish_journal",
+            compact_every=JOURNAL_SETTINGS.get('compact_every', 1000),
+            fsync_every=JOURNAL_SETTINGS.get('fsync_every', 20)
+        )
+        
+    def recover_publishes(self) -> int:
+        """Selesaikan publikasi yang terputus menurut journal; mengembalikan jumlah artikel yang dipulihkan
+        
+        Hanya entri dari journal proses yang sudah mati; upload proses lain yang masih berjalan tidak
+        disentuh. Setiap entri diambil alih sekali, jadi pemanggilan berikutnya (mis. setiap rerun
+        Streamlit) hanya memproses proses yang mati sejak itu.
+        'published' berarti upload sudah berhasil tapi state belum tercatat. 'uploading' berarti
+        hasil upload tidak diketahui, jadi dicek ke GitHub; jika file tidak ada keyword tetap pending.
+        """
+        recovered = 0
+        for keyword, event in self.journal.take_recovered().items():
+            if event['status'] == 'uploading':
+                try:
+                    uploaded = self.github_manager.file_exists(self.repo_name, event['path'])
+                except Exception as e:
+                    logger.warning(f"Status upload {keyword} belum bisa dicek, dicoba lagi saat start berikutnya: {e}")
+                    continue
+                if not uploaded:
+                    self.journal.append(keyword, 'failed', path=event['path'])
+                    continue
+            self.save_processed_subject(keyword, 'published', f"dipulihkan dari journal ({event['path']})")
+            content = None
+            if event.get('digest'):
+                self.artifact_store.mark(self.repo_name, keyword, event['digest'], 'published', event['path'])
+                content = self.artifact_store.read_body(event['digest'])
+            with self._state_lock:
+                self.generator.save_article_link(
+                    keyword, event['title'], slugify(event['title'])[:50], self.generator.generate_categories(keyword),
+                    content
+                )
+            self.journal.append(keyword, 'recorded')
+            recovered += 1
+        if recovered:
+            logger.info(f"{recovered} publikasi yang terputus dipulihkan dari journal {self.repo_name}")
+        return recovered
         
     def load_processed_subjects(self) -> List[str]:
-        """Load daftar subjek yang sudah diproses"""
-        if os.path.exists(self.processed_file):
-            try:
-                with open(self.processed_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
-    
-    def save_processed_subject(self, subject: str):
-        """Simpan subjek yang sudah diproses"""
-        processed = self.load_processed_subjects()
-        if subject not in processed:
-            processed.append(subject)
-            with open(self.processed_file, 'w', encoding='utf-8') as f:
-                json.dump(processed, f, indent=2, ensure_ascii=False)
+        """Load daftar subjek yang sudah diproses (dipublikasi atau dilewati; dead-letter tidak termasuk)"""
+        return self.state_store.processed_subjects(self.repo_name)
+    
+    def save_processed_subject(self, subject: str, status: str = 'published', detail: Optional[str] = None):
+        """Simpan status subjek: 'published', 'skipped' (dianggap selesai) atau 'failed' (tetap pending)"""
+        self.state_store.mark_processed(self.repo_name, subject, status, detail)
     
     def load_keywords(self) -> List[str]:
-        """Load keywords dari file"""
-        if os.path.exists(self.keywords_file):
-            try:
-                with open(self.keywords_file, 'r', encoding='utf-8') as f:
-                    return [line.strip() for line in f if line.strip()]
-            except:
-                return []
-        return []
-    
-    def save_keywords(self, keywords: List[str]):
-        """Simpan keywords ke file"""
-        with open(self.keywords_file, 'w', encoding='utf-8') as f:
-            for keyword in keywords:
-                f.write(f"{keyword}\n")
-    
-    def get_pending_keywords(self) -> List[str]:
-        """Mendapatkan keywords yang belum diproses"""
-        all_keywords = self.load_keywords()
-        processed = self.load_processed_subjects()
-        return [kw for kw in all_keywords if kw not in processed]
-    
-    def process_article(self, keyword: str) -> tuple:
-        """Proses satu artikel"""
+        """Load keywords; file keyword dibaca ulang hanya jika berubah sejak terakhir disinkronkan"""
+        self.state_store.sync_keywords(self.repo_name, self.keywords_file)
+        return self.state_store.keywords(self.repo_name)
+    
+    def save_keywords(self, keywords, mode: Optional[str] = None) -> Dict:
+        """Simpan keywords ke file lewat tahap ingestion
+        
+        Keyword dinormalisasi (Unicode, spasi) dan duplikat persis dibuang. Near-duplicate
+        dikelompokkan: mode 'report' hanya melaporkan cluster, 'merge' menyisakan satu keyword
+        per cluster (yang sudah diproses diutamakan), 'off' tanpa clustering.
+        keywords boleh berupa iterable baris apa saja (mis. file yang dibaca streaming).
+        """
+        result = ingest_keywords(
+            keywords,
+            processed=self.load_processed_subjects(),
+            mode=mode or KEYWORD_SETTINGS.get('near_duplicates', 'report'),
+            token_threshold=KEYWORD_SETTINGS.get('token_threshold', 0.75),
+            typo_min_length=KEYWORD_SETTINGS.get('typo_min_length', 5),
+            typo_min_ratio=KEYWORD_SETTINGS.get('typo_min_ratio', 3)
+        )
+        write_keywords(self.keywords_file, result['keywords'])
+        self.rename_processed_subjects(result['keywords'])
+        self.state_store.replace_keywords(self.repo_name, result['keywords'], self.keywords_file)
+        if result['exact_duplicates'] or result['clusters'] or result['typo_clusters']:
+            logger.info(f"Keywords {self.repo_name}: {result['exact_duplicates']} duplikat dibuang, "
+                        f"{len(result['clusters'])} cluster near-duplicate, {len(result['merged'])} digabung, "
+                        f"{len(result['typo_clusters'])} kemungkinan typo")
+        return result
+    
+    def rename_processed_subjects(self, keywords: List[str]):
+        """Samakan ejaan subjek yang sudah diproses dengan keyword hasil normalisasi
+        
+        Tanpa ini keyword yang sudah dipublikasi dengan ejaan lama (mis. spasi ganda) dianggap pending lagi.
+        """
+        spellings = {keyword_key(keyword): keyword for keyword in keywords}
+        renames = []
+        for subject, _, _, _ in self.state_store.processed_records(self.repo_name):
+            keyword = spellings.get(keyword_key(normalize_keyword(subject)))
+            if keyword is not None and keyword != subject:
+                renames.append((subject, keyword))
+        if renames:
+            self.state_store.rename_processed(self.repo_name, renames)
+            logger.info(f"{len(renames)} subjek diproses disamakan dengan ejaan keyword baru ({self.repo_name})")
+    
+    def get_pending_keywords(self, limit: Optional[int] = None) -> List[str]:
+        """Mendapatkan keywords yang belum diproses, dibaca dari cursor pending (limit=None: semua)"""
+        self.state_store.sync_keywords(self.repo_name, self.keywords_file)
+        return self.state_store.pending_keywords(self.repo_name, limit)
+    
+    def lease_keywords(self, limit: Optional[int] = None, visibility_timeout: Optional[int] = None) -> List[str]:
+        """Ambil keyword pending yang tidak sedang dikerjakan worker lain dan lease untuk processor ini"""
+        self.state_store.sync_keywords(self.repo_name, self.keywords_file)
+        return self.queue.lease(limit, visibility_timeout)
+    
+    def requeue_dead_keywords(self) -> int:
+        """Kembalikan keyword dead-letter ke antrian"""
+        return self.queue.requeue_dead()
+    
+    def keyword_counts(self) -> Dict:
+        """Jumlah keyword total, processed dan pending dari counter state store"""
+        self.state_store.sync_keywords(self.repo_name, self.keywords_file)
+        return self.state_store.keyword_counts(self.repo_name)
+    
+    def recent_processed_subjects(self, limit: int = 5) -> List[str]:
+        """Subjek yang terakhir diproses, terbaru di akhir"""
+        return self.state_store.recent_processed(self.repo_name, limit)
+    
+    def process_article(self, keyword: str, stream_callback: Optional[Callable[[str], None]] = None) -> tuple:
+        """Proses satu artikel
+        
+        stream_callback (opsional) menerima setiap baris artikel segera setelah selesai di-stream.
+        Keyword di-lease dulu (atau lease yang sudah dipegang diperpanjang); keyword yang sedang
+        dikerjakan worker lain tidak diproses. Post yang sudah pernah dibuat tapi belum terpublikasi
+        diambil dari artifact store, tidak di-generate ulang.
+        """
+        if not self.queue.claim(keyword):
+            return False, "Keyword sedang diproses worker lain atau sudah selesai"
+        
         try:
-            # Generate artikel
-            title, content = self.generator.generate_enhanced_article(keyword)
-            
-            # Buat markdown post
-            markdown_content = self.generator.create_markdown_post(title, content, keyword)
+            stored = self.artifact_store.latest(self.repo_name, keyword, GITHUB)
+            if stored:
+                logger.info(f"{keyword}: post tersimpan {stored['digest'][:12]} dipublikasi ulang tanpa generate")
+                success, message = self.publish_artifact(keyword, stored)
+            else:
+                # Generate artikel
+                content = self.generator.generate_article_document(keyword, stream_callback=stream_callback)
+                if not content:
+                    success, message = False, "Gagal membuat artikel"
+                else:
+                    quality = content.quality
+                    if quality and not quality['passed']:
+                        logger.warning(f"Kualitas {keyword}: {quality['words']}/{quality['min_words']} kata, "
+                                       f"{quality['headings']}/{quality['target_headings']} heading, "
+                                       f"masih bermasalah: {quality['regenerate']}")
+                    
+                    success, message = self.publish_article(keyword, content)
+                
+        except GeminiError as e:
+            logger.error(f"Generation failed for {keyword}: {type(e).__name__}: {e}")
+            success, message = False, f"{type(e).__name__}: {str(e)}"
+        except Exception as e:
+            logger.error(f"Error processing article: {e}")
+            success, message = False, f"Error: {str(e)}"
+        
+        # Kegagalan dicatat dengan pesannya; keyword dicoba lagi setelah jeda, atau masuk dead-letter
+        if not success and self.queue.nack(keyword, message) == 'dead':
+            logger.warning(f"{keyword} masuk dead-letter setelah {self.queue.max_attempts} percobaan: {message}")
+        return success, message
+    
+    def store_article(self, keyword: str, content) -> Dict:
+        """Buat markdown post dan simpan ke artifact store sebelum upload; mengembalikan artifact-nya
+        
+        content boleh berupa teks markdown atau MarkdownDocument dari generator.
+        """
+        title = self.generator.extract_title(content, keyword)
+        filename, markdown_content = self.generator.build_markdown_post(title, content, keyword)
+        return self.artifact_store.put(self.repo_name, keyword, markdown_content, filename, GITHUB)
+    
+    def publish_article(self, keyword: str, content) -> tuple:
+        """Simpan artikel hasil generate ke artifact store, lalu publikasikan"""
+        return self.publish_artifact(keyword, self.store_article(keyword, content))
+    
+    def publish_artifact(self, keyword: str, artifact: Dict) -> tuple:
+        """Tahap publikasi dari artifact store: upload ke GitHub, lalu catat state
+        
+        Bisa diulang: jika upload gagal, post tetap tersimpan dan percobaan berikutnya tidak generate ulang.
+        """
+        digest = artifact['digest']
+        title = artifact['title']
+        filename = artifact['filename']
+        markdown_content = self.artifact_store.read(digest)
+        content = self.artifact_store.read_body(digest)
+        
+        # Upload ke GitHub (diserialisasi: commit paralel ke branch yang sama bisa konflik)
+        article_path = f"_posts/{filename}"
+        warning = ""
+        with self._upload_lock:
+            # Cek duplikat di bawah lock yang sama, agar dua keyword mirip dalam satu batch tidak lolos bersamaan
+            signature = None
+            if self.duplicate_index is not None:
+                signature = self.duplicate_index.signature(content)
+                duplicate = self.duplicate_index.find(signature=signature)
+                if duplicate:
+                    other_keyword, other_path, similarity = duplicate
+                    warning = f"hampir sama dengan '{other_keyword}' ({other_path}, kemiripan {similarity:.0%})"
+                    logger.warning(f"Near-duplicate {keyword}: {warning}")
+                    if self.duplicate_action == 'skip':
+                        # Ditandai selesai agar keyword ini tidak di-generate ulang di setiap run
+                        self.save_processed_subject(keyword, 'skipped', warning)
+                        self.artifact_store.mark(self.repo_name, keyword, digest, 'skipped', warning)
+                        return False, f"Dilewati: {warning}"
             
-            # Buat nama file
-            from slugify import slugify
-            date_str = datetime.now().strftime('%Y-%m-%d')
-            slug = slugify(title)
-            filename = f"{date_str}-{slug}.md"
+            # Lease bisa kedaluwarsa selama generate; jika sudah diambil worker lain, jangan upload ganda
+            if not self.queue.claim(keyword):
+                return False, "Lease keyword hilang, keyword diambil worker lain"
             
-            # Upload ke GitHub
-            article_path = f"_posts/{filename}"
+            # uploading/published di-fsync: setelah crash, upload yang sudah terjadi tidak diulang
+            self.journal.append(keyword, 'uploading', path=article_path, title=title, digest=digest)
             success = self.github_manager.upload_article(
                 self.repo_name, 
                 article_path, 
                 markdown_content
             )
-            
-            if success:
-                self.save_processed_subject(keyword)
-                return True, f"Artikel berhasil dipublikasi: {filename}"
-            else:
-                return False, "Gagal mengupload artikel ke GitHub"
-                
+            self.journal.append(keyword, 'published' if success else 'failed',
+                                path=article_path, title=title, digest=digest)
+            if success and signature is not None:
+                self.duplicate_index.add(keyword, path=article_path, signature=signature)
+        
+        if success:
+            self.save_processed_subject(keyword)
+            self.artifact_store.mark(self.repo_name, keyword, digest, 'published', article_path)
+            with self._state_lock:
+                self.generator.save_article_link(
+                    keyword, title, slugify(title)[:50], self.generator.generate_categories(keyword), content
+                )
+            self.journal.append(keyword, 'recorded')
+            if warning:
+                return True, f"Artikel berhasil dipublikasi: {filename} (peringatan: {warning})"
+            return True, f"Artikel berhasil dipublikasi: {filename}"
+        else:
+            self.artifact_store.mark(self.repo_name, keyword, digest, 'failed', "upload gagal")
+            return False, "Gagal mengupload artikel ke GitHub"
+    
+    def publish_stored_articles(self, limit: Optional[int] = None,
+                                progress_callback: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Publikasikan ulang post di artifact store yang belum terpublikasi, tanpa generate"""
+        results = []
+        for artifact in self.artifact_store.unpublished(self.repo_name, GITHUB, limit):
+            keyword = artifact['keyword']
+            if not self.queue.claim(keyword):
+                continue
+            result = self._publish_stored(keyword, artifact)
+            results.append(result)
+            if progress_callback:
+                progress_callback(result)
+        return results
+    
+    def _publish_stored(self, keyword: str, artifact: Dict) -> Dict:
+        """publish_artifact untuk keyword yang sudah di-lease; gagal berarti nack"""
+        try:
+            success, message = self.publish_artifact(keyword, artifact)
         except Exception as e:
-            logger.error(f"Error processing article: {e}")
-            return False, f"Error: {str(e)}"
+            logger.error(f"Error publishing stored article {keyword}: {e}")
+            success, message = False, f"Error: {str(e)}"
+        if not success:
+            self.queue.nack(keyword, message)
+        return {'keyword': keyword, 'success': success, 'message': message}
+    
+    def run_bulk_generation(self, limit: Optional[int] = None,
+                            status_callback: Optional[Callable[[str], None]] = None,
+                            progress_callback: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Generate semua keyword pending lewat satu Batch API job lalu publikasikan hasilnya
+        
+        Hasil di-stream dari file output batch, sehingga publikasi dimulai sebelum seluruh file terunduh.
+        """
+        # Batch job bisa berjalan berjam-jam; keyword-nya di-lease selama itu
+        pending_keywords = self.lease_keywords(
+            limit or None, self.generator.config.get_int('queue_bulk_visibility_timeout', 86400)
+        )
+        if not pending_keywords:
+            return []
+        
+        results = []
+        # Keyword yang post-nya sudah tersimpan dipublikasi dari artifact store, tidak ikut batch job
+        remaining_keywords = []
+        for keyword in pending_keywords:
+            stored = self.artifact_store.latest(self.repo_name, keyword, GITHUB)
+            if stored is None:
+                remaining_keywords.append(keyword)
+                continue
+            result = self._publish_stored(keyword, stored)
+            results.append(result)
+            if progress_callback:
+                progress_callback(result)
+        
+        articles = self.generator.iter_bulk_articles(
+            remaining_keywords,
+            job_name=self.repo_name,
+            status_callback=status_callback
+        )
+        for keyword, content, error in articles:
+            if error:
+                success, message = False, f"Error: {error}"
+            else:
+                try:
+                    success, message = self.publish_article(keyword, content)
+                except Exception as e:
+                    logger.error(f"Error publishing bulk article {keyword}: {e}")
+                    success, message = False, f"Error: {str(e)}"
+            if not success:
+                self.queue.nack(keyword, message)
+            result = {'keyword': keyword, 'success': success, 'message': message}
+            results.append(result)
+            if progress_callback:
+                progress_callback(result)
+        
+        return results
+    
+    def process_batch(self, keywords: List[str], max_workers: Optional[int] = None,
+                      progress_callback: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """Proses beberapa artikel secara paralel dengan jumlah worker terbatas
+        
+        Mengembalikan hasil per keyword dengan urutan yang sama seperti input.
+        progress_callback dipanggil di thread pemanggil setiap kali satu keyword selesai.
+        """
+        if not keywords:
+            return []
+        
+        if max_workers is None:
+            max_workers = SCHEDULER_SETTINGS.get('max_concurrent_articles', 1)
+        max_workers = max(1, min(int(max_workers), len(keywords)))
+        
+        def run(keyword: str) -> Dict:
+            started = time.perf_counter()
+            success, message = self.process_article(keyword)
+            return {
+                'keyword': keyword,
+                'success': success,
+                'message': message,
+                'duration': time.perf_counter() - started
+            }
+        
+        results: List[Optional[Dict]] = [None] * len(keywords)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="article") as executor:
+            futures = {executor.submit(run, keyword): i for i, keyword in enumerate(keywords)}
+            for future in as_completed(futures):
+                index = futures[future]
+                keyword = keywords[index]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing article {keyword}: {e}")
+                    result = {'keyword': keyword, 'success': False, 'message': f"Error: {str(e)}", 'duration': 0.0}
+                results[index] = result
+                if progress_callback:
+                    progress_callback(result)
+        
+        return results
 
 class AutoScheduler:
     """Mengelola penjadwalan otomatis"""
@@ -321,6 +651,8 @@ class AutoScheduler:
         self.running = False
         self.thread = None
         self.last_run = None
+        self.interval_minutes = SCHEDULER_SETTINGS['default_interval']
+        self.last_plan = None
         
     def start_scheduler(self, processor: ArticleProcessor, interval_minutes: int = 60):
         """Mulai penjadwalan otomatis"""
@@ -328,6 +660,7 @@ class AutoScheduler:
             return
             
         self.running = True
+        self.interval_minutes = interval_minutes
         
         def run_scheduler():
             schedule.every(interval_minutes).minutes.do(self.run_article_generation, processor)
@@ -348,29 +681,86 @@ class AutoScheduler:
             self.thread.join(timeout=5)
         logger.info("Scheduler stopped")
     
+    def plan_run(self, processor: ArticleProcessor, pending_count: int) -> Dict:
+        """Hitung jumlah artikel untuk run ini berdasarkan budget token/request harian
+        
+        Sisa budget hari ini dibagi rata ke sisa run sampai tengah malam, lalu dibagi
+        dengan estimasi biaya per artikel dari run sebelumnya.
+        """
+        tracker = processor.generator.usage_tracker
+        used = tracker.get_totals()
+        cost = tracker.article_cost(processor.repo_name) or (
+            SCHEDULER_SETTINGS['default_article_tokens'], SCHEDULER_SETTINGS['default_article_requests']
+        )
+        
+        now = datetime.now()
+        seconds_left = (datetime.combine(now.date(), datetime.max.time()) - now).total_seconds()
+        runs_left = max(1, int(seconds_left // (self.interval_minutes * 60)) + 1)
+        
+        articles = min(SCHEDULER_SETTINGS['max_articles_per_run'], pending_count)
+        budgets = [
+            (SCHEDULER_SETTINGS['daily_token_budget'], used['total_tokens'], cost[0]),
+            (SCHEDULER_SETTINGS['daily_request_budget'], used['requests'], cost[1])
+        ]
+        for budget, spent, per_article in budgets:
+            if not budget:
+                continue
+            remaining = max(0, budget - spent)
+            if remaining < per_article:
+                articles = 0
+                break
+            # Minimal satu artikel selama sisa budget cukup, agar budget kecil tetap terpakai
+            allowance = max(remaining / runs_left, per_article)
+            articles = min(articles, int(allowance // max(per_article, 1)))
+        
+        return {
+            'articles': articles,
+            'runs_left': runs_left,
+            'tokens_used': used['total_tokens'],
+            'requests_used': used['requests'],
+            'article_tokens': round(cost[0]),
+            'article_requests': round(cost[1], 2)
+        }
+    
     def run_article_generation(self, processor: ArticleProcessor):
         """Jalankan generasi artikel"""
         try:
-            pending_keywords = processor.get_pending_keywords()
+            processor.recover_publishes()
+            pending_count = processor.keyword_counts()['pending']
             
-            if not pending_keywords:
+            if not pending_count:
                 logger.info("No pending keywords to process")
                 return
             
-            # Proses 5 artikel per run
-            articles_per_run = 5
-            keywords_to_process = pending_keywords[:articles_per_run]
+            # Jumlah artikel per run mengikuti sisa budget harian
+            plan = self.plan_run(processor, pending_count)
+            self.last_plan = plan
+            if plan['articles'] == 0:
+                logger.info(f"Daily Gemini budget exhausted, skipping run "
+                            f"({plan['tokens_used']} tokens, {plan['requests_used']} requests used today)")
+                return
+            keywords_to_process = processor.lease_keywords(plan['articles'])
+            if not keywords_to_process:
+                logger.info("All pending keywords are leased by other workers or waiting for a retry")
+                return
             
-            for keyword in keywords_to_process:
-                success, message = processor.process_article(keyword)
-                logger.info(f"Processing {keyword}: {message}")
-                
-                if success:
-                    # Delay antar artikel
-                    time.sleep(10)
+            tracker = processor.generator.usage_tracker
+            before = tracker.get_totals(processor.repo_name)
+            results = processor.process_batch(
+                keywords_to_process,
+                progress_callback=lambda r: logger.info(f"Processing {r['keyword']}: {r['message']}")
+            )
+            after = tracker.get_totals(processor.repo_name)
             
             self.last_run = datetime.now()
-            logger.info(f"Batch processing completed. Processed {len(keywords_to_process)} articles")
+            succeeded = sum(1 for r in results if r['success'])
+            tracker.record_run(
+                processor.repo_name,
+                succeeded,
+                after['total_tokens'] - before['total_tokens'],
+                after['requests'] - before['requests']
+            )
+            logger.info(f"Batch processing completed. Processed {len(results)} articles ({succeeded} succeeded)")
             
         except Exception as e:
             logger.error(f"Error in scheduled article generation: {e}")
@@ -588,8 +978,9 @@ def render_content_manager():
     if st.session_state.github_manager and st.session_state.selected_repo:
         repo_name = st.session_state.selected_repo
         
-        # Create ArticleProcessor instance
+        # Create ArticleProcessor instance; publikasi yang terputus dipulihkan sekali per proses
         processor = ArticleProcessor(repo_name, st.session_state.github_manager)
+        processor.recover_publishes()
         
         # Content Manager Dashboard
         col1, col2 = st.columns([2, 1])
@@ -629,13 +1020,48 @@ def render_content_manager():
                 help="Enter keywords for automatic article generation"
             )
             
+            merge_variants = st.checkbox(
+                "🧹 Merge near-duplicate keywords",
+                value=KEYWORD_SETTINGS.get('near_duplicates') == 'merge',
+                help="Keep one keyword per cluster of variants (e.g. 'digital marketing trends' / '... 2025')"
+            )
+            keyword_mode = 'merge' if merge_variants else 'report'
+            # Key berganti setelah disimpan, agar file yang sama tidak diimpor lagi di setiap Save berikutnya
+            uploaded_keywords = st.file_uploader(
+                "📂 Import keyword file (.txt, one per line)",
+                type=['txt'],
+                key=f"keyword_upload_{st.session_state.get('keyword_upload_round', 0)}"
+            )
+            
             col1_1, col1_2 = st.columns(2)
             with col1_1:
                 if st.button("💾 Save Keywords"):
-                    new_keywords = [kw.strip() for kw in keywords_text.split('\n') if kw.strip()]
-                    processor.save_keywords(new_keywords)
-                    st.success(f"✅ Saved {len(new_keywords)} keywords")
+                    if uploaded_keywords is not None:
+                        # Streaming: file besar dibaca per baris, digabung dengan isi text area
+                        upload_lines = io.TextIOWrapper(uploaded_keywords, encoding='utf-8', errors='replace')
+                        result = processor.save_keywords(
+                            itertools.chain(keywords_text.split('\n'), upload_lines), mode=keyword_mode
+                        )
+                    else:
+                        result = processor.save_keywords(keywords_text.split('\n'), mode=keyword_mode)
+                    st.session_state['keyword_ingest_report'] = result
+                    if uploaded_keywords is not None:
+                        st.session_state['keyword_upload_round'] = st.session_state.get('keyword_upload_round', 0) + 1
                     st.rerun()
+                
+                report = st.session_state.get('keyword_ingest_report')
+                if report:
+                    st.success(f"✅ Saved {len(report['keywords'])} keywords "
+                               f"({report['exact_duplicates']} exact duplicates removed, "
+                               f"{len(report['merged'])} near-duplicates merged)")
+                    if report['clusters']:
+                        with st.expander(f"🔗 {len(report['clusters'])} near-duplicate clusters"):
+                            for cluster in report['clusters'][:200]:
+                                st.write(" · ".join(cluster))
+                    if report.get('typo_clusters'):
+                        with st.expander(f"✏️ {len(report['typo_clusters'])} possible typos (not merged)"):
+                            for cluster in report['typo_clusters'][:200]:
+                                st.write(" · ".join(cluster))
             
             with col1_2:
                 if st.button("🔄 Load Sample Keywords"):
@@ -661,14 +1087,29 @@ def render_content_manager():
             # Article generation
             st.subheader("📝 Auto Article Generation")
             
-            pending_keywords = processor.get_pending_keywords()
-            processed_keywords = processor.load_processed_subjects()
+            # Hanya sebagian keyword pending yang dibaca; jumlahnya dari counter
+            pending_keywords = processor.get_pending_keywords(KEYWORD_SETTINGS.get('pending_preview', 500))
+            keyword_counts = processor.keyword_counts()
             
             col2_1, col2_2 = st.columns(2)
             with col2_1:
-                st.metric("📋 Pending", len(pending_keywords))
+                st.metric("📋 Pending", keyword_counts['pending'])
             with col2_2:
-                st.metric("✅ Processed", len(processed_keywords))
+                st.metric("✅ Processed", keyword_counts['processed'])
+            if keyword_counts['leased']:
+                st.caption(f"🔒 {keyword_counts['leased']} keywords leased by running workers")
+            if keyword_counts['dead']:
+                st.warning(f"☠️ {keyword_counts['dead']} keywords failed too often and were set aside")
+                if st.button("♻️ Requeue failed keywords"):
+                    st.success(f"✅ {processor.requeue_dead_keywords()} keywords requeued")
+            stored_posts = processor.artifact_store.unpublished(processor.repo_name, GITHUB)
+            if stored_posts:
+                st.info(f"💾 {len(stored_posts)} generated posts are stored but not published yet")
+                if st.button("📤 Publish stored posts"):
+                    with st.spinner("Publishing stored posts..."):
+                        results = processor.publish_stored_articles()
+                    published = sum(1 for r in results if r['success'])
+                    st.success(f"✅ {published}/{len(results)} stored posts published")
             
             # Manual article generation
             if pending_keywords:
@@ -679,8 +1120,20 @@ def render_content_manager():
                 
                 if st.button("🚀 Generate Article"):
                     if selected_keyword:
+                        preview = st.empty()
+                        streamed_lines = []
+                        last_render = [0.0]
+                        
+                        def on_line(line):
+                            streamed_lines.append(line)
+                            # Batasi frekuensi render agar UI tetap responsif
+                            if time.monotonic() - last_render[0] > 0.3:
+                                preview.markdown('\n'.join(streamed_lines))
+                                last_render[0] = time.monotonic()
+                        
                         with st.spinner("Generating article..."):
-                            success, message = processor.process_article(selected_keyword)
+                            success, message = processor.process_article(selected_keyword, stream_callback=on_line)
+                            preview.empty()
                             
                             if success:
                                 st.success(f"✅ {message}")
@@ -703,29 +1156,71 @@ def render_content_manager():
             )
             
             if st.button("🔥 Generate Batch"):
-                if pending_keywords:
-                    keywords_to_process = pending_keywords[:batch_size]
+                # Lease, agar scheduler atau worker lain tidak mengambil keyword yang sama
+                keywords_to_process = processor.lease_keywords(batch_size)
+                if keywords_to_process:
                     
                     progress_bar = st.progress(0)
                     status_text = st.empty()
+                    completed = []
                     
-                    for i, keyword in enumerate(keywords_to_process):
-                        status_text.text(f"Processing: {keyword}")
-                        
-                        with st.spinner(f"Generating article {i+1}/{len(keywords_to_process)}..."):
-                            success, message = processor.process_article(keyword)
-                            
-                            if success:
-                                st.success(f"✅ {message}")
-                            else:
-                                st.error(f"❌ {message}")
-                        
-                        progress_bar.progress((i + 1) / len(keywords_to_process))
+                    def on_result(result):
+                        completed.append(result)
+                        if result['success']:
+                            st.success(f"✅ {result['keyword']}: {result['message']}")
+                        else:
+                            st.error(f"❌ {result['keyword']}: {result['message']}")
+                        progress_bar.progress(len(completed) / len(keywords_to_process))
+                        status_text.text(f"Completed {len(completed)}/{len(keywords_to_process)}")
+                    
+                    status_text.text(f"Processing {len(keywords_to_process)} keywords in parallel...")
+                    with st.spinner(f"Generating {len(keywords_to_process)} articles..."):
+                        processor.process_batch(keywords_to_process, progress_callback=on_result)
                     
                     status_text.text("Batch generation completed!")
                     st.balloons()
+                else:
+                    st.warning("No pending keywords available (all may be leased by other workers)")
+            
+            # Bulk backfill via Batch API
+            st.subheader("📦 Bulk Backfill")
+            st.caption("Submit every pending keyword as one Gemini batch job; results are published as they stream back.")
+            
+            if 'bulk_jobs' not in st.session_state:
+                st.session_state.bulk_jobs = {}
+            bulk_job = st.session_state.bulk_jobs.get(repo_name)
+            
+            if bulk_job and bulk_job['running']:
+                st.info(f"⏳ Bulk job running: {bulk_job['state']} — "
+                        f"{bulk_job['published']} published, {bulk_job['failed']} failed")
+            elif st.button("📦 Submit Bulk Job"):
+                if pending_keywords:
+                    bulk_job = {'running': True, 'state': 'preparing', 'published': 0, 'failed': 0}
+                    st.session_state.bulk_jobs[repo_name] = bulk_job
+                    
+                    def on_state(state, job=bulk_job):
+                        job['state'] = state
+                    
+                    def on_result(result, job=bulk_job):
+                        job['published' if result['success'] else 'failed'] += 1
+                    
+                    def run_bulk(job=bulk_job, bulk_processor=processor):
+                        try:
+                            bulk_processor.run_bulk_generation(status_callback=on_state, progress_callback=on_result)
+                            job['state'] = 'completed'
+                        except Exception as e:
+                            logger.error(f"Bulk job failed: {e}")
+                            job['state'] = f"failed: {e}"
+                        finally:
+                            job['running'] = False
+                    
+                    threading.Thread(target=run_bulk, daemon=True).start()
+                    st.success(f"✅ Bulk job started for {keyword_counts['pending']} keywords")
                 else:
                     st.warning("No pending keywords available")
+            elif bulk_job:
+                st.caption(f"Last bulk job: {bulk_job['state']} — "
+                           f"{bulk_job['published']} published, {bulk_job['failed']} failed")
         
         with col2:
             st.subheader("🎛️ Control Panel")
@@ -758,6 +1253,61 @@ def render_content_manager():
             else:
                 st.info("🤖 Scheduler: Stopped")
             
+            # Gemini connection pool reuse
+            with st.expander("🔌 API Connection Pool"):
+                http_stats = processor.generator.http_client.get_stats()
+                pool_cols = st.columns(2)
+                with pool_cols[0]:
+                    st.metric("Requests", http_stats['requests'])
+                    st.metric("Connections", http_stats['connections_opened'])
+                with pool_cols[1]:
+                    st.metric("Reused", http_stats['connections_reused'])
+                    st.metric("Reuse Ratio", f"{http_stats['reuse_ratio']:.0%}")
+            
+            # Response cache
+            if processor.generator.response_cache:
+                with st.expander("🗄️ Response Cache"):
+                    cache_stats = processor.generator.response_cache.get_stats()
+                    cache_cols = st.columns(2)
+                    with cache_cols[0]:
+                        st.metric("Hits", cache_stats['hits'])
+                        st.metric("Entries", cache_stats['entries'])
+                    with cache_cols[1]:
+                        st.metric("Misses", cache_stats['misses'])
+                        st.metric("Size", f"{cache_stats['bytes'] / 1024 / 1024:.1f} MB")
+            
+            # Gemini token usage hari ini
+            with st.expander("📊 Token Usage"):
+                usage = processor.generator.usage_tracker.get_aggregates()
+                usage_cols = st.columns(2)
+                with usage_cols[0]:
+                    st.metric("Tokens Today", f"{usage['total']['total_tokens']:,}")
+                    st.metric("Avg Latency", f"{usage['total']['avg_latency']:.2f}s")
+                with usage_cols[1]:
+                    st.metric("Requests Today", usage['total']['requests'])
+                    st.metric("Errors", usage['total']['errors'])
+                
+                token_budget = SCHEDULER_SETTINGS['daily_token_budget']
+                if token_budget:
+                    st.progress(min(1.0, usage['total']['total_tokens'] / token_budget),
+                                text=f"Token budget: {usage['total']['total_tokens']:,} / {token_budget:,}")
+                request_budget = SCHEDULER_SETTINGS['daily_request_budget']
+                if request_budget:
+                    st.progress(min(1.0, usage['total']['requests'] / request_budget),
+                                text=f"Request budget: {usage['total']['requests']} / {request_budget}")
+                
+                if usage['by_repo']:
+                    st.caption("Per repository")
+                    st.dataframe(pd.DataFrame.from_dict(usage['by_repo'], orient='index'), use_container_width=True)
+                if usage['by_key']:
+                    st.caption("Per API key")
+                    st.dataframe(pd.DataFrame.from_dict(usage['by_key'], orient='index'), use_container_width=True)
+                
+                plan = st.session_state.scheduler.last_plan
+                if plan:
+                    st.caption(f"Last scheduled run: {plan['articles']} articles "
+                               f"(~{plan['article_tokens']:,} tokens/article, {plan['runs_left']} runs left today)")
+            
             st.divider()
             
             # Manual Auto-run controls (legacy)
@@ -808,8 +1358,9 @@ def render_content_manager():
             
             # Recent processed keywords
             st.subheader("📋 Recent Articles")
-            if processed_keywords:
-                for keyword in processed_keywords[-5:]:  # Show last 5
+            recent_keywords = processor.recent_processed_subjects(5)
+            if recent_keywords:
+                for keyword in recent_keywords:
                     st.write(f"• {keyword}")
             else:
                 st.info("No articles generated yet")
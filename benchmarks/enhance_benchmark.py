@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for enhance_content_with_formatting
+
+Compares the compiled rule engine with the previous per-line re.sub
+implementation (kept below as legacy_enhance) on synthetic 10k-50k word
+articles, and checks that both give identical output for the same seed.
+
+Usage:
+    python benchmarks/enhance_benchmark.py --words 10000,25000,50000 --repeat 5
+"""
+
+import os
+import re
+import sys
+import random
+import argparse
+import tempfile
+import time
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, '.general'))
+
+SUBJECTS = ["strategi bisnis digital marketing", "seo content umkm", "investasi startup teknologi"]
+VOCABULARY = (
+    "bisnis marketing strategi digital online keuangan investasi startup teknologi seo content umkm "
+    "data growth plan customer value team process quality audience channel budget metric result "
+    "sangat penting crucial essential best practice tips terbaik strategi efektif hasil maksimal "
+    "pertumbuhan bisnis terbukti efektif highly recommended langkah tahap cara step"
+).split()
+PUNCTUATION = [',', ' ,', '.', ' .', ':', ';', '!', '?']
+
+
+def make_article(words, seed):
+    """Synthetic article with headings, bullets, step lines and unevenly punctuated paragraphs"""
+    rng = random.Random(seed)
+
+    def sentence(low, high):
+        tokens = []
+        for _ in range(rng.randint(low, high)):
+            tokens.append(rng.choice(VOCABULARY))
+            if rng.random() < 0.08:
+                tokens[-1] += rng.choice(PUNCTUATION)
+        return ' '.join(tokens).capitalize()
+
+    lines = ["# Strategi Bisnis Digital Marketing", ""]
+    count = 0
+    section = 0
+    while count < words:
+        section += 1
+        lines += [f"## Bagian {section} strategi bisnis", "", sentence(40, 90), ""]
+        for sub in range(3):
+            lines += [f"### Sub {section}.{sub}", ""]
+            for _ in range(rng.randint(2, 5)):
+                prefix = rng.choice(["- ", "* ", "", ""])
+                lines.append(prefix + sentence(6, 30))
+            lines += ["", sentence(40, 100), ""]
+        count = sum(len(line.split()) for line in lines)
+    lines += ["## Kesimpulan", "", sentence(30, 60)]
+    return '\n'.join(lines)
+
+
+def legacy_enhance(generator, content, subject):
+    """The implementation before the rule engine, kept as the reference"""
+    lines = content.split('\n')
+    enhanced_lines = []
+    keywords = generator._extract_keywords_from_subject(subject)
+    in_h3_section = False
+    bullet_count = 0
+    bullet_styles = [
+        "• ", "◦ ", "▪ ", "▫ ", "→ ", "✓ ", "★ ", "▷ ", "‣ ", "⋄ ",
+        "► ", "⚬ ", "◆ ", "◇ ", "⬥ ", "⬦ ", "⬧ ", "⬨ ", "○ ", "● "
+    ]
+    punctuation_fixes = [
+        (r'([a-zA-Z])\s*,\s*([a-zA-Z])', r'\1, \2'),
+        (r'([a-zA-Z])\s*\.\s*([A-Z])', r'\1. \2'),
+        (r'([a-zA-Z])\s*:\s*([a-zA-Z])', r'\1: \2'),
+        (r'([a-zA-Z])\s*;\s*([a-zA-Z])', r'\1; \2'),
+        (r'([a-zA-Z])\s*\!\s*([A-Z])', r'\1! \2'),
+        (r'([a-zA-Z])\s*\?\s*([A-Z])', r'\1? \2'),
+    ]
+    for i, line in enumerate(lines):
+        enhanced_line = line
+        if line.startswith('### '):
+            in_h3_section = True
+            bullet_count = 0
+            enhanced_lines.append(enhanced_line)
+            continue
+        elif line.startswith('## '):
+            in_h3_section = False
+            enhanced_lines.append(enhanced_line)
+            continue
+        elif line.startswith('#'):
+            in_h3_section = False
+            enhanced_lines.append(enhanced_line)
+            continue
+        if not line.strip():
+            enhanced_lines.append(enhanced_line)
+            continue
+        if in_h3_section and (line.strip().startswith('* ') or line.strip().startswith('- ')):
+            bullet_style = bullet_styles[bullet_count % len(bullet_styles)]
+            enhanced_line = re.sub(r'^(\s*)[\*\-]\s+', rf'\1{bullet_style}', line)
+            bullet_count += 1
+            for keyword in keywords[:2]:
+                if keyword.lower() in enhanced_line.lower():
+                    enhanced_line = re.sub(r'\b' + re.escape(keyword) + r'\b', f'**{keyword}**',
+                                           enhanced_line, count=1, flags=re.IGNORECASE)
+                    break
+        elif in_h3_section and any(indicator in line.lower() for indicator in ['langkah', 'tahap', 'fase', 'step', 'cara']):
+            if line.strip() and not line.startswith(('1.', '2.', '3.')) and len(line.strip()) > 30:
+                if not line.strip().startswith(tuple(bullet_styles)):
+                    enhanced_line = f"1. {line.strip()}"
+        elif line.strip() and not line.startswith('#'):
+            for pattern, replacement in punctuation_fixes:
+                enhanced_line = re.sub(pattern, replacement, enhanced_line)
+            for keyword in keywords[:3]:
+                if keyword.lower() in enhanced_line.lower() and f"**{keyword}" not in enhanced_line:
+                    enhanced_line = re.sub(r'\b' + re.escape(keyword) + r'\b', f'**{keyword}**',
+                                           enhanced_line, count=1, flags=re.IGNORECASE)
+                    break
+            emphasis_patterns = [
+                r'\b(sangat penting|crucial|essential|kunci utama|fundamental)\b',
+                r'\b(best practice|tips terbaik|strategi efektif|solusi optimal)\b',
+                r'\b(pertumbuhan bisnis|peningkatan profit|hasil maksimal)\b',
+                r'\b(terbukti efektif|highly recommended|wajib diterapkan)\b'
+            ]
+            for pattern in emphasis_patterns:
+                enhanced_line = re.sub(pattern, r'*\1*', enhanced_line, flags=re.IGNORECASE)
+            if len(enhanced_line.strip()) > 50:
+                if not enhanced_line.strip().endswith(('.', '!', '?', ':', ';')):
+                    if enhanced_line.strip().endswith(','):
+                        enhanced_line = enhanced_line.rstrip(',') + '.'
+                    else:
+                        enhanced_line += '.'
+            if i > 0 and len(enhanced_line) > 60 and random.random() < 0.12:
+                previous = lines[i - 1].strip() if i > 0 else ""
+                if previous and not previous.startswith('#') and not enhanced_line.startswith(('Selanjutnya', 'Lebih lanjut', 'Di samping itu')):
+                    transitions = [
+                        'Selanjutnya', 'Lebih lanjut', 'Di samping itu',
+                        'Berdasarkan hal tersebut', 'Dalam konteks ini',
+                        'Sebagai tambahan', 'Yang perlu diperhatikan'
+                    ]
+                    transition = random.choice(transitions)
+                    enhanced_line = f"{transition}, {enhanced_line.lower()}"
+        enhanced_lines.append(enhanced_line)
+    return '\n'.join(enhanced_lines)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        random.seed(0)
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark enhance_content_with_formatting")
+    parser.add_argument('--words', default='10000,25000,50000', help="comma-separated article sizes")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seeds', type=int, default=3, help="seeds checked for identical output")
+    args = parser.parse_args()
+
+    # The generator reads config.txt/apikey.txt and creates folders in the CWD
+    original_cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp(prefix='enhance-bench-'))
+    try:
+        from simple_seo_generator import SimpleSEOGenerator
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            generator = SimpleSEOGenerator()
+    finally:
+        os.chdir(original_cwd)
+
+    print(f"{'words':>8}{'legacy ms':>12}{'engine ms':>12}{'speedup':>10}{'Mwords/s':>10}  identical")
+    for words in [int(size) for size in args.words.split(',') if size.strip()]:
+        identical = True
+        for seed in range(args.seeds):
+            article = make_article(words, seed)
+            for subject in SUBJECTS:
+                random.seed(seed)
+                expected = legacy_enhance(generator, article, subject)
+                random.seed(seed)
+                identical &= generator.enhance_content_with_formatting(article, subject, rng=random) == expected
+
+        article = make_article(words, 0)
+        subject = SUBJECTS[0]
+        legacy_best = measure(lambda: legacy_enhance(generator, article, subject), args.repeat)
+        engine_best = measure(lambda: generator.enhance_content_with_formatting(article, subject, rng=random), args.repeat)
+        print(f"{words:>8}{legacy_best * 1000:>12.1f}{engine_best * 1000:>12.1f}"
+              f"{legacy_best / engine_best:>9.2f}x{words / engine_best / 1e6:>10.2f}  {'yes' if identical else 'NO'}")
+        if not identical:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for keyword ingestion (normalize, dedupe, near-duplicate clustering)
+
+Builds a synthetic keyword file with exact duplicates, case/whitespace
+variants, year suffixes, plurals and typos, streams it through
+ingest_keywords and reports throughput and what was found.
+
+Usage:
+    python benchmarks/keyword_ingest_benchmark.py --keywords 100000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, '.general'))
+
+from keyword_ingest import ingest_keywords, read_keywords, write_keywords
+
+
+def make_keywords(count, seed):
+    """Base topics plus the kinds of variants keyword tools produce"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = [''.join(rng.choice(letters) for _ in range(rng.randint(4, 10))) for _ in range(30000)]
+    keywords = []
+    for _ in range(count):
+        roll = rng.random()
+        if keywords and roll < 0.05:
+            keywords.append(rng.choice(keywords))                          # exact duplicate
+        elif keywords and roll < 0.10:
+            keywords.append('  ' + rng.choice(keywords).upper() + ' ')     # case/whitespace
+        elif keywords and roll < 0.15:
+            keywords.append(rng.choice(keywords) + ' 2025')                # year suffix
+        elif keywords and roll < 0.18:
+            base = rng.choice(keywords).split()
+            position = rng.randrange(len(base))
+            word = base[position]
+            cut = rng.randrange(len(word))
+            base[position] = word[:cut] + word[cut + 1:]                  # typo
+            keywords.append(' '.join(base))
+        else:
+            keywords.append(' '.join(rng.choices(words, k=rng.randint(2, 5))))
+    return keywords
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword ingestion")
+    parser.add_argument('--keywords', type=int, default=100000)
+    parser.add_argument('--mode', default='merge', choices=['report', 'merge', 'off'])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='keyword-bench-')
+    source = os.path.join(folder, 'keywords.txt')
+    write_keywords(source, make_keywords(args.keywords, args.seed))
+
+    started = time.perf_counter()
+    result = ingest_keywords(read_keywords(source), mode=args.mode)
+    write_keywords(os.path.join(folder, 'ingested.txt'), result['keywords'])
+    elapsed = time.perf_counter() - started
+
+    print(f"input           {args.keywords} lines")
+    print(f"exact dupes     {result['exact_duplicates']}")
+    print(f"clusters        {len(result['clusters'])} "
+          f"({sum(len(cluster) for cluster in result['clusters'])} keywords)")
+    print(f"merged          {len(result['merged'])}")
+    print(f"typo clusters   {len(result['typo_clusters'])}")
+    print(f"output          {len(result['keywords'])} keywords")
+    print(f"time            {elapsed:.2f}s ({args.keywords / elapsed:,.0f} keywords/s)")
+    for cluster in result['clusters'][:3]:
+        print("  e.g.", " | ".join(cluster[:4]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+End-to-end pipeline benchmark
+
+Drives ArticleProcessor.process_batch against the local Gemini and GitHub
+stand-ins in devtools/ and reports, per concurrency level, throughput
+(articles/minute), p50/p95/p99 latency per stage and peak memory.
+
+Stages: generate (gemini_request), the format/images/links post-processing
+passes, markdown (build_markdown_post), upload (GitHubManager.upload_article)
+and total (process_article).
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --articles 16 --concurrency 1,2,4,8 \\
+        --gemini-latency 0.5 --github-latency 0.2 --gemini-error-rate 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import contextlib
+import tracemalloc
+from collections import defaultdict
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, '.general'), os.path.join(ROOT, 'devtools')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from fake_gemini_server import FakeGeminiServer
+from fake_github_server import FakeGitHubServer
+
+STAGES = ['generate', 'format', 'images', 'links', 'markdown', 'upload', 'total']
+REPO_NAME = 'benchmark-blog'
+TOPICS = [
+    "strategi pemasaran digital", "investment portfolio basics", "manajemen keuangan UMKM",
+    "cloud cost optimization", "content marketing plan", "bisnis online pemula",
+    "personal finance budgeting", "data driven decision making", "customer retention strategy",
+    "startup fundraising guide"
+]
+
+
+class StageTimer:
+    """Thread-safe collector of per-stage durations"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(list)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.samples = defaultdict(list)
+
+    def summary(self):
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+        return {
+            stage: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 2),
+                'p95_ms': round(percentile(values, 95) * 1000, 2),
+                'p99_ms': round(percentile(values, 99) * 1000, 2)
+            }
+            for stage, values in samples.items() if values
+        }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def write_workspace(workdir, gemini_url, args):
+    """config.txt and apikey.txt for the generator, which reads them from the CWD"""
+    config = {
+        'language': 'Indonesian',
+        # The fake server writes Indonesian filler words, which the quality gate would still send
+        # back for regeneration (too short, language not detected reliably): the benchmark measures
+        # the pipeline, not regeneration
+        'enable_quality_gate': 'false',
+        'generation_mode': args.generation_mode,
+        'section_concurrency': args.section_concurrency,
+        'gemini_api_base': gemini_url,
+        'api_rpm_limit': 100000,
+        'api_tpm_limit': 1000000000,
+        'api_quota_cooldown': 1,
+        'api_max_retries': args.max_retries,
+        'retry_base_delay': 0,
+        'retry_max_delay': 2,
+        'circuit_failure_threshold': 1000,
+        'circuit_reset_seconds': 1,
+        'enable_response_cache': 'false',
+        'enable_internal_linking': 'true',
+        'enable_auto_images': 'true',
+        'images_per_article': 2
+    }
+    with open(os.path.join(workdir, 'config.txt'), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(f"{key}={value}" for key, value in config.items()) + '\n')
+    with open(os.path.join(workdir, 'apikey.txt'), 'w', encoding='utf-8') as file:
+        file.write('\n'.join(f"AIzaBenchmarkFakeKey{i:020d}" for i in range(args.api_keys)) + '\n')
+
+
+def instrument(processor, timer):
+    """Wrap the pipeline stages on this processor's instances with timers"""
+    generator = processor.generator
+    generator.gemini_request = timer.wrap('generate', generator.gemini_request)
+    passes = generator.post_processing_passes
+    for stage in ('format', 'images', 'links'):
+        passes[stage] = timer.wrap(stage, passes[stage])
+    generator.build_markdown_post = timer.wrap('markdown', generator.build_markdown_post)
+    processor.github_manager.upload_article = timer.wrap('upload', processor.github_manager.upload_article)
+    processor.process_article = timer.wrap('total', processor.process_article)
+
+
+def make_keywords(level, count):
+    rng = random.Random(level)
+    return [f"{rng.choice(TOPICS)} {level}-{i}" for i in range(count)]
+
+
+def run_level(processor, timer, concurrency, articles, trace_memory):
+    timer.reset()
+    keywords = make_keywords(concurrency, articles)
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    results = processor.process_batch(keywords, max_workers=concurrency)
+    elapsed = time.perf_counter() - started
+
+    succeeded = sum(1 for result in results if result['success'])
+    report = {
+        'concurrency': concurrency,
+        'articles': len(keywords),
+        'succeeded': succeeded,
+        'failed': len(keywords) - succeeded,
+        'seconds': round(elapsed, 3),
+        'articles_per_min': round(succeeded / elapsed * 60, 2) if elapsed else 0.0,
+        'stages': timer.summary(),
+        'max_rss_mb': max_rss_mb()
+    }
+    if trace_memory:
+        report['peak_traced_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    return report
+
+
+def print_report(report):
+    print(f"\n=== concurrency {report['concurrency']} ===")
+    print(f"articles: {report['succeeded']}/{report['articles']} ok in {report['seconds']}s "
+          f"-> {report['articles_per_min']} articles/min")
+    memory = f"max RSS {report['max_rss_mb']} MB"
+    if 'peak_traced_mb' in report:
+        memory += f", peak traced {report['peak_traced_mb']} MB"
+    print(memory)
+    print(f"{'stage':<10}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}")
+    for stage in STAGES:
+        stats = report['stages'].get(stage)
+        if stats:
+            print(f"{stage:<10}{stats['count']:>7}{stats['p50_ms']:>11}{stats['p95_ms']:>11}{stats['p99_ms']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the generate -> publish pipeline against local stand-ins")
+    parser.add_argument('--articles', type=int, default=16, help="articles per concurrency level")
+    parser.add_argument('--concurrency', default='1,2,4,8', help="comma-separated worker counts")
+    parser.add_argument('--generation-mode', choices=['single', 'sectioned'], default='single')
+    parser.add_argument('--section-concurrency', type=int, default=4)
+    parser.add_argument('--api-keys', type=int, default=4, help="fake Gemini keys in the pool")
+    parser.add_argument('--max-retries', type=int, default=4)
+    parser.add_argument('--gemini-latency', type=float, default=0.5)
+    parser.add_argument('--gemini-error-rate', type=float, default=0.0)
+    parser.add_argument('--gemini-error-status', type=int, default=429)
+    parser.add_argument('--github-latency', type=float, default=0.1)
+    parser.add_argument('--github-error-rate', type=float, default=0.0)
+    parser.add_argument('--words-per-section', type=int, default=120)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="also report the tracemalloc peak (slows the run down)")
+    parser.add_argument('--json', metavar='PATH', help="write the full report as JSON")
+    parser.add_argument('--keep-workdir', action='store_true', help="keep the generated posts and state files")
+    parser.add_argument('--verbose', action='store_true', help="show generator and upload output")
+    args = parser.parse_args()
+
+    gemini = FakeGeminiServer(latency=args.gemini_latency, error_rate=args.gemini_error_rate,
+                              words_per_section=args.words_per_section, error_status=args.gemini_error_status)
+    github = FakeGitHubServer(latency=args.github_latency, error_rate=args.github_error_rate)
+    gemini_url = gemini.start()
+    github_url = github.start()
+
+    original_cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='seo-bench-')
+    write_workspace(workdir, gemini_url, args)
+    os.chdir(workdir)
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+
+    reports = []
+    try:
+        from app import ArticleProcessor, GitHubManager
+
+        processor = ArticleProcessor(REPO_NAME, GitHubManager('bench-token', base_url=github_url))
+        timer = StageTimer()
+        instrument(processor, timer)
+
+        if args.trace_memory:
+            tracemalloc.start()
+        for concurrency in [int(level) for level in args.concurrency.split(',') if level.strip()]:
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+                report = run_level(processor, timer, concurrency, args.articles, args.trace_memory)
+            reports.append(report)
+            print_report(report)
+    finally:
+        os.chdir(original_cwd)
+        gemini.stop()
+        github.stop()
+
+    print(f"\nrequests served: gemini={gemini.request_count} github={github.request_count}")
+    if args.keep_workdir:
+        print(f"Workdir kept at {workdir}")
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'settings': vars(args), 'levels': reports}, file, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
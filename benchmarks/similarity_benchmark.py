@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark for the related-article similarity index
+
+Indexes synthetic articles (topic-skewed vocabulary, so neighbours exist),
+then measures top-k query latency, single-article adds and reload time, and
+checks that an article's own text finds it first.
+
+Usage:
+    python benchmarks/similarity_benchmark.py --articles 50000 --body-words 400
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, '.general'))
+
+from similarity_index import SimilarityIndex
+
+
+def make_corpus(articles, body_words, topics, seed):
+    """(subject, title, body) per article, each drawing most words from one topic"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    common = [''.join(rng.choice(letters) for _ in range(rng.randint(3, 6))) for _ in range(300)]
+    topic_words = [
+        [''.join(rng.choice(letters) for _ in range(rng.randint(5, 9))) for _ in range(120)]
+        for _ in range(topics)
+    ]
+    corpus = []
+    for number in range(articles):
+        words = topic_words[rng.randrange(topics)]
+        title = ' '.join(rng.choices(words, k=6))
+        body = ' '.join(rng.choice(words) if rng.random() < 0.4 else rng.choice(common) for _ in range(body_words))
+        corpus.append((f"article {number}", title, body))
+    return corpus
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the similarity index")
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--body-words', type=int, default=400)
+    parser.add_argument('--topics', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.articles, args.body_words, args.topics, args.seed)
+    index_dir = tempfile.mkdtemp(prefix='similarity-bench-')
+
+    index = SimilarityIndex(index_dir)
+    started = time.perf_counter()
+    index.add_many(corpus[:-100])
+    print(f"bulk index   {args.articles - 100} articles in {time.perf_counter() - started:.1f}s")
+
+    add_times = []
+    for subject, title, body in corpus[-100:]:
+        started = time.perf_counter()
+        index.add(subject, title, body)
+        add_times.append(time.perf_counter() - started)
+    print(f"add          p50 {statistics.median(add_times) * 1000:.2f} ms  p95 {percentile(add_times, 0.95) * 1000:.2f} ms")
+
+    rng = random.Random(args.seed + 1)
+    samples = rng.sample(corpus, min(args.queries, len(corpus)))
+    index.most_similar(samples[0][1], samples[0][2])  # builds the postings once
+    query_times = []
+    self_hits = 0
+    for subject, title, body in samples:
+        started = time.perf_counter()
+        results = index.most_similar(title, body, limit=4)
+        query_times.append(time.perf_counter() - started)
+        self_hits += bool(results) and results[0][0] == subject
+    print(f"query top-4  p50 {statistics.median(query_times) * 1000:.2f} ms  "
+          f"p95 {percentile(query_times, 0.95) * 1000:.2f} ms  self-match {self_hits}/{len(samples)}")
+
+    started = time.perf_counter()
+    reloaded = SimilarityIndex(index_dir)
+    print(f"reload       {len(reloaded)} articles in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -67,5 +67,33 @@ SCHEDULER_SETTINGS = {
     'min_interval': 30,  # minimum minutes between runs
     'max_interval': 180,  # maximum minutes between runs
     'default_interval': 60,  # default interval in minutes
-    'max_concurrent_articles': 10
+    'max_concurrent_articles': 10,
+    'max_articles_per_run': 5,  # upper bound per run, budget pacing may go lower
+    'daily_token_budget': 0,  # Gemini tokens per day across all repos, 0 = unlimited
+    'daily_request_budget': 0,  # Gemini requests per day across all repos, 0 = unlimited
+    'default_article_tokens': 12000,  # cost estimate until real runs have been recorded
+    'default_article_requests': 1
+}
+
+# Keyword ingestion: normalization and exact dedupe always, near-duplicate clustering per mode
+KEYWORD_SETTINGS = {
+    'near_duplicates': 'report',  # report = list clusters, merge = keep one keyword per cluster, off = no clustering
+    'token_threshold': 0.75,  # Jaccard similarity of topic tokens
+    'typo_min_length': 5,  # shortest token reported as a typo of a spelling one edit away
+    'typo_min_ratio': 3,  # ...which must be at least this many times as frequent; typos are reported, never merged
+    'pending_preview': 500  # pending keywords listed in the UI; counts come from the state store counters
+}
+
+# Near-duplicate check before publishing (MinHash-LSH over published article bodies, per repo)
+DUPLICATE_SETTINGS = {
+    'action': 'skip',  # skip = do not publish, flag = publish with a warning, off = no check
+    'threshold': 0.5,  # estimated Jaccard similarity of 3-word shingles
+    'num_perm': 128,
+    'shingle_size': 3
+}
+
+# Publish journal: write-ahead record of GitHub uploads, replayed on startup after a crash
+JOURNAL_SETTINGS = {
+    'fsync_every': 20,  # closing events per fsync; uploading/published are always fsynced
+    'compact_every': 1000  # events between snapshots of the open entries
 }
\ No newline at end of file
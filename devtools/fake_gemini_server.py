@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Gemini API used for offline testing
+
+Implements generateContent, streamGenerateContent (SSE), the resumable Files
+API upload, batchGenerateContent, batch polling and result download. Articles
+are synthesized from the markdown outline found in the prompt.
+
+Usage:
+    python devtools/fake_gemini_server.py --port 8765 --batch-delay 5
+then set gemini_api_base=http://127.0.0.1:8765/v1beta in config.txt.
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import itertools
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+# Indonesian, the language the generator is configured for by default. Random words rather
+# than fixed sentences, so articles do not share phrases and read as near-duplicates
+FILLER_WORDS = (
+    "strategi bisnis pemasaran digital pertumbuhan pelanggan nilai data analisis perencanaan "
+    "pelaksanaan tim proses kualitas konten audiens saluran anggaran ukuran hasil wawasan praktik "
+    "kerangka alat platform otomatisasi kinerja optimasi pendapatan merek kepercayaan"
+).split()
+
+
+def synthesize_article(prompt, words_per_section=120):
+    """Build deterministic markdown that follows the outline in the prompt"""
+    rng = random.Random(hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+
+    def paragraph(count):
+        words = [rng.choice(FILLER_WORDS) for _ in range(count)]
+        return ' '.join(words).capitalize() + '.'
+
+    section = re.search(r'(?:only the|hanya bagian) "## ([^"]+)"', prompt)
+    if section:
+        subheadings = re.findall(r'^### (.+)$', prompt.split(section.group(0), 1)[1], re.MULTILINE)
+        lines = [f"## {section.group(1)}", "", paragraph(words_per_section // 2), ""]
+        for sub in subheadings:
+            lines += [f"### {sub}", "", paragraph(words_per_section // 2), "", f"- {paragraph(12)}", f"- {paragraph(12)}", ""]
+        return '\n'.join(lines).strip()
+
+    if re.search(r'(?:only the introduction|hanya pembukaan)', prompt):
+        return f"{paragraph(words_per_section)}\n\n{paragraph(words_per_section)}"
+
+    lines = []
+    for line in prompt.split('\n'):
+        if re.match(r'^#{1,3} ', line):
+            # Every heading gets a paragraph; under the H1 it is the introduction, like a real article
+            lines += [line, "", paragraph(words_per_section), ""]
+            if line.startswith('### '):
+                lines += [f"- {paragraph(12)}", f"- {paragraph(12)}", ""]
+    if not lines:
+        lines = [paragraph(words_per_section)]
+    return '\n'.join(lines).strip()
+
+
+def generate_response(request, words_per_section):
+    prompt = ''.join(
+        part.get('text', '')
+        for content in request.get('contents', [])
+        for part in content.get('parts', [])
+    )
+    text = synthesize_article(prompt, words_per_section)
+    prompt_tokens = max(1, len(prompt) // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'finishReason': 'STOP'}],
+        'usageMetadata': {
+            'promptTokenCount': prompt_tokens,
+            'candidatesTokenCount': output_tokens,
+            'totalTokenCount': prompt_tokens + output_tokens
+        }
+    }
+
+
+class FakeGeminiServer:
+    """In-process fake Gemini endpoint; start() returns the v1beta base URL"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0,
+                 batch_delay=1.0, words_per_section=120, stream_chunk_size=200, error_status=429):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.batch_delay = batch_delay
+        self.words_per_section = words_per_section
+        self.stream_chunk_size = stream_chunk_size
+        self.files = {}
+        self.batches = {}
+        self.upload_sessions = {}
+        self.request_count = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self.httpd = None
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return f"http://{self.host}:{self.port}/v1beta"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def _next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    def _should_fail(self):
+        with self._lock:
+            return self.error_rate > 0 and self._rng.random() < self.error_rate
+
+    # --- HTTP plumbing -------------------------------------------------
+
+    def _send_json(self, handler, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _read_body(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        return handler.rfile.read(length) if length else b''
+
+    def _dispatch(self, handler, method):
+        body = self._read_body(handler) if method == 'POST' else b''
+        path = urlparse(handler.path).path
+        with self._lock:
+            self.request_count += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        model_call = re.match(r'^/v1beta/models/([^/:]+):(\w+)$', path)
+        if model_call and model_call.group(2) in ('generateContent', 'streamGenerateContent'):
+            if self._should_fail():
+                status = 'RESOURCE_EXHAUSTED' if self.error_status == 429 else 'UNAVAILABLE'
+                return self._send_json(handler, self.error_status,
+                                       {'error': {'code': self.error_status, 'status': status}},
+                                       {'Retry-After': '1'})
+            response = generate_response(json.loads(body or b'{}'), self.words_per_section)
+            if model_call.group(2) == 'generateContent':
+                return self._send_json(handler, 200, response)
+            return self._stream(handler, response)
+
+        if model_call and model_call.group(2) == 'batchGenerateContent':
+            return self._create_batch(handler, model_call.group(1), json.loads(body or b'{}'))
+
+        if method == 'POST' and path == '/upload/v1beta/files':
+            session_id = self._next_id()
+            with self._lock:
+                self.upload_sessions[session_id] = json.loads(body or b'{}').get('file', {})
+            upload_url = f"http://{self.host}:{self.port}/upload/v1beta/files/sessions/{session_id}"
+            return self._send_json(handler, 200, {}, {'X-Goog-Upload-URL': upload_url})
+
+        session = re.match(r'^/upload/v1beta/files/sessions/(\d+)$', path)
+        if method == 'POST' and session:
+            name = f"files/input-{self._next_id()}"
+            with self._lock:
+                self.files[name] = body
+            return self._send_json(handler, 200, {'file': {'name': name, 'sizeBytes': str(len(body))}})
+
+        batch = re.match(r'^/v1beta/(batches/[\w-]+)$', path)
+        if method == 'GET' and batch:
+            with self._lock:
+                resource = self.batches.get(batch.group(1))
+            if not resource:
+                return self._send_json(handler, 404, {'error': {'code': 404, 'status': 'NOT_FOUND'}})
+            return self._send_json(handler, 200, resource)
+
+        download = re.match(r'^/download/v1beta/(files/[\w-]+):download$', path)
+        if method == 'GET' and download:
+            with self._lock:
+                data = self.files.get(download.group(1))
+            if data is None:
+                return self._send_json(handler, 404, {'error': {'code': 404, 'status': 'NOT_FOUND'}})
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'application/jsonl')
+            handler.send_header('Content-Length', str(len(data)))
+            handler.end_headers()
+            handler.wfile.write(data)
+            return
+
+        self._send_json(handler, 404, {'error': {'code': 404, 'status': 'NOT_FOUND', 'message': path}})
+
+    def _stream(self, handler, response):
+        text = response['candidates'][0]['content']['parts'][0]['text']
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/event-stream')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        def write_chunk(payload):
+            data = f"data: {json.dumps(payload)}\r\n\r\n".encode('utf-8')
+            handler.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+            handler.wfile.flush()
+
+        for start in range(0, len(text), self.stream_chunk_size):
+            write_chunk({'candidates': [{'content': {'parts': [{'text': text[start:start + self.stream_chunk_size]}]}}]})
+        write_chunk({'candidates': [{'content': {'parts': []}, 'finishReason': 'STOP'}],
+                     'usageMetadata': response['usageMetadata']})
+        handler.wfile.write(b"0\r\n\r\n")
+
+    # --- Batch API -----------------------------------------------------
+
+    def _create_batch(self, handler, model, payload):
+        input_file = payload.get('batch', {}).get('input_config', {}).get('file_name')
+        with self._lock:
+            data = self.files.get(input_file)
+        if data is None:
+            return self._send_json(handler, 400, {'error': {'code': 400, 'message': 'input file not found'}})
+
+        name = f"batches/batch-{self._next_id()}"
+        resource = {'name': name, 'metadata': {'model': f"models/{model}", 'state': 'BATCH_STATE_PENDING'}}
+        with self._lock:
+            self.batches[name] = resource
+        threading.Thread(target=self._run_batch, args=(name, data), daemon=True).start()
+        self._send_json(handler, 200, resource)
+
+    def _run_batch(self, name, data):
+        with self._lock:
+            self.batches[name]['metadata']['state'] = 'BATCH_STATE_RUNNING'
+        time.sleep(self.batch_delay)
+
+        output = []
+        for line in data.decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if self._should_fail():
+                output.append({'key': item.get('key'), 'error': {'code': 500, 'message': 'internal error'}})
+            else:
+                output.append({'key': item.get('key'),
+                               'response': generate_response(item.get('request', {}), self.words_per_section)})
+
+        out_name = f"files/output-{self._next_id()}"
+        with self._lock:
+            self.files[out_name] = '\n'.join(json.dumps(row) for row in output).encode('utf-8')
+            self.batches[name]['metadata']['state'] = 'BATCH_STATE_SUCCEEDED'
+            self.batches[name]['response'] = {'responsesFile': out_name}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Gemini API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of generations answered with an error")
+    parser.add_argument('--error-status', type=int, default=429, help="HTTP status for injected errors (429 or 5xx)")
+    parser.add_argument('--batch-delay', type=float, default=1.0, help="seconds a batch job stays running")
+    parser.add_argument('--words-per-section', type=int, default=120)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(args.host, args.port, args.latency, args.error_rate,
+                              args.batch_delay, args.words_per_section, error_status=args.error_status)
+    base_url = server.start()
+    print(f"Fake Gemini API listening on {base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the GitHub REST endpoints used by GitHubManager
+
+Covers GET /user, GET /user/repos, GET /repos/{repo}, and GET/PUT
+/repos/{repo}/contents/{path}, enough for PyGithub to list repos and
+create or update files. Files are kept in memory.
+
+Usage:
+    python devtools/fake_github_server.py --port 8766 --latency 0.2
+then create GitHubManager(token, base_url="http://127.0.0.1:8766").
+"""
+
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+
+
+class FakeGitHubServer:
+    """In-process fake GitHub API; start() returns the API base URL"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, error_rate=0.0, error_status=502):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.files = {}
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self.httpd = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server._dispatch(self, 'GET')
+
+            def do_PUT(self):
+                server._dispatch(self, 'PUT')
+
+            def do_POST(self):
+                server._dispatch(self, 'POST')
+
+        self.httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self.base_url
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+
+    def _send_json(self, handler, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def _repo_json(self, full_name):
+        owner, _, name = full_name.rpartition('/')
+        owner = owner or 'bench'
+        return {
+            'id': abs(hash(full_name)) % 10 ** 8,
+            'name': name,
+            'full_name': f"{owner}/{name}",
+            'private': False,
+            'description': 'Fake repository',
+            'owner': {'login': owner, 'url': f"{self.base_url}/users/{owner}"},
+            'url': f"{self.base_url}/repos/{full_name}",
+            'updated_at': '2025-07-15T00:00:00Z',
+            'default_branch': 'main'
+        }
+
+    def _content_json(self, full_name, path, data):
+        return {
+            'type': 'file',
+            'name': path.rsplit('/', 1)[-1],
+            'path': path,
+            'sha': hashlib.sha1(data).hexdigest(),
+            'size': len(data),
+            'encoding': 'base64',
+            'content': base64.b64encode(data).decode('ascii'),
+            'url': f"{self.base_url}/repos/{full_name}/contents/{path}"
+        }
+
+    def _dispatch(self, handler, method):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        path = urlparse(handler.path).path
+        with self._lock:
+            self.request_count += 1
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            return self._send_json(handler, self.error_status, {'message': 'Server Error'})
+
+        if path == '/user':
+            return self._send_json(handler, 200, {'login': 'bench', 'url': f"{self.base_url}/users/bench"})
+        if path == '/user/repos':
+            return self._send_json(handler, 200, [self._repo_json('bench/benchmark-blog')])
+
+        contents = re.match(r'^/repos/(.+?)/contents/(.+)$', path)
+        if contents:
+            full_name, file_path = contents.group(1), unquote(contents.group(2))
+            key = (full_name, file_path)
+            if method == 'GET':
+                with self._lock:
+                    data = self.files.get(key)
+                if data is None:
+                    return self._send_json(handler, 404, {'message': 'Not Found'})
+                return self._send_json(handler, 200, self._content_json(full_name, file_path, data))
+            if method == 'PUT':
+                payload = json.loads(body or b'{}')
+                data = base64.b64decode(payload.get('content', ''))
+                with self._lock:
+                    self.files[key] = data
+                return self._send_json(handler, 201, {
+                    'content': self._content_json(full_name, file_path, data),
+                    'commit': {'sha': hashlib.sha1(body).hexdigest(), 'message': payload.get('message', '')}
+                })
+
+        repo = re.match(r'^/repos/([^/]+(?:/[^/]+)?)$', path)
+        if repo:
+            return self._send_json(handler, 200, self._repo_json(repo.group(1)))
+
+        self._send_json(handler, 404, {'message': 'Not Found'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the GitHub API")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with an error")
+    parser.add_argument('--error-status', type=int, default=502)
+    args = parser.parse_args()
+
+    server = FakeGitHubServer(args.host, args.port, args.latency, args.error_rate, args.error_status)
+    print(f"Fake GitHub API listening on {server.start()}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()